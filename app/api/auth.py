@@ -1,31 +1,53 @@
 from datetime import timedelta
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm
+from jose import jwt
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.core.dependencies import get_current_active_user
-from app.core.security import ACCESS_TOKEN_EXPIRE_MINUTES, create_access_token
-from app.db.crud import (
-    authenticate_user,
-    create_user,
-    get_user_by_email,
-    get_user_by_username,
+from app.core.cache import cache_call, principal_cache
+from app.core.dependencies import get_current_active_user, oauth2_scheme
+from app.core.security import (
+    ACCESS_TOKEN_EXPIRE_MINUTES,
+    PasswordExecutorBusy,
+    create_access_token,
+    get_password_hash_async,
+    verify_password_async,
 )
-from app.db.database import get_db
+from app.db import async_crud
+from app.db.crud import create_user
+from app.db.database import get_async_db, get_db
 from app.db.models import User
 from app.schemas.user import Token, UserCreate, UserResponse
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
 
 
+def _password_executor_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="Too many authentication requests, please retry shortly",
+        headers={"Retry-After": "1"},
+    )
+
+
 @router.post(
     "/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED
 )
-def register_user(user: UserCreate, db: Session = Depends(get_db)):
+async def register_user(
+    user: UserCreate,
+    read_db: AsyncSession = Depends(get_async_db),
+    db: Session = Depends(get_db),
+):
     """
     Register a new user.
 
+    The duplicate checks read through the async read session, so only the
+    insert itself waits for the writer connection.
+
     Parameters:
     - **user**: User information including username, email, and password
 
@@ -34,6 +56,7 @@ def register_user(user: UserCreate, db: Session = Depends(get_db)):
 
     Raises:
     - **400 Bad Request**: When username or email is already registered
+    - **429 Too Many Requests**: When password hashing is saturated
 
     Example:
     ```
@@ -45,7 +68,7 @@ def register_user(user: UserCreate, db: Session = Depends(get_db)):
     ```
     """
     # Check if username already exists
-    db_user = get_user_by_username(db, username=user.username)
+    db_user = await async_crud.get_user_by_username(read_db, user.username)
     if db_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -53,23 +76,44 @@ def register_user(user: UserCreate, db: Session = Depends(get_db)):
         )
 
     # Check if email already exists
-    db_user = get_user_by_email(db, email=user.email)
+    db_user = await async_crud.get_user_by_email(read_db, user.email)
     if db_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered"
         )
 
-    # Create new user
-    return create_user(db=db, user=user)
+    # Return the connection to the pool while bcrypt runs
+    await read_db.close()
+
+    # Hash on the password executor so bcrypt never holds a request thread
+    try:
+        hashed_password = await get_password_hash_async(user.password)
+    except PasswordExecutorBusy:
+        raise _password_executor_busy()
+
+    # Create new user; a concurrent registration, or one a read replica
+    # has not seen yet, trips the unique constraints instead
+    try:
+        return await run_in_threadpool(create_user, db, user, hashed_password)
+    except IntegrityError:
+        await run_in_threadpool(db.rollback)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Username or email already registered",
+        )
 
 
 @router.post("/login", response_model=Token)
-def login_for_access_token(
-    form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)
+async def login_for_access_token(
+    form_data: OAuth2PasswordRequestForm = Depends(),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     OAuth2 compatible token login, get an access token for future requests.
 
+    The user is looked up through the async read session, so logins never
+    queue for the writer connection.
+
     Parameters:
     - **username**: User's username
     - **password**: User's password
@@ -80,6 +124,7 @@ def login_for_access_token(
 
     Raises:
     - **401 Unauthorized**: When credentials are invalid
+    - **429 Too Many Requests**: When password verification is saturated
 
     Example request (form-data):
     ```
@@ -94,8 +139,18 @@ def login_for_access_token(
     }
     ```
     """
-    # Authenticate user
-    user = authenticate_user(db, form_data.username, form_data.password)
+    # Authenticate user; bcrypt runs on the password executor
+    user = await async_crud.get_user_by_username(db, form_data.username)
+    # Release the connection before the bcrypt check; loaded attributes
+    # stay readable on the detached instance
+    await db.close()
+    try:
+        if user and not await verify_password_async(
+            form_data.password, user.hashed_password
+        ):
+            user = None
+    except PasswordExecutorBusy:
+        raise _password_executor_busy()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -121,3 +176,22 @@ async def read_users_me(current_user: User = Depends(get_current_active_user)):
         User information for the authenticated user
     """
     return current_user
+
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(
+    token: str = Depends(oauth2_scheme),
+    current_user: User = Depends(get_current_active_user),
+):
+    """
+    Log out by revoking the current access token.
+
+    The token is dropped from the principal cache and rejected until it
+    expires.
+
+    Raises:
+    - **401 Unauthorized**: When the token is invalid or already revoked
+    """
+    # The signature was verified by get_current_active_user
+    expires_at = jwt.get_unverified_claims(token).get("exp")
+    await cache_call(principal_cache.revoke, token, expires_at)
@@ -1,30 +1,34 @@
 import logging
-import time
-
-# from typing import List
-# import uuid
-from datetime import datetime
-
-import feedparser
-import requests
-from bs4 import BeautifulSoup
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, status
+from typing import List, Optional
+
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    HTTPException,
+    Query,
+    Request,
+    status,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.core.ai import generate_article_category, generate_article_summary
+from app.core.config import settings
 from app.core.dependencies import get_current_active_user
+from app.core.fields import InvalidFieldsError, parse_fields
+from app.core.http_cache import cached_json_response
+from app.core.ingestion import IngestConfig, run_ingestion
+from app.core.pagination import InvalidCursorError, decode_cursor, encode_cursor
+from app.core.streaming import ndjson_lines, ndjson_response, wants_ndjson
+from app.db import async_crud
 from app.db.crud import (
     add_bookmark,
     add_user_channel,
-    create_or_update_article,
-    get_article_by_url,
-    get_articles,
-    get_user_bookmarks,
     get_user_channels,
     is_bookmarked,
     remove_bookmark,
 )
-from app.db.database import get_db
+from app.db.database import get_async_db, get_db, streaming_session
 from app.db.models import NewsArticle as NewsArticleModel
 from app.db.models import User
 from app.schemas.channel import ChannelCreate, ChannelResponse
@@ -48,137 +52,128 @@ def process_channel_articles(
         max_articles: Maximum number of articles to process in one run
         retry_count: Number of times to retry on failure
     """
-    # Form the request URL for RSShub
-    rss_url = f"https://rsshub.app/telegram/channel/" f"{channel_alias.lstrip('@')}"
-    headers = {
-        "User-Agent": (
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-            "AppleWebKit/537.36 (KHTML, like Gecko) "
-            "Chrome/115.0.0.0 Safari/537.36"
-        )
-    }
+    process_channels([channel_alias], db, max_articles, retry_count)
 
-    logger.info(f"Starting to process articles for channel: {channel_alias}")
 
-    for attempt in range(retry_count):
-        try:
-            # RSS Feed parsing
-            logger.info(f"Fetching RSS feed from {rss_url}")
-            response = requests.get(rss_url, headers=headers, timeout=15)
-
-            # Handle rate limiting specifically
-            if response.status_code == 429:
-                retry_after = int(
-                    response.headers.get("Retry-After", (attempt + 1) * 5)
-                )
-                logger.warning(
-                    f"Rate limited (429) - will retry after {retry_after} seconds"
-                )
-                time.sleep(retry_after)
-                continue
+def process_channels(
+    channel_aliases: List[str],
+    db: Session,
+    max_articles: int = 90,
+    retry_count: int = 3,
+):
+    """
+    Background task to fetch and process articles from several channels at once.
 
-            if response.status_code != 200:
-                logger.error(f"Failed to fetch RSS feed: HTTP {response.status_code}")
-                time.sleep(
-                    3 + (attempt * 2)
-                )  # Wait before retry with increasing backoff
-                continue
+    Channels and their entries are handled concurrently by the ingestion
+    engine, see ``app.core.ingestion``.
 
-            rss_feed = feedparser.parse(response.content)
+    Args:
+        channel_aliases: The Telegram channel aliases to fetch articles from
+        db: Database session
+        max_articles: Maximum number of articles to process per channel
+        retry_count: Number of times to retry on failure
+    """
+    config = IngestConfig(max_articles=max_articles, retry_count=retry_count)
+    results = run_ingestion(channel_aliases, db, config)
+    for stats in results:
+        if stats.errors:
+            logger.error(
+                f"Failed to process channel {stats.channel_alias}: "
+                f"{'; '.join(stats.errors)}"
+            )
+    return results
 
-            if not rss_feed.entries:
-                logger.warning(f"No entries found in RSS feed for {channel_alias}")
-                return
 
-            logger.info(
-                f"Found {len(rss_feed.entries)} entries in feed for {channel_alias}"
-            )
+# Article fields of /feed and the feed row columns they are read from
+FEED_ARTICLE_FIELDS = {
+    "id": "id",
+    "title": "title",
+    "description": "content",
+    "link": "url",
+    "published_date": "published_date",
+    "ai_summary": "ai_summary",
+    "category": "category",
+}
 
-            # Process only up to max_articles
-            processed = 0
-            new_articles = 0
-
-            for entry in rss_feed.entries[:max_articles]:
-                # Check for duplicate by URL
-                article_url = entry.get("link", "")
-                if not article_url:
-                    logger.warning("Skipping entry without URL")
-                    continue
-
-                if get_article_by_url(db, article_url):
-                    logger.debug(f"Skipping duplicate article: {article_url}")
-                    continue
-
-                # Extract content
-                html_content = entry.get("description", "")
-                soup = BeautifulSoup(html_content, "html.parser")
-                plain_text = soup.get_text()
-
-                if len(plain_text.strip()) < 50:
-                    logger.warning(f"Article content too short: {article_url}")
-                    continue
-
-                # Generate AI summary and category
-                logger.info(
-                    f"Generating AI summary and category for: {entry.get('title', 'Untitled')}"
-                )
-                ai_summary = generate_article_summary(plain_text)
-                category = generate_article_category(plain_text, entry.get("title", ""))
-
-                # Prepare article data
-                try:
-                    published_date = (
-                        datetime.strptime(
-                            entry.get("published", datetime.now().isoformat()),
-                            "%a, %d %b %Y %H:%M:%S %Z",
-                        )
-                        if "published" in entry
-                        else datetime.now()
-                    )
-                except ValueError as e:
-                    logger.error(f"Date parsing error: {str(e)}")
-                    published_date = datetime.now()
-
-                article_data = {
-                    "title": entry.get("title", ""),
-                    "content": plain_text,
-                    "url": article_url,
-                    "source": channel_alias,
-                    "published_date": published_date,
-                    "ai_summary": ai_summary,
-                    "category": category,
-                }
 
-                # Create or update article in database
-                created = create_or_update_article(db, article_data)
-                processed += 1
-                if created:
-                    new_articles += 1
-                    logger.info(f"Added new article: {article_data['title']}")
+class FeedGrouper:
+    """
+    Turn the rows of ``async_crud.get_user_feed`` into /feed channel dicts.
 
-                # Add a delay to avoid overwhelming the AI service and rate limits
-                time.sleep(1.0)
+    Rows arrive grouped by channel and sorted newest first, so a single pass
+    turns them into plain dicts ready for orjson, without per-article model
+    validation. A channel is complete once a row of the next channel
+    arrives, which lets streamed responses send channels as they are read.
+    A channel with more than ``limit_per_channel`` rows gets a next_cursor
+    pointing after its last returned article.
 
-            logger.info(
-                f"Channel {channel_alias} processed {processed} articles, {new_articles} new"
-            )
-            return  # Success, exit function
+    Args:
+        limit_per_channel: Maximum number of articles returned per channel;
+            rows must be fetched with a per-channel limit of one more
+        fields: Article fields to return, all of ``FEED_ARTICLE_FIELDS`` by
+            default
+    """
 
-        except requests.RequestException as e:
-            logger.error(
-                f"Request error (attempt {attempt + 1}/{retry_count}): {str(e)}"
+    def __init__(self, limit_per_channel: int, fields: Optional[List[str]] = None):
+        self.limit_per_channel = limit_per_channel
+        self.attributes = [
+            (name, FEED_ARTICLE_FIELDS[name]) for name in fields or FEED_ARTICLE_FIELDS
+        ]
+        self.current: Optional[dict] = None
+        self.last_row = None
+
+    def add_rows(self, rows) -> List[dict]:
+        """Consume feed rows and return the channels they completed."""
+        completed = []
+        for row in rows:
+            current = self.current
+            if current is None or current["id"] != str(row.subscription_id):
+                if current is not None:
+                    completed.append(current)
+                current = self.current = {
+                    "id": str(row.subscription_id),
+                    "channel_alias": row.channel_alias,
+                    "articles": [],
+                    "next_cursor": None,
+                }
+                self.last_row = None
+            if row.id is None:
+                continue
+            if len(current["articles"]) == self.limit_per_channel:
+                last_row = self.last_row
+                if last_row is not None and last_row.published_date is not None:
+                    current["next_cursor"] = encode_cursor(
+                        last_row.published_date, last_row.id, row.channel_id
+                    )
+                continue
+            self.last_row = row
+            current["articles"].append(
+                {name: getattr(row, attribute) for name, attribute in self.attributes}
             )
-            if attempt < retry_count - 1:
-                sleep_time = 5 * (attempt + 1)  # Longer exponential backoff
-                logger.info(f"Retrying in {sleep_time} seconds")
-                time.sleep(sleep_time)
-        except Exception as e:
-            logger.error(f"Error processing channel {channel_alias}: {str(e)}")
-            return  # On general error, exit function
-
-    logger.error(
-        f"Failed to process channel {channel_alias} after {retry_count} attempts"
-    )
+        return completed
+
+    def finish(self) -> List[dict]:
+        """Return the last channel, which no following row completes."""
+        current, self.current = self.current, None
+        return [current] if current is not None else []
+
+
+def group_feed_rows(
+    rows, limit_per_channel: int, fields: Optional[List[str]] = None
+) -> List[dict]:
+    """
+    Build the /feed response from the rows of ``async_crud.get_user_feed``.
+
+    Args:
+        rows: Feed rows, fetched with a per-channel limit of limit_per_channel + 1
+        limit_per_channel: Maximum number of articles returned per channel
+        fields: Article fields to return, all of them by default
+
+    Returns:
+        List of channel dicts with their articles
+    """
+    grouper = FeedGrouper(limit_per_channel, fields)
+    return grouper.add_rows(rows) + grouper.finish()
 
 
 @router.post("/", response_model=ChannelResponse)
@@ -224,8 +219,9 @@ def create_channel(
 
 
 @router.get("/")
-def get_channels_with_articles(
-    db: Session = Depends(get_db),
+async def get_channels_with_articles(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_active_user),
     generate_summaries: bool = Query(
         False, description="Generate AI summaries for articles"
@@ -233,6 +229,22 @@ def get_channels_with_articles(
     generate_categories: bool = Query(
         False, description="Generate AI categories for articles"
     ),
+    limit_per_channel: int = Query(
+        settings.FEED_ARTICLES_PER_CHANNEL,
+        ge=1,
+        le=1000,
+        description="Maximum number of articles returned per channel",
+    ),
+    cursor: Optional[str] = Query(
+        None, description="next_cursor of a channel, returns that channel's next page"
+    ),
+    fields: Optional[str] = Query(
+        None,
+        description="Comma-separated article fields to return, e.g. title,ai_summary,link",
+    ),
+    stream: bool = Query(
+        False, description="Stream the feed as NDJSON, one channel per line"
+    ),
 ):
     """
     Get all channels and their articles for the authenticated user.
@@ -242,12 +254,29 @@ def get_channels_with_articles(
         Flag to generate AI summaries for articles
     - **generate_categories** (query, optional):
         Flag to generate AI categories for articles
+    - **limit_per_channel** (query, optional):
+        Maximum number of articles per channel. Default: FEED_ARTICLES_PER_CHANNEL
+    - **cursor** (query, optional):
+        The next_cursor of a channel; only that channel is returned, with
+        the page of articles following the cursor
+    - **fields** (query, optional):
+        Comma-separated article fields to return; id is always included.
+        Unrequested columns such as the article text are not read from the
+        database
+    - **stream** (query, optional):
+        Stream the channels as NDJSON, one per line; the same as sending
+        ``Accept: application/x-ndjson``
 
     Returns:
     - **List of channels with articles**:
-        Each channel includes its articles with metadata, sorted by date (newest first)
+        Each channel includes its articles with metadata, sorted by date (newest first),
+        and a next_cursor that is null on the channel's last page
+    - **ETag** (header): Send it back in If-None-Match to get a 304 while
+        the subscriptions and their articles are unchanged; streamed
+        responses carry none
 
     Raises:
+    - **400 Bad Request**: When the cursor or the fields are invalid
     - **401 Unauthorized**: When the user is not authenticated
 
     Example response:
@@ -266,61 +295,68 @@ def get_channels_with_articles(
             "ai_summary": "AI generated summary",
             "category": "Technology"
           }
-        ]
+        ],
+        "next_cursor": "eyJkIjoiMjAyMy0wMS0wMVQxMjowMDowMCIsImkiOjEsImMiOjF9"
       }
     ]
     ```
     """
-    # Get all the user's channels from the DB
-    channels = get_user_channels(db=db, user_id=str(current_user.id))
-
-    if not channels:
-        return []
-
-    feed_results = []
-
-    # Process unique channels only
-    unique_channels = {}
-    for channel in channels:
-        if channel.channel_alias not in unique_channels:
-            unique_channels[channel.channel_alias] = channel
-
-    for channel in unique_channels.values():
-        # Fetch articles for this channel from the DB (source == channel_alias)
-        # Articles are already sorted by published_date desc (newest first) in get_articles
-        articles_db = get_articles(db, source=channel.channel_alias)
-        articles = []
-        for article in articles_db:
-            articles.append(
-                {
-                    "id": article.id,
-                    "title": article.title,
-                    "description": article.content,
-                    "link": article.url,
-                    "published_date": (
-                        article.published_date.isoformat()
-                        if article.published_date
-                        else None
-                    ),
-                    "ai_summary": article.ai_summary,
-                    "category": article.category,
-                }
-            )
-
-        # Double-check articles are properly sorted by published_date (newest first)
-        articles.sort(
-            key=lambda x: x["published_date"] if x["published_date"] else "0",
-            reverse=True,
+    channel_id = None
+    after = None
+    if cursor:
+        try:
+            published_date, article_id, channel_id = decode_cursor(cursor)
+        except InvalidCursorError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if channel_id is None:
+            raise HTTPException(status_code=400, detail=f"Invalid cursor: {cursor}")
+        after = (published_date, article_id)
+
+    try:
+        fields = parse_fields(fields, list(FEED_ARTICLE_FIELDS))
+    except InvalidFieldsError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    columns = fields and [FEED_ARTICLE_FIELDS[name] for name in fields]
+
+    user_id = str(current_user.id)
+
+    if wants_ndjson(request, stream):
+
+        async def channels():
+            grouper = FeedGrouper(limit_per_channel, fields)
+            async with streaming_session(db) as stream_db:
+                async for rows in async_crud.stream_user_feed(
+                    stream_db,
+                    user_id=user_id,
+                    per_channel_limit=limit_per_channel + 1,
+                    channel_id=channel_id,
+                    after=after,
+                    fields=columns,
+                    batch_size=settings.STREAM_BATCH_SIZE,
+                ):
+                    completed = grouper.add_rows(rows)
+                    if completed:
+                        yield ndjson_lines(completed)
+            yield ndjson_lines(grouper.finish())
+
+        return ndjson_response(channels())
+
+    version = await async_crud.get_user_feed_version(db, user_id)
+
+    async def build():
+        # One windowed query returns every channel with its newest articles; one
+        # extra row per channel tells whether the channel has another page
+        rows = await async_crud.get_user_feed(
+            db,
+            user_id=user_id,
+            per_channel_limit=limit_per_channel + 1,
+            channel_id=channel_id,
+            after=after,
+            fields=columns,
         )
+        return group_feed_rows(rows, limit_per_channel, fields), {}
 
-        feed_results.append(
-            {
-                "id": str(channel.id),
-                "channel_alias": channel.channel_alias,
-                "articles": articles,
-            }
-        )
-    return feed_results
+    return await cached_json_response(request, user_id, version, build)
 
 
 @router.post("/update")
@@ -356,29 +392,24 @@ def update_all_channels(
     Notes:
     - This is an asynchronous operation using background tasks
     - Articles are fetched from Telegram channels via RSS
+    - Channels are fetched and enriched concurrently by the ingestion engine
     - Rate limiting can occur when too many requests are made
     """
     channels = get_user_channels(db=db, user_id=str(current_user.id))
     if not channels:
         raise HTTPException(status_code=404, detail="No channels found for user.")
 
-    channel_count = len(channels)
+    # Subscriptions point at normalized channels, so aliases are already
+    # unique; the ingestion engine also coalesces with other users' runs
+    channel_aliases = [channel.channel_alias for channel in channels]
+    channel_count = len(channel_aliases)
     logger.info(
         f"Starting update for {channel_count} channels for user {current_user.username}"
     )
 
-    # Add small delays between channel processing tasks to avoid overwhelming the RSS service
-    for idx, channel in enumerate(channels):
-        # Add a gradually increasing delay for each channel to avoid rate limiting
-        background_tasks.add_task(
-            process_channel_articles,
-            channel.channel_alias,
-            db,
-            max_articles_per_channel,
-        )
-        # Add a small delay between scheduling tasks
-        if idx < len(channels) - 1:
-            time.sleep(0.5)
+    background_tasks.add_task(
+        process_channels, channel_aliases, db, max_articles_per_channel
+    )
 
     return {
         "message": f"Update started for {channel_count} channels. New articles will be available shortly."
@@ -473,8 +504,9 @@ def delete_article_bookmark(
 
 
 @router.get("/bookmarks", response_model=list[NewsArticle])
-def list_user_bookmarks(
-    db: Session = Depends(get_db), current_user: User = Depends(get_current_active_user)
+async def list_user_bookmarks(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_user),
 ):
     """
     List all articles bookmarked by the current user.
@@ -501,11 +533,4 @@ def list_user_bookmarks(
     ]
     ```
     """
-    bookmarks = get_user_bookmarks(db, str(current_user.id))
-    article_ids = [b.article_id for b in bookmarks]
-    if not article_ids:
-        return []
-    articles = (
-        db.query(NewsArticleModel).filter(NewsArticleModel.id.in_(article_ids)).all()
-    )
-    return articles
+    return await async_crud.get_bookmarked_articles(db, str(current_user.id))
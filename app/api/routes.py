@@ -1,24 +1,71 @@
+from datetime import datetime
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
 
+from app.core.config import settings
 from app.core.dependencies import get_current_active_user
-from app.db import crud
-from app.db.database import get_db
+from app.core.fields import InvalidFieldsError, parse_fields
+from app.core.http_cache import (
+    CACHE_CONTROL,
+    cached_json_response,
+    etag_matches,
+    make_etag,
+    not_modified,
+)
+from app.core.pagination import (
+    InvalidCursorError,
+    decode_cursor,
+    decode_rank_cursor,
+    encode_cursor,
+    encode_rank_cursor,
+)
+from app.core.semantic import SemanticSearchUnavailable, get_semantic_index
+from app.core.streaming import ndjson_lines, ndjson_response, wants_ndjson
+from app.db import async_crud
+from app.db.crud import search_terms
+from app.db.database import get_async_db, streaming_session
 from app.db.models import User
-from app.schemas.news import NewsArticle
+from app.schemas.news import NewsArticle, SearchResult
 
 router = APIRouter(prefix="/api/news", tags=["news"])
 
+# Fields of the full article representation, in output order
+ARTICLE_FIELDS = tuple(NewsArticle.model_fields)
+
+
+def _parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    try:
+        return parse_fields(fields, ARTICLE_FIELDS)
+    except InvalidFieldsError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _with_column(fields: List[str], name: str) -> List[str]:
+    # Columns needed by the endpoint itself go last, so zip(fields, row)
+    # leaves them out of the output
+    return fields if name in fields else [*fields, name]
+
+
+def _article_dicts(rows, fields: Optional[List[str]]) -> List[dict]:
+    names = fields or ARTICLE_FIELDS
+    return [dict(zip(names, row)) for row in rows]
+
 
 @router.get("/articles/", response_model=List[NewsArticle])
-def read_articles(
+async def read_articles(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     source: Optional[str] = None,
     category: Optional[str] = None,
-    db: Session = Depends(get_db),
+    fields: Optional[str] = None,
+    stream: bool = False,
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_active_user),
 ):
     """
@@ -29,13 +76,28 @@ def read_articles(
       Number of articles to skip (pagination offset). Default: 0
     - **limit** (query, optional):
       Maximum number of articles to return. Default: 100
+    - **cursor** (query, optional):
+      Token from the X-Next-Cursor header of the previous page. Takes
+      precedence over skip and stays fast on deep pages
     - **source** (query, optional): Filter articles by news source
     - **category** (query, optional): Filter articles by article category
+    - **fields** (query, optional):
+      Comma-separated fields to return, e.g. ``title,ai_summary,category,url``;
+      id is always included. Unrequested columns such as content are not
+      read from the database
+    - **stream** (query, optional):
+      Stream the articles as NDJSON, one per line; the same as sending
+      ``Accept: application/x-ndjson``. A last ``{"next_cursor": ...}``
+      line replaces the X-Next-Cursor header when another page exists
 
     Returns:
     - **List of NewsArticle**: Articles matching the filter criteria
+    - **X-Next-Cursor** (header): Cursor for the next page, absent on the last page
+    - **ETag** (header): Send it back in If-None-Match to get a 304 while
+      the matching articles are unchanged; streamed responses carry none
 
     Raises:
+    - **400 Bad Request**: When the cursor or the fields are invalid
     - **401 Unauthorized**: When user is not authenticated
 
     Example response:
@@ -54,16 +116,84 @@ def read_articles(
     ]
     ```
     """
-    articles = crud.get_articles(
-        db, skip=skip, limit=limit, source=source, category=category
+    after = None
+    if cursor:
+        try:
+            published_date, article_id, _ = decode_cursor(cursor)
+        except InvalidCursorError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        after = (published_date, article_id)
+        skip = 0
+
+    fields = _parse_fields(fields)
+    # The cursor is built from the last row's sort key
+    columns = fields and _with_column(fields, "published_date")
+
+    if wants_ndjson(request, stream):
+
+        async def lines():
+            sent, last = 0, None
+            async with streaming_session(db) as stream_db:
+                async for rows in async_crud.stream_article_rows(
+                    stream_db,
+                    skip=skip,
+                    limit=limit + 1,
+                    source=source,
+                    category=category,
+                    after=after,
+                    fields=columns,
+                    batch_size=settings.STREAM_BATCH_SIZE,
+                ):
+                    page = rows[: limit - sent]
+                    sent += len(page)
+                    if page:
+                        last = page[-1]
+                        yield ndjson_lines(_article_dicts(page, fields))
+                    # A row beyond the limit means another page exists
+                    if len(rows) > len(page) and last is not None:
+                        if last.published_date is not None:
+                            cursor = encode_cursor(last.published_date, last.id)
+                            yield ndjson_lines([{"next_cursor": cursor}])
+
+        return ndjson_response(lines())
+
+    version = await async_crud.get_articles_version(
+        db, source=source, category=category
+    )
+
+    async def build():
+        headers = {}
+        # Fetch one extra row to learn whether another page exists. Plain
+        # column tuples are serialized directly, skipping ORM objects and
+        # per-article validation
+        rows = await async_crud.get_article_rows(
+            db,
+            skip=skip,
+            limit=limit + 1,
+            source=source,
+            category=category,
+            after=after,
+            fields=columns,
+        )
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            if last.published_date is not None:
+                headers["X-Next-Cursor"] = encode_cursor(last.published_date, last.id)
+        return _article_dicts(rows, fields), headers
+
+    return await cached_json_response(
+        request, str(current_user.id), version, build
     )
-    return articles
 
 
 @router.get("/articles/{article_id}", response_model=NewsArticle)
-def read_article(
+async def read_article(
     article_id: int,
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    fields: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_active_user),
 ):
     """
@@ -71,11 +201,16 @@ def read_article(
 
     Parameters:
     - **article_id** (path): The ID of the article to retrieve
+    - **fields** (query, optional):
+      Comma-separated fields to return; id is always included
 
     Returns:
     - **NewsArticle**: The requested article details
+    - **ETag** (header): Send it back in If-None-Match to get a 304 while
+      the article is unchanged
 
     Raises:
+    - **400 Bad Request**: When the fields are invalid
     - **401 Unauthorized**: When user is not authenticated
     - **404 Not Found**: When article with the specified ID doesn't exist
 
@@ -93,15 +228,36 @@ def read_article(
     }
     ```
     """
-    db_article = crud.get_article(db, article_id=article_id)
+    fields = _parse_fields(fields)
+    if fields is not None:
+        row = await async_crud.get_article_row(
+            db, article_id, _with_column(fields, "updated_at")
+        )
+        if row is None:
+            raise HTTPException(status_code=404, detail="Article not found")
+        etag = make_etag(request.url.path, row.updated_at, fields)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        return ORJSONResponse(
+            dict(zip(fields, row)),
+            headers={"ETag": etag, "Cache-Control": CACHE_CONTROL},
+        )
+
+    db_article = await async_crud.get_article(db, article_id=article_id)
     if db_article is None:
         raise HTTPException(status_code=404, detail="Article not found")
+    etag = make_etag(request.url.path, db_article.updated_at)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
     return db_article
 
 
 @router.get("/sources/", response_model=List[str])
-def get_sources(
-    db: Session = Depends(get_db), current_user: User = Depends(get_current_active_user)
+async def get_sources(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_user),
 ):
     """
     Get a list of all available news sources.
@@ -122,5 +278,155 @@ def get_sources(
     ```
     """
     # Query all distinct sources from the database
-    sources = db.query(crud.NewsArticle.source).distinct().all()
-    return [source[0] for source in sources if source[0]]
+    sources = await async_crud.get_sources(db)
+    return [source for source in sources if source]
+
+
+@router.get("/search", response_model=List[SearchResult])
+async def search_articles(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=200),
+    source: Optional[str] = None,
+    category: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_user),
+):
+    """
+    Full-text search over article titles, contents and AI summaries.
+
+    Parameters:
+    - **q** (query): Words that must all appear; text in double quotes
+      must appear as a phrase
+    - **source** (query, optional): Only search articles from this source
+    - **category** (query, optional): Only search articles in this category
+    - **since** (query, optional): Only articles published at or after this time
+    - **until** (query, optional): Only articles published before this time
+    - **limit** (query, optional): Maximum number of results, 1-100. Default: 20
+    - **cursor** (query, optional): Token from the X-Next-Cursor header of
+      the previous page
+
+    Returns:
+    - **List of SearchResult**: Matching articles, most relevant first,
+      each with its relevance score and a snippet of the content in which
+      matches are wrapped in ``<b>`` tags
+    - **X-Next-Cursor** (header): Cursor for the next page, absent on the last page
+    - **ETag** (header): Send it back in If-None-Match to get a 304 while
+      the searched articles are unchanged
+
+    Raises:
+    - **400 Bad Request**: When q is missing or too long, or the cursor is invalid
+    - **401 Unauthorized**: When user is not authenticated
+
+    Example response:
+    ```json
+    [
+      {
+        "id": 1,
+        "title": "Article Title",
+        "url": "https://example.com/article",
+        "source": "@channelname",
+        "published_date": "2023-01-01T12:00:00",
+        "category": "Technology",
+        "ai_summary": "AI generated summary",
+        "score": 3.2,
+        "snippet": "...new <b>technology</b> rolled out..."
+      }
+    ]
+    ```
+    """
+    after = None
+    if cursor:
+        try:
+            after = decode_rank_cursor(cursor)
+        except InvalidCursorError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    terms = search_terms(q)
+    if terms is None:
+        return ORJSONResponse([])
+
+    version = await async_crud.get_articles_version(
+        db, source=source, category=category
+    )
+
+    async def build():
+        headers = {}
+        rows = await async_crud.search_articles(
+            db,
+            terms,
+            limit=limit + 1,
+            source=source,
+            category=category,
+            since=since,
+            until=until,
+            after=after,
+        )
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            headers["X-Next-Cursor"] = encode_rank_cursor(last.score, last.id)
+        return [row._asdict() for row in rows], headers
+
+    return await cached_json_response(
+        request, str(current_user.id), version, build
+    )
+
+
+@router.get("/semantic", response_model=List[SearchResult])
+async def semantic_search(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=1000),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_user),
+):
+    """
+    Find the articles most similar to a text, including reworded ones.
+
+    Unlike /search, articles do not need to contain the words of q: they
+    are ranked by the similarity of their embeddings to the embedding of q,
+    which also matches other inflections and spellings of its words.
+
+    Parameters:
+    - **q** (query): Free text, e.g. a sentence or a whole article
+    - **limit** (query, optional): Maximum number of results, 1-100. Default: 20
+
+    Returns:
+    - **List of SearchResult**: The most similar articles first, with their
+      cosine similarity as score and no snippet
+    - **ETag** (header): Send it back in If-None-Match to get a 304 while
+      the articles and the index are unchanged
+
+    Raises:
+    - **400 Bad Request**: When q is missing or too long
+    - **401 Unauthorized**: When user is not authenticated
+    - **503 Service Unavailable**: When semantic search is not installed or disabled
+    """
+    try:
+        index = get_semantic_index()
+    except SemanticSearchUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+    version = (await async_crud.get_articles_version(db), index.generation)
+
+    async def build():
+        query = index.embedder.embed(q)
+        # The matrix product releases the GIL; keep it off the event loop
+        ranked = await run_in_threadpool(index.search, query, limit)
+        rows = await async_crud.get_search_rows(db, [id for id, _ in ranked])
+        by_id = {row.id: row._asdict() for row in rows}
+        # Articles deleted since they were indexed are left out
+        results = [
+            {**by_id[article_id], "score": score, "snippet": None}
+            for article_id, score in ranked
+            if article_id in by_id
+        ]
+        return results, {}
+
+    return await cached_json_response(
+        request, str(current_user.id), version, build
+    )
@@ -1,9 +1,15 @@
+import json
 import logging
+import math
 import os
-from typing import Optional
+import re
+from dataclasses import asdict, dataclass
+from typing import Any, Optional
 
 from openai import AzureOpenAI
 
+from app.core.llm_cache import llm_cache
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -26,6 +32,47 @@ AZURE_OPENAI_DEPLOYMENT = os.environ.get("AZURE_OPENAI_DEPLOYMENT", "gpt-4o")
 OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY", "")
 OPENAI_MODEL = os.environ.get("OPENAI_MODEL", "gpt-3.5-turbo")
 
+# Bump a version whenever its prompt changes, so results cached for the
+# old prompt are no longer served
+SUMMARY_PROMPT_VERSION = 1
+CATEGORY_PROMPT_VERSION = 2
+ENRICHMENT_PROMPT_VERSION = 1
+
+# Keywords are stored comma-separated in a String(255) column
+MAX_KEYWORDS = 8
+KEYWORDS_MAX_LENGTH = 255
+
+# Outermost braces of an answer wrapped in prose or a Markdown code fence
+JSON_OBJECT_RE = re.compile(r"\{.*\}", re.DOTALL)
+
+CATEGORIES = [
+    "Politics",
+    "Business",
+    "Technology",
+    "Science",
+    "Health",
+    "Entertainment",
+    "Sports",
+    "Environment",
+    "Education",
+    "Travel",
+    "Opinion",
+    "Culture",
+    "Economy",
+    "International",
+]
+
+
+@dataclass
+class ArticleEnrichment:
+    """What the LLM adds to an article, named after the NewsArticle columns."""
+
+    ai_summary: Optional[str] = None
+    category: Optional[str] = None
+    keywords: Optional[str] = None
+    sentiment_score: Optional[float] = None
+
+
 # Initialize OpenAI client
 client = None
 client_type = None  # 'azure' or 'openai'
@@ -74,6 +121,48 @@ if client is None:
     logger.warning("No OpenAI credentials provided. AI summarization will be disabled.")
 
 
+def model_name() -> str:
+    """Name of the model answering prompts, part of the LLM cache key."""
+    if client_type == "azure":
+        return f"azure:{AZURE_OPENAI_DEPLOYMENT}"
+    return f"openai:{OPENAI_MODEL}"
+
+
+def match_category(answer: str) -> str:
+    """Map the model's answer to one of CATEGORIES, or "Other"."""
+    # Ensure the returned category is in our
+    # predefined list (case-insensitive)
+    for valid_category in CATEGORIES:
+        if valid_category.lower() == answer.lower():
+            return valid_category
+
+    # If no match, use the first valid category
+    # that contains the returned text
+    for valid_category in CATEGORIES:
+        if (
+            valid_category.lower() in answer.lower()
+            or answer.lower() in valid_category.lower()
+        ):
+            return valid_category
+
+    # Fallback to "Other" if no match
+    logger.warning(f"Category '{answer}' not in predefined list, using 'Other'")
+    return "Other"
+
+
+def fallback_summary(content: str) -> Optional[str]:
+    """Simple summary used when the model fails: the start of the content."""
+    if content and len(content) > 3:
+        # Get the first 150 characters of the content for a simple summary
+        simple_summary = content[:150].strip()
+        # Add ellipsis if truncated
+        if len(content) > 150:
+            simple_summary += "..."
+        logger.info("Using simple summary as fallback")
+        return simple_summary
+    return None
+
+
 def generate_article_summary(content: str, max_length: int = 200) -> Optional[str]:
     """
     Generate a summary of an article using OpenAI.
@@ -93,6 +182,11 @@ def generate_article_summary(content: str, max_length: int = 200) -> Optional[st
         logger.warning("Content too short for summarization")
         return None
 
+    cache_key = ("summary", model_name(), SUMMARY_PROMPT_VERSION)
+    cached = llm_cache.get(*cache_key, content, str(max_length))
+    if cached is not None:
+        return cached
+
     try:
         prompt = (
             "Summarize the following news article in a concise summary in English, "
@@ -143,19 +237,13 @@ def generate_article_summary(content: str, max_length: int = 200) -> Optional[st
             )
 
         summary = response.choices[0].message.content.strip()
+        # Fallback summaries below are not cached, so they are retried
+        llm_cache.set(*cache_key, summary, content, str(max_length))
         return summary
     except Exception as e:
         logger.error(f"Error generating article summary: {str(e)}")
         # Fallback to simple summary - truncate content with ellipsis
-        if content and len(content) > 3:
-            # Get the first 150 characters of the content for a simple summary
-            simple_summary = content[:150].strip()
-            # Add ellipsis if truncated
-            if len(content) > 150:
-                simple_summary += "..."
-            logger.info("Using simple summary as fallback")
-            return simple_summary
-        return None
+        return fallback_summary(content)
 
 
 def generate_article_category(content: str, title: str) -> Optional[str]:
@@ -177,25 +265,13 @@ def generate_article_category(content: str, title: str) -> Optional[str]:
         logger.warning("Content too short for categorization")
         return None
 
+    cache_key = ("category", model_name(), CATEGORY_PROMPT_VERSION)
+    cached = llm_cache.get(*cache_key, title, content[:1000])
+    if cached is not None:
+        return cached
+
     try:
-        categories = [
-            "Politics",
-            "Business",
-            "Technology",
-            "Science",
-            "Health",
-            "Entertainment",
-            "Sports",
-            "Environment",
-            "Education",
-            "Travel",
-            "Opinion",
-            "Culture",
-            "Economy",
-            "International",
-        ]
-
-        categories_str = ", ".join(categories)
+        categories_str = ", ".join(CATEGORIES)
 
         prompt = (
             "Categorize the following news article into ONE "
@@ -203,7 +279,7 @@ def generate_article_category(content: str, title: str) -> Optional[str]:
             "Respond with just the category name in English, nothing else.\n\n"
             f"Title: {title}\n\n"
             "Article:\n"
-            f"{content[:1000]}  # Using first 1000 chars for efficiency\n\n"
+            f"{content[:1000]}\n\n"
             "Category in English:"
         )
 
@@ -245,26 +321,186 @@ def generate_article_category(content: str, title: str) -> Optional[str]:
                 top_p=1.0,
             )
 
-        category = response.choices[0].message.content.strip()
-
-        # Ensure the returned category is in our
-        # predefined list (case-insensitive)
-        for valid_category in categories:
-            if valid_category.lower() == category.lower():
-                return valid_category
-
-        # If no match, use the first valid category
-        # that contains the returned text
-        for valid_category in categories:
-            if (
-                valid_category.lower() in category.lower()
-                or category.lower() in valid_category.lower()
-            ):
-                return valid_category
-
-        # Fallback to "Other" if no match
-        logger.warning(f"Category '{category}' not in predefined list, using 'Other'")
-        return "Other"
+        category = match_category(response.choices[0].message.content.strip())
+        llm_cache.set(*cache_key, category, title, content[:1000])
+        return category
     except Exception as e:
         logger.error(f"Error generating article category: {str(e)}")
         return None
+
+
+def _clean_keywords(value: Any) -> Optional[str]:
+    """Keywords as a comma-separated string that fits the keywords column."""
+    if isinstance(value, str):
+        value = value.split(",")
+    if not isinstance(value, list):
+        return None
+    keywords, seen, length = [], set(), 0
+    for item in value:
+        if not isinstance(item, str) or not item.strip():
+            continue
+        keyword = " ".join(item.split())
+        added = len(keyword) + (2 if keywords else 0)
+        if keyword.lower() in seen or length + added > KEYWORDS_MAX_LENGTH:
+            continue
+        keywords.append(keyword)
+        seen.add(keyword.lower())
+        length += added
+        if len(keywords) == MAX_KEYWORDS:
+            break
+    return ", ".join(keywords) or None
+
+
+def _clean_sentiment(value: Any) -> Optional[float]:
+    """A sentiment score in [-1, 1], or None when it is not a number."""
+    if isinstance(value, bool):
+        return None
+    try:
+        score = float(value)
+    except (TypeError, ValueError):
+        return None
+    if not math.isfinite(score):
+        return None
+    return max(-1.0, min(1.0, score))
+
+
+def parse_enrichment(answer: str) -> Optional[ArticleEnrichment]:
+    """
+    Validate the model's JSON answer, repairing what can be repaired.
+
+    JSON surrounded by prose or a code fence is extracted, an unknown
+    category is mapped like single category answers are, keywords may be a
+    list or a comma-separated string and the sentiment is clamped to
+    [-1, 1]. Fields that remain invalid are left empty.
+
+    Args:
+        answer: Raw message content returned by the model
+
+    Returns:
+        The enrichment, or None when the answer holds no JSON object
+    """
+    try:
+        data = json.loads(answer)
+    except json.JSONDecodeError:
+        match = JSON_OBJECT_RE.search(answer)
+        if match is None:
+            return None
+        try:
+            data = json.loads(match.group(0))
+        except json.JSONDecodeError:
+            return None
+    if not isinstance(data, dict):
+        return None
+
+    summary = data.get("summary")
+    category = data.get("category")
+    return ArticleEnrichment(
+        ai_summary=summary.strip() or None if isinstance(summary, str) else None,
+        category=(
+            match_category(category.strip())
+            if isinstance(category, str) and category.strip()
+            else None
+        ),
+        keywords=_clean_keywords(data.get("keywords")),
+        sentiment_score=_clean_sentiment(data.get("sentiment_score")),
+    )
+
+
+def cached_enrichment(
+    content: str, title: str, max_length: int = 200
+) -> Optional[ArticleEnrichment]:
+    """
+    Look up the enrichment an earlier enrich_article call stored for an article.
+
+    Makes no LLM call, so callers can skip rate limits on a hit.
+
+    Returns:
+        The cached enrichment, or None on a miss, for an unreadable entry
+        and when the article would not be sent to the model
+    """
+    if not client or not content or len(content.strip()) < 50:
+        return None
+    cache_key = ("enrichment", model_name(), ENRICHMENT_PROMPT_VERSION)
+    cached = llm_cache.get(*cache_key, title, content, str(max_length))
+    if cached is None:
+        return None
+    try:
+        return ArticleEnrichment(**json.loads(cached))
+    except (TypeError, ValueError) as e:
+        # Like any cache failure, an unreadable entry is a miss
+        logger.warning(f"Ignoring unreadable cached enrichment: {str(e)}")
+        return None
+
+
+def enrich_article(
+    content: str, title: str, max_length: int = 200, lookup_cache: bool = True
+) -> ArticleEnrichment:
+    """
+    Summarise, categorise, tag and score an article with a single LLM call.
+
+    The article text is sent once and the model answers with a JSON object,
+    instead of one request for the summary and another for the category.
+
+    Args:
+        content: The article content
+        title: The article title
+        max_length: Maximum length of the summary in characters
+        lookup_cache: Whether to look for a cached result first; False when
+            the caller already did with cached_enrichment
+
+    Returns:
+        The enrichment; when the call fails or its answer is unusable, the
+        summary falls back to the start of the content and the other
+        fields stay empty
+    """
+    if not client:
+        logger.warning("Cannot enrich article: OpenAI client not initialized")
+        return ArticleEnrichment()
+
+    if not content or len(content.strip()) < 50:
+        logger.warning("Content too short for enrichment")
+        return ArticleEnrichment()
+
+    if lookup_cache:
+        cached = cached_enrichment(content, title, max_length)
+        if cached is not None:
+            return cached
+
+    system_prompt = (
+        "You are a news analyst. Read the article and reply with one JSON "
+        "object and nothing else, with these keys:\n"
+        '"summary": a concise, factual summary in English of at most '
+        f"{max_length} characters, regardless of the article's language;\n"
+        f'"category": exactly one of {", ".join(CATEGORIES)};\n'
+        f'"keywords": a list of at most {MAX_KEYWORDS} short English keywords;\n'
+        '"sentiment_score": a number from -1 (very negative) to 1 (very positive).'
+    )
+    try:
+        response = client.chat.completions.create(
+            model=AZURE_OPENAI_DEPLOYMENT if client_type == "azure" else OPENAI_MODEL,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": f"Title: {title}\n\nArticle:\n{content}"},
+            ],
+            response_format={"type": "json_object"},
+            temperature=0.3,
+            max_tokens=400,
+            top_p=1.0,
+        )
+        enrichment = parse_enrichment(response.choices[0].message.content or "")
+    except Exception as e:
+        logger.error(f"Error enriching article: {str(e)}")
+        enrichment = None
+
+    if enrichment is None:
+        logger.warning("Unusable enrichment answer, falling back to a simple summary")
+        return ArticleEnrichment(ai_summary=fallback_summary(content))
+    if enrichment.ai_summary is None or enrichment.category is None:
+        # Incomplete answers are not cached, so the article is retried later
+        enrichment.ai_summary = enrichment.ai_summary or fallback_summary(content)
+        return enrichment
+
+    cache_key = ("enrichment", model_name(), ENRICHMENT_PROMPT_VERSION)
+    result = json.dumps(asdict(enrichment))
+    llm_cache.set(*cache_key, result, title, content, str(max_length))
+    return enrichment
@@ -0,0 +1,362 @@
+"""
+Caches for authenticated principals.
+
+Every authenticated request used to decode its JWT and look the user up
+by username. The principal cache maps a token to a snapshot of the active
+user it resolved to, so repeated requests with the same token cost one
+dictionary lookup. Entries expire after AUTH_CACHE_TTL_SECONDS or when
+the token does, whichever comes first, and are dropped when the user's
+is_active flag changes or the token is logged out.
+
+The default backend is in-process. Set AUTH_CACHE_BACKEND=redis and
+REDIS_URL to share entries and logouts between workers.
+"""
+
+import asyncio
+import hashlib
+import heapq
+import json
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.security import ACCESS_TOKEN_EXPIRE_MINUTES
+
+try:
+    import redis
+except ImportError:  # pragma: no cover - optional dependency
+    redis = None
+
+
+@dataclass(frozen=True)
+class CachedUser:
+    """Immutable snapshot of the user fields requests rely on."""
+
+    id: int
+    username: str
+    email: str
+    is_active: bool
+    created_at: Optional[datetime] = None
+
+    @classmethod
+    def from_user(cls, user: Any) -> "CachedUser":
+        return cls(
+            id=user.id,
+            username=user.username,
+            email=user.email,
+            is_active=bool(user.is_active),
+            created_at=user.created_at,
+        )
+
+    def to_json(self) -> str:
+        data = asdict(self)
+        if self.created_at is not None:
+            data["created_at"] = self.created_at.isoformat()
+        return json.dumps(data)
+
+    @classmethod
+    def from_json(cls, raw: str) -> "CachedUser":
+        data = json.loads(raw)
+        if data.get("created_at"):
+            data["created_at"] = datetime.fromisoformat(data["created_at"])
+        return cls(**data)
+
+
+class TTLCache:
+    """
+    Thread-safe LRU mapping whose entries also expire after a TTL.
+
+    Args:
+        maxsize: Maximum number of entries; the least recently used goes first
+        ttl: Default time to live in seconds
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return None
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0 or self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.pop(key, None)
+            return entry[0] if entry else None
+
+    def discard_where(self, predicate: Callable[[Any], bool]) -> int:
+        """Drop every entry whose value matches, returning how many went."""
+        with self._lock:
+            keys = [k for k, (value, _) in self._data.items() if predicate(value)]
+            for key in keys:
+                del self._data[key]
+        return len(keys)
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            entry = self._data.get(key)
+            return entry is not None and entry[1] > time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def reset(self):
+        """Drop all entries and zero the counters."""
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self._data),
+        }
+
+
+def _seconds_until(expires_at: Optional[float]) -> Optional[float]:
+    return None if expires_at is None else expires_at - time.time()
+
+
+class RevokedTokens:
+    """
+    Thread-safe set of revoked tokens, each kept until the token expires.
+
+    Unlike TTLCache it has no size bound: evicting a revocation early would
+    make a logged out token valid again. Its size is bounded by the logouts
+    within one token lifetime instead, as expired revocations are purged
+    from a heap ordered by expiry on every revoke.
+
+    Args:
+        default_ttl: Seconds to keep tokens revoked without a known expiry
+    """
+
+    def __init__(self, default_ttl: float):
+        self.default_ttl = default_ttl
+        self._expiry: Dict[str, float] = {}
+        self._heap: List[Tuple[float, str]] = []
+        self._lock = threading.Lock()
+
+    def _purge(self, now: float):
+        while self._heap and self._heap[0][0] <= now:
+            expires_at, token = heapq.heappop(self._heap)
+            # A token revoked twice has a stale heap entry
+            if self._expiry.get(token) == expires_at:
+                del self._expiry[token]
+
+    def add(self, token: str, expires_at: Optional[float] = None):
+        now = time.time()
+        if expires_at is None:
+            expires_at = now + self.default_ttl
+        with self._lock:
+            self._purge(now)
+            if expires_at > max(now, self._expiry.get(token, now)):
+                self._expiry[token] = expires_at
+                heapq.heappush(self._heap, (expires_at, token))
+
+    def __contains__(self, token: str) -> bool:
+        expires_at = self._expiry.get(token)
+        return expires_at is not None and expires_at > time.time()
+
+    def __len__(self) -> int:
+        return len(self._expiry)
+
+    def clear(self):
+        with self._lock:
+            self._expiry.clear()
+            self._heap.clear()
+
+
+class PrincipalCache:
+    """
+    In-process token -> CachedUser cache with logout revocation.
+
+    Logouts are only known to the worker that handled them; use the redis
+    backend when several workers serve the API.
+    """
+
+    # Operations never wait on I/O, so callers may run them on the event loop
+    blocking = False
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.entries = TTLCache(maxsize, ttl)
+        # Revoked tokens are remembered until they would have expired anyway
+        self.revoked = RevokedTokens(float(ACCESS_TOKEN_EXPIRE_MINUTES * 60))
+
+    def get(self, token: str) -> Optional[CachedUser]:
+        return self.entries.get(token)
+
+    def set(self, token: str, user: CachedUser, expires_at: Optional[float] = None):
+        """
+        Cache the user a token resolved to.
+
+        Args:
+            token: The bearer token
+            user: Snapshot of the resolved user
+            expires_at: Token expiry as a UNIX timestamp, caps the entry's TTL
+        """
+        self.entries.set(token, user, _seconds_until(expires_at))
+
+    def invalidate_user(self, username: str):
+        """
+        Drop every cached token of a user, e.g. after is_active changed.
+
+        Scans the bounded cache instead of keeping a per-user index, which
+        would have to be pruned as entries expire; is_active changes are rare.
+        """
+        self.entries.discard_where(lambda user: user.username == username)
+
+    def revoke(self, token: str, expires_at: Optional[float] = None):
+        """Forget a token and reject it until it expires, e.g. on logout."""
+        self.entries.pop(token)
+        self.revoked.add(token, expires_at)
+
+    def is_revoked(self, token: str) -> bool:
+        return token in self.revoked
+
+    def clear(self):
+        self.entries.reset()
+        self.revoked.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "memory",
+            **self.entries.stats(),
+            "revoked": len(self.revoked),
+        }
+
+
+class RedisPrincipalCache:
+    """
+    Principal cache shared by all workers through Redis.
+
+    Tokens are stored as SHA-256 digests so the cache never holds usable
+    credentials. Hit and miss counters are per process.
+    """
+
+    # Every operation is a network round trip; callers on the event loop
+    # must offload them to a thread
+    blocking = True
+
+    def __init__(self, url: str, ttl: float, prefix: str = "auth:"):
+        if redis is None:
+            raise RuntimeError(
+                "AUTH_CACHE_BACKEND=redis requires the 'redis' package"
+            )
+        self.client = redis.Redis.from_url(url, socket_timeout=1.0)
+        self.ttl = ttl
+        self.prefix = prefix
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, kind: str, value: str) -> str:
+        return f"{self.prefix}{kind}:{value}"
+
+    @staticmethod
+    def _digest(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def _ttl(self, expires_at: Optional[float]) -> int:
+        remaining = _seconds_until(expires_at)
+        ttl = self.ttl if remaining is None else min(self.ttl, remaining)
+        return int(ttl)
+
+    def get(self, token: str) -> Optional[CachedUser]:
+        raw = self.client.get(self._key("token", self._digest(token)))
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return CachedUser.from_json(raw)
+
+    def set(self, token: str, user: CachedUser, expires_at: Optional[float] = None):
+        ttl = self._ttl(expires_at)
+        if ttl <= 0:
+            return
+        digest = self._digest(token)
+        user_key = self._key("user", user.username)
+        pipe = self.client.pipeline()
+        pipe.set(self._key("token", digest), user.to_json(), ex=ttl)
+        pipe.sadd(user_key, digest)
+        pipe.expire(user_key, int(self.ttl))
+        pipe.execute()
+
+    def invalidate_user(self, username: str):
+        user_key = self._key("user", username)
+        digests = self.client.smembers(user_key)
+        keys = [self._key("token", d.decode()) for d in digests]
+        self.client.delete(user_key, *keys)
+
+    def revoke(self, token: str, expires_at: Optional[float] = None):
+        digest = self._digest(token)
+        self.client.delete(self._key("token", digest))
+        remaining = _seconds_until(expires_at)
+        ttl = ACCESS_TOKEN_EXPIRE_MINUTES * 60 if remaining is None else int(remaining)
+        if ttl > 0:
+            self.client.set(self._key("revoked", digest), 1, ex=ttl)
+
+    def is_revoked(self, token: str) -> bool:
+        return bool(self.client.exists(self._key("revoked", self._digest(token))))
+
+    def clear(self):
+        for key in self.client.scan_iter(f"{self.prefix}*"):
+            self.client.delete(key)
+        self.hits = self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": "redis", "hits": self.hits, "misses": self.misses}
+
+
+def create_principal_cache():
+    """Build the principal cache configured by AUTH_CACHE_* settings."""
+    if settings.AUTH_CACHE_BACKEND == "redis":
+        if not settings.REDIS_URL:
+            raise ValueError("AUTH_CACHE_BACKEND=redis requires REDIS_URL")
+        return RedisPrincipalCache(settings.REDIS_URL, settings.AUTH_CACHE_TTL_SECONDS)
+    # "none" never caches principals but still remembers logouts
+    maxsize = 0 if settings.AUTH_CACHE_BACKEND == "none" else settings.AUTH_CACHE_MAX_SIZE
+    return PrincipalCache(maxsize, settings.AUTH_CACHE_TTL_SECONDS)
+
+
+principal_cache = create_principal_cache()
+
+
+async def cache_call(func, *args):
+    """Run a principal cache operation, off the event loop if it does I/O."""
+    if principal_cache.blocking:
+        return await asyncio.to_thread(func, *args)
+    return func(*args)
@@ -0,0 +1,286 @@
+"""
+Negotiated response compression.
+
+``CompressionMiddleware`` picks zstandard, brotli or gzip from the
+request's Accept-Encoding and compresses text and JSON responses larger
+than a threshold. brotli and zstandard are optional; encodings whose
+package is missing are simply never offered.
+
+Bodies sent in one piece are compressed in slices on a worker thread once
+they exceed ``CHUNK_SIZE``, so a multi-megabyte feed neither blocks the
+event loop nor waits for the whole output before the first bytes go out.
+Streaming responses are flushed after every chunk they produce, so
+clients receive each chunk as soon as the application sends it.
+"""
+
+import zlib
+from typing import Callable, Dict, List, Optional, Sequence
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+# Bodies larger than this are compressed slice by slice off the event loop
+CHUNK_SIZE = 64 * 1024
+
+COMPRESSIBLE_TYPES = ("text/", "application/json", "application/x-ndjson", "+json")
+
+
+class GzipEncoder:
+    def __init__(self, level: int):
+        # wbits=31 writes the gzip container rather than a raw zlib stream
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class BrotliEncoder:
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class ZstdEncoder:
+    def __init__(self, level: int):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_FINISH)
+
+
+def available_encodings() -> List[str]:
+    """Encodings whose compression library is installed."""
+    encodings = []
+    if zstandard is not None:
+        encodings.append("zstd")
+    if brotli is not None:
+        encodings.append("br")
+    encodings.append("gzip")
+    return encodings
+
+
+def negotiate_encoding(
+    accept_encoding: str, supported: Sequence[str]
+) -> Optional[str]:
+    """
+    Pick the content coding for a response.
+
+    The client's q-values decide; ties go to the earliest entry of
+    ``supported``. A ``*`` entry applies to codings not listed explicitly.
+
+    Args:
+        accept_encoding: Value of the Accept-Encoding request header
+        supported: Server-side encodings in order of preference
+
+    Returns:
+        The chosen encoding, or None to send the body uncompressed
+    """
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        weights[coding] = q
+
+    best, best_q = None, 0.0
+    for encoding in supported:
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def _weaken(headers: MutableHeaders):
+    # A compressed body is a different representation, so a strong ETag
+    # would be wrong; weak ETags still match If-None-Match
+    etag = headers.get("etag")
+    if etag and not etag.startswith("W/"):
+        headers["ETag"] = f"W/{etag}"
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing responses with zstd, br or gzip.
+
+    Args:
+        app: The wrapped ASGI application
+        minimum_size: Bodies smaller than this many bytes are sent as is
+        encodings: Encodings to offer, in order of preference
+        gzip_level: zlib compression level, 1-9
+        brotli_quality: brotli quality, 0-11
+        zstd_level: zstandard level, 1-22
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        encodings: Optional[Sequence[str]] = None,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+        zstd_level: int = 3,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        installed = available_encodings()
+        self.encodings = [e for e in (encodings or installed) if e in installed]
+        self.factories: Dict[str, Callable[[], object]] = {
+            "gzip": lambda: GzipEncoder(gzip_level),
+            "br": lambda: BrotliEncoder(brotli_quality),
+            "zstd": lambda: ZstdEncoder(zstd_level),
+        }
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        accept = Headers(scope=scope).get("accept-encoding", "")
+        encoding = negotiate_encoding(accept, self.encodings) if accept else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        responder = _CompressionResponder(
+            self.app, encoding, self.factories[encoding], self.minimum_size
+        )
+        await responder(scope, receive, send)
+
+
+class _CompressionResponder:
+    def __init__(
+        self,
+        app: ASGIApp,
+        encoding: str,
+        factory: Callable[[], object],
+        minimum_size: int,
+    ):
+        self.app = app
+        self.encoding = encoding
+        self.factory = factory
+        self.minimum_size = minimum_size
+        self.send: Send = None
+        self.start_message: Optional[Message] = None
+        self.encoder = None
+        self.passthrough = False
+        self.if_none_match = ""
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        self.send = send
+        self.if_none_match = Headers(scope=scope).get("if-none-match", "")
+        await self.app(scope, receive, self.send_with_compression)
+
+    async def send_with_compression(self, message: Message):
+        if message["type"] == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            content_type = headers.get("content-type", "")
+            self.passthrough = (
+                "content-encoding" in headers
+                or not any(t in content_type for t in COMPRESSIBLE_TYPES)
+            )
+            if message["status"] == 304:
+                # Echo the ETag in the form the client has it: weak if the
+                # cached body was compressed, strong if it was too small
+                etag = headers.get("etag", "")
+                if f"W/{etag}" in self.if_none_match:
+                    headers = MutableHeaders(raw=list(message["headers"]))
+                    _weaken(headers)
+                    message = {**message, "headers": headers.raw}
+                self.passthrough = True
+            # Headers wait for the first body chunk, which decides whether
+            # compressing is worth it
+            self.start_message = message
+            return
+
+        if message["type"] != "http.response.body":
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.start_message is not None:
+            start, self.start_message = self.start_message, None
+            if self.passthrough or (not more_body and len(body) < self.minimum_size):
+                await self.send(start)
+                await self.send(message)
+                return
+            self.encoder = self.factory()
+            # Copy so the application's own header list is never modified
+            headers = MutableHeaders(raw=list(start["headers"]))
+            start = {**start, "headers": headers.raw}
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+            _weaken(headers)
+            if not more_body and len(body) <= CHUNK_SIZE:
+                compressed = self.encoder.compress(body) + self.encoder.finish()
+                headers["Content-Length"] = str(len(compressed))
+                await self.send(start)
+                await self.send({**message, "body": compressed})
+                return
+            # Length is unknown until the last slice is compressed
+            del headers["Content-Length"]
+            await self.send(start)
+            if not more_body:
+                await self.send_slices(body)
+                return
+        elif self.encoder is None:
+            await self.send(message)
+            return
+
+        chunk = self.encoder.compress(body)
+        chunk += self.encoder.flush() if more_body else self.encoder.finish()
+        await self.send(
+            {"type": "http.response.body", "body": chunk, "more_body": more_body}
+        )
+
+    async def send_slices(self, body: bytes):
+        for start in range(0, len(body), CHUNK_SIZE):
+            piece = body[start : start + CHUNK_SIZE]
+            compressed = await run_in_threadpool(self.encoder.compress, piece)
+            if compressed:
+                await self.send(
+                    {"type": "http.response.body", "body": compressed, "more_body": True}
+                )
+        await self.send(
+            {"type": "http.response.body", "body": self.encoder.finish(), "more_body": False}
+        )
+
@@ -12,18 +12,61 @@ class Settings(BaseSettings):
 
     # Database settings
     DATABASE_URL: str = "sqlite:///./news_aggregator.db"
+    # Optional replica for read-only endpoints
+    DATABASE_READ_URL: Optional[str] = None
+    # Connection pool for server databases such as PostgreSQL
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_POOL_TIMEOUT: float = 30.0
+    # SQLite tuning
+    SQLITE_CACHE_SIZE_KB: int = 64000
+    SQLITE_MMAP_SIZE: int = 268435456  # 256 MiB
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_READ_POOL_SIZE: int = 8
+    SQLITE_WRITE_POOL_SIZE: int = 1
+
+    # Response compression; encodings are preferred in this order when the
+    # client accepts several, and zstd/br need the zstandard/brotli packages.
+    # zstd at level 3 gives the best size for the CPU spent on feed bodies,
+    # see performance/benchmark_compression.py
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MINIMUM_SIZE: int = 1024
+    COMPRESSION_ENCODINGS: list[str] = ["zstd", "br", "gzip"]
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
+    COMPRESSION_ZSTD_LEVEL: int = 3
 
     # CORS settings
     BACKEND_CORS_ORIGINS: list[str] = ["*"]
 
     # Security settings
     SECRET_KEY: str = os.environ.get("SECRET_KEY", "")
+    # Principal cache for authenticated requests: "memory", "redis" or "none"
+    AUTH_CACHE_BACKEND: str = "memory"
+    AUTH_CACHE_TTL_SECONDS: float = 300.0
+    AUTH_CACHE_MAX_SIZE: int = 10000
+    REDIS_URL: Optional[str] = None
+    # bcrypt cost factor; each extra round doubles the hashing time
+    BCRYPT_ROUNDS: int = 12
+    # Dedicated threads for password hashing and how many calls may queue
+    # for them before requests are rejected with 429
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 16
 
     # Server settings
     HOST: str = "127.0.0.1"
     PORT: int = 8000
     STREAMLIT_PORT: int = 8501
 
+    # Persistent cache of LLM results keyed by task, model, prompt version
+    # and a SHA-256 of the normalized input, see app.core.llm_cache. The
+    # least recently used entries beyond the cap are evicted; a size of 0
+    # disables it
+    LLM_CACHE_PATH: str = "data/llm_cache.sqlite3"
+    LLM_CACHE_MAX_ENTRIES: int = 100000
+
     # Azure OpenAI settings
     AZURE_OPENAI_KEY: Optional[str] = None
     AZURE_OPENAI_ENDPOINT: Optional[str] = None
@@ -36,6 +79,42 @@ class Settings(BaseSettings):
     # Optional integrations
     SENTRY_DSN: Optional[str] = None
 
+    # In-process cache of serialized GET responses, revalidated by ETag;
+    # a size of 0 disables it
+    RESPONSE_CACHE_MAX_SIZE: int = 1024
+    RESPONSE_CACHE_TTL_SECONDS: float = 60.0
+
+    # Feed settings
+    FEED_ARTICLES_PER_CHANNEL: int = 100
+
+    # NDJSON responses read this many rows per round trip from a server-side
+    # cursor and write them to the client as one chunk
+    STREAM_BATCH_SIZE: int = 200
+
+    # Semantic search; vectors are stored under SEMANTIC_INDEX_DIR and need
+    # numpy. Changing the dimensions makes the next sync re-embed everything
+    SEMANTIC_SEARCH_ENABLED: bool = True
+    SEMANTIC_INDEX_DIR: str = "data/semantic"
+    SEMANTIC_DIMENSIONS: int = 256
+    SEMANTIC_MAX_TEXT_CHARS: int = 2000
+
+    # Ingestion settings
+    RSS_BASE_URL: str = "https://rsshub.app/telegram/channel"
+    INGEST_FETCH_CONCURRENCY: int = 4
+    INGEST_PARSE_CONCURRENCY: int = 4
+    INGEST_AI_CONCURRENCY: int = 4
+    INGEST_AI_RATE_PER_SECOND: float = 2.0
+    INGEST_REQUEST_TIMEOUT: float = 15.0
+    INGEST_PERSIST_BATCH_SIZE: int = 200
+    INGEST_FRESHNESS_SECONDS: float = 60.0
+    # Articles whose SimHash differs from a stored one, published at most
+    # the window earlier, in at most this many of 64 bits reuse its summary
+    # and category and join its cluster; None turns detection off. Lookups
+    # find every candidate up to 7 bits, see app.core.dedup. Reposts of
+    # posts with a few dozen words or more typically differ in under 7 bits
+    INGEST_NEAR_DUPLICATE_DISTANCE: Optional[int] = 7
+    INGEST_NEAR_DUPLICATE_WINDOW_HOURS: float = 72.0
+
     class Config:
         case_sensitive = True
         env_file = ".env"
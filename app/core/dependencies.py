@@ -1,22 +1,35 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.cache import CachedUser, cache_call, principal_cache
 from app.core.security import ALGORITHM, SECRET_KEY
-from app.db.crud import get_user_by_username
-from app.db.database import get_db
+from app.db.async_crud import get_user_by_username
+from app.db.database import get_async_db
 from app.schemas.user import TokenData
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
 
 async def get_current_user(
-    token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)
+    token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get the current user from the JWT token.
+
+    Tokens seen before are answered from the principal cache without
+    decoding the JWT or touching the database. On a miss the user lookup
+    goes through an AsyncSession, so this dependency never blocks the
+    event loop while waiting on the database.
+
+    Returns:
+        CachedUser snapshot of the authenticated user
     """
+    cached = await cache_call(principal_cache.get, token)
+    if cached is not None:
+        return cached
+
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -35,13 +48,22 @@ async def get_current_user(
     except JWTError:
         raise credentials_exception
 
+    if await cache_call(principal_cache.is_revoked, token):
+        raise credentials_exception
+
     # Get user from database
-    user = get_user_by_username(db, username=token_data.username)
+    user = await get_user_by_username(db, username=token_data.username)
 
     if user is None:
         raise credentials_exception
 
-    return user
+    snapshot = CachedUser.from_user(user)
+    # Inactive users are rejected on every request, so only active ones
+    # are worth caching
+    if snapshot.is_active:
+        await cache_call(principal_cache.set, token, snapshot, payload.get("exp"))
+
+    return snapshot
 
 
 async def get_current_active_user(current_user=Depends(get_current_user)):
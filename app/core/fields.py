@@ -0,0 +1,47 @@
+"""
+Sparse fieldsets for article responses.
+
+``fields=title,ai_summary,category`` limits each article of a response to
+the named fields. The names are turned into the selected columns, so a
+large column such as ``content`` is neither read from the database nor
+serialized unless a caller asks for it.
+"""
+
+from typing import List, Optional, Sequence
+
+
+class InvalidFieldsError(ValueError):
+    """Raised when a fields parameter names an unknown field."""
+
+
+def parse_fields(
+    fields: Optional[str], allowed: Sequence[str], always: Sequence[str] = ("id",)
+) -> Optional[List[str]]:
+    """
+    Parse a comma-separated ``fields`` query parameter.
+
+    Args:
+        fields: Raw parameter value, None when the parameter is absent
+        allowed: Field names of the full representation, in output order
+        always: Fields included whether requested or not
+
+    Returns:
+        The requested fields plus ``always``, in the order of ``allowed``,
+        or None to return every field
+
+    Raises:
+        InvalidFieldsError: If a name is not in ``allowed`` or none is given
+    """
+    if fields is None:
+        return None
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    if not requested:
+        raise InvalidFieldsError("No fields requested")
+    unknown = requested.difference(allowed)
+    if unknown:
+        raise InvalidFieldsError(
+            f"Unknown fields: {', '.join(sorted(unknown))}; "
+            f"available: {', '.join(allowed)}"
+        )
+    requested.update(always)
+    return [name for name in allowed if name in requested]
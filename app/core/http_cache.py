@@ -0,0 +1,104 @@
+"""
+Conditional responses and response caching for read endpoints.
+
+Endpoints compute a cheap version marker of the data behind a response,
+such as the row count and latest ``updated_at`` of the listed articles.
+The marker and the request's path and query give a strong ETag: clients
+that send it back in If-None-Match get a bodiless 304, and the serialized
+body is kept in an in-process cache keyed by (user, path, query) so a
+changed ETag is the only reason to rebuild it. Ingestion clears the cache
+after writing articles; entries are also revalidated against the ETag, so
+a worker that missed the clear never serves a stale body.
+"""
+
+import hashlib
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+import orjson
+from fastapi import Request, Response
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+
+response_cache = TTLCache(
+    settings.RESPONSE_CACHE_MAX_SIZE, settings.RESPONSE_CACHE_TTL_SECONDS
+)
+
+# Clients must revalidate, but may keep the body and send If-None-Match
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*parts: Any) -> str:
+    """Build a strong ETag from the parts that determine a response."""
+    digest = hashlib.sha256(repr(parts).encode()).hexdigest()[:32]
+    return f'"{digest}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """
+    Check an ETag against the request's If-None-Match header.
+
+    If-None-Match uses weak comparison, so a W/ prefix is ignored.
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in header.split(","))
+    return etag in (tag[2:] if tag.startswith("W/") else tag for tag in candidates)
+
+
+def request_key(request: Request, user_id: Optional[str]) -> Tuple[Hashable, ...]:
+    """Key a response by user, path and query parameters."""
+    return (
+        user_id,
+        request.url.path,
+        tuple(sorted(request.query_params.multi_items())),
+    )
+
+
+def not_modified(etag: str) -> Response:
+    return Response(
+        status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    )
+
+
+async def cached_json_response(
+    request: Request,
+    user_id: Optional[str],
+    version: Any,
+    build: Callable[[], Awaitable[Tuple[Any, Dict[str, str]]]],
+) -> Response:
+    """
+    Answer a GET request with a 304, a cached body or a freshly built one.
+
+    Args:
+        request: The incoming request
+        user_id: User the response is built for, part of the cache key
+        version: Version marker of the data behind the response
+        build: Coroutine function returning the content, anything orjson can
+            serialize, and extra response headers; only awaited when no
+            cached body matches
+
+    Returns:
+        Response carrying ETag and Cache-Control headers
+    """
+    key = request_key(request, user_id)
+    etag = make_etag(key, version)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    cached = response_cache.get(key)
+    if cached is not None and cached[0] == etag:
+        _, body, headers = cached
+    else:
+        content, headers = await build()
+        body = orjson.dumps(content)
+        response_cache.set(key, (etag, body, headers))
+
+    return Response(
+        content=body,
+        media_type="application/json",
+        headers={**headers, "ETag": etag, "Cache-Control": CACHE_CONTROL},
+    )
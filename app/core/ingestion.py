@@ -0,0 +1,643 @@
+"""
+Asynchronous channel ingestion engine.
+
+Channels are fetched, parsed, enriched by the LLM and persisted as a
+pipeline of asyncio tasks. Every stage has its own concurrency bound so
+many channels and entries are in flight at once, while LLM calls are
+additionally spaced out by a rate limiter.
+"""
+
+import asyncio
+import hashlib
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import asdict, dataclass, field, replace
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import feedparser
+import httpx
+from bs4 import BeautifulSoup
+from sqlalchemy.orm import Session
+
+from app.core.ai import ArticleEnrichment, cached_enrichment, enrich_article
+from app.core.config import settings
+from app.core.dedup import hamming_distance, simhash, to_signed
+from app.core.http_cache import response_cache
+from app.core.semantic import sync_semantic_index
+from app.db.crud import (
+    assign_article_clusters,
+    bulk_upsert_articles,
+    find_near_duplicate,
+    get_channel_fetch_state,
+    get_existing_entry_keys,
+    get_or_create_channel,
+    normalize_channel_alias,
+    save_channel_fetch_state,
+)
+from app.db.models import ChannelFetchState
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/115.0.0.0 Safari/537.36"
+)
+
+
+@dataclass
+class IngestConfig:
+    """Tuning knobs for one ingestion run."""
+
+    max_articles: int = 90
+    retry_count: int = 3
+    base_url: str = settings.RSS_BASE_URL
+    fetch_concurrency: int = settings.INGEST_FETCH_CONCURRENCY
+    parse_concurrency: int = settings.INGEST_PARSE_CONCURRENCY
+    ai_concurrency: int = settings.INGEST_AI_CONCURRENCY
+    ai_rate_per_second: float = settings.INGEST_AI_RATE_PER_SECOND
+    request_timeout: float = settings.INGEST_REQUEST_TIMEOUT
+    persist_batch_size: int = settings.INGEST_PERSIST_BATCH_SIZE
+    freshness_seconds: float = settings.INGEST_FRESHNESS_SECONDS
+    near_duplicate_distance: Optional[int] = settings.INGEST_NEAR_DUPLICATE_DISTANCE
+    near_duplicate_window_hours: float = settings.INGEST_NEAR_DUPLICATE_WINDOW_HOURS
+
+
+@dataclass
+class IngestStats:
+    """Outcome of ingesting a single channel."""
+
+    channel_alias: str
+    entries: int = 0
+    skipped_no_url: int = 0
+    skipped_known: int = 0
+    skipped_short: int = 0
+    processed: int = 0
+    new_articles: int = 0
+    near_duplicates: int = 0
+    unchanged: bool = False
+    coalesced: bool = False
+    errors: List[str] = field(default_factory=list)
+
+    def summary(self) -> str:
+        """One log line describing how many entries each stage dropped."""
+        if self.unchanged:
+            return f"Channel {self.channel_alias}: feed unchanged, nothing to do"
+        return (
+            f"Channel {self.channel_alias}: {self.entries} entries, "
+            f"dropped {self.skipped_no_url} without URL, "
+            f"{self.skipped_known} already stored, "
+            f"{self.skipped_short} too short; "
+            f"processed {self.processed} articles, {self.new_articles} new, "
+            f"{self.near_duplicates} enriched from a near duplicate"
+        )
+
+
+class AsyncRateLimiter:
+    """
+    Space out acquisitions so that at most ``rate`` of them start per second.
+
+    A rate of zero or less disables limiting.
+    """
+
+    def __init__(self, rate: float):
+        self._interval = 1.0 / rate if rate > 0 else 0.0
+        self._next_slot = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        if not self._interval:
+            return
+        loop = asyncio.get_running_loop()
+        async with self._lock:
+            now = loop.time()
+            wait = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self._interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class ChannelCoalescer:
+    """
+    Process-wide de-duplication of channel fetches.
+
+    Requests for a channel that is already being ingested join the in-flight
+    run, and requests within the freshness window of a successful run reuse
+    its result. Background tasks each run their own event loop in a worker
+    thread, so state is guarded by a thread lock and shared through
+    ``concurrent.futures.Future`` objects.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, Future] = {}
+        # Finished runs: completion time, freshness window of the run, result
+        self._recent: Dict[str, Tuple[float, float, IngestStats]] = {}
+
+    def claim(self, key: str, max_age: float) -> Tuple[Future, bool]:
+        """
+        Return the future to wait on and whether the caller must do the work.
+        """
+        now = time.monotonic()
+        with self._lock:
+            recent = self._recent.get(key)
+            if recent is not None and now - recent[0] < max_age:
+                future: Future = Future()
+                future.set_result(recent[2])
+                return future, False
+
+            future = self._inflight.get(key)
+            if future is not None:
+                return future, False
+
+            future = Future()
+            self._inflight[key] = future
+            return future, True
+
+    def complete(self, key: str, stats: IngestStats, max_age: float) -> None:
+        """
+        Publish the leader's result to all waiters.
+
+        The result is kept for ``max_age`` seconds, the freshness window of
+        the run that produced it.
+        """
+        now = time.monotonic()
+        with self._lock:
+            future = self._inflight.pop(key)
+            if not stats.errors:
+                self._recent[key] = (now, max_age, stats)
+            # Drop results that have outlived the window they were kept for
+            for stale in [
+                k for k, (ts, age, _) in self._recent.items() if now - ts >= age
+            ]:
+                del self._recent[stale]
+        future.set_result(stats)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._recent.clear()
+
+
+channel_coalescer = ChannelCoalescer()
+
+
+def feed_url(channel_alias: str, base_url: str = settings.RSS_BASE_URL) -> str:
+    """Build the RSS URL for a Telegram channel alias."""
+    return f"{base_url.rstrip('/')}/{channel_alias.lstrip('@')}"
+
+
+def parse_published_date(entry: Dict[str, Any]) -> datetime:
+    """Parse the RFC 822 ``published`` field of a feed entry."""
+    if "published" not in entry:
+        return datetime.now()
+    try:
+        return datetime.strptime(entry["published"], "%a, %d %b %Y %H:%M:%S %Z")
+    except ValueError as e:
+        logger.error(f"Date parsing error: {str(e)}")
+        return datetime.now()
+
+
+def conditional_headers(state: Optional[ChannelFetchState]) -> Dict[str, str]:
+    """Build If-None-Match / If-Modified-Since headers from a stored fetch state."""
+    headers = {}
+    if state is not None:
+        if state.etag:
+            headers["If-None-Match"] = state.etag
+        if state.last_modified:
+            headers["If-Modified-Since"] = state.last_modified
+    return headers
+
+
+def entry_keys(entry: Dict[str, Any]) -> Set[str]:
+    """Identifiers an entry may already be stored under: its link and GUID."""
+    return {key for key in (entry.get("link"), entry.get("id")) if key}
+
+
+def select_unseen_entries(
+    entries: List[Dict[str, Any]], known_keys: Set[str], stats: IngestStats
+) -> List[Dict[str, Any]]:
+    """
+    Drop entries without a URL and entries whose link or GUID is already known.
+
+    Entries repeated within the same feed are only kept once.
+    """
+    unseen = []
+    seen = set(known_keys)
+    for entry in entries:
+        if not entry.get("link"):
+            stats.skipped_no_url += 1
+            continue
+        keys = entry_keys(entry)
+        if keys & seen:
+            stats.skipped_known += 1
+            continue
+        seen.update(keys)
+        unseen.append(entry)
+    return unseen
+
+
+def extract_plain_text(html_content: str) -> str:
+    """Strip the HTML markup from an entry description."""
+    return BeautifulSoup(html_content, "html.parser").get_text()
+
+
+class _IngestionRun:
+    """Shared state (limits, HTTP client, DB access) for one ingestion run."""
+
+    def __init__(
+        self, db: Session, config: IngestConfig, client: httpx.AsyncClient
+    ):
+        self.db = db
+        self.config = config
+        self.client = client
+        self.fetch_slots = asyncio.Semaphore(config.fetch_concurrency)
+        self.parse_slots = asyncio.Semaphore(config.parse_concurrency)
+        self.ai_slots = asyncio.Semaphore(config.ai_concurrency)
+        self.ai_limiter = AsyncRateLimiter(config.ai_rate_per_second)
+        # A Session is not thread-safe, so all DB work is serialized
+        self.db_lock = asyncio.Lock()
+        # Fingerprint of every article enriched in this run, with a future
+        # of its reusable ArticleEnrichment, see enrich()
+        self.enrichments: List[Tuple[int, asyncio.Future]] = []
+
+    async def run_db(self, func, *args, **kwargs):
+        async with self.db_lock:
+            return await asyncio.to_thread(self._call_db, func, *args, **kwargs)
+
+    def _call_db(self, func, *args, **kwargs):
+        # End the transaction after every call so the run never keeps the
+        # writer connection checked out while it waits on HTTP or the LLM
+        try:
+            result = func(self.db, *args, **kwargs)
+            self.db.commit()
+            return result
+        except Exception:
+            self.db.rollback()
+            raise
+
+    async def run_parse(self, func, *args):
+        async with self.parse_slots:
+            return await asyncio.to_thread(func, *args)
+
+    async def run_ai(self, func, *args, **kwargs):
+        async with self.ai_slots:
+            await self.ai_limiter.acquire()
+            return await asyncio.to_thread(func, *args, **kwargs)
+
+    async def fetch(
+        self, channel_alias: str, headers: Optional[Dict[str, str]] = None
+    ) -> Optional[httpx.Response]:
+        """
+        Download a channel feed, retrying on rate limits and errors.
+
+        Returns the 200 or 304 response, or None when every attempt failed.
+        """
+        url = feed_url(channel_alias, self.config.base_url)
+        retry_count = self.config.retry_count
+
+        for attempt in range(retry_count):
+            try:
+                async with self.fetch_slots:
+                    logger.info(f"Fetching RSS feed from {url}")
+                    response = await self.client.get(url, headers=headers)
+
+                if response.status_code == 429:
+                    retry_after = int(
+                        response.headers.get("Retry-After", (attempt + 1) * 5)
+                    )
+                    logger.warning(
+                        f"Rate limited (429) - will retry after {retry_after} seconds"
+                    )
+                    await asyncio.sleep(retry_after)
+                    continue
+
+                if response.status_code not in (200, 304):
+                    logger.error(
+                        f"Failed to fetch RSS feed: HTTP {response.status_code}"
+                    )
+                    await asyncio.sleep(3 + (attempt * 2))
+                    continue
+
+                return response
+
+            except httpx.HTTPError as e:
+                logger.error(
+                    f"Request error (attempt {attempt + 1}/{retry_count}): {str(e)}"
+                )
+                if attempt < retry_count - 1:
+                    sleep_time = 5 * (attempt + 1)
+                    logger.info(f"Retrying in {sleep_time} seconds")
+                    await asyncio.sleep(sleep_time)
+
+        logger.error(
+            f"Failed to fetch channel {channel_alias} after {retry_count} attempts"
+        )
+        return None
+
+    async def build_article(
+        self,
+        channel_id: int,
+        channel_alias: str,
+        entry: Dict[str, Any],
+        stats: Optional[IngestStats] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """Extract, enrich and shape a single feed entry."""
+        article_url = entry.get("link", "")
+        plain_text = await self.run_parse(
+            extract_plain_text, entry.get("description", "")
+        )
+
+        if len(plain_text.strip()) < 50:
+            logger.warning(f"Article content too short: {article_url}")
+            return None
+
+        title = entry.get("title", "")
+        published_date = parse_published_date(entry)
+        fingerprint = await self.run_parse(simhash, plain_text)
+        enrichment = await self.enrich(
+            plain_text, title, fingerprint, published_date, stats
+        )
+
+        return {
+            "title": title,
+            "content": plain_text,
+            "url": article_url,
+            "guid": entry.get("id") or None,
+            "source": channel_alias,
+            "channel_id": channel_id,
+            "published_date": published_date,
+            **asdict(enrichment),
+            "simhash": to_signed(fingerprint),
+        }
+
+    async def enrich(
+        self,
+        plain_text: str,
+        title: str,
+        fingerprint: int,
+        published_date: datetime,
+        stats: Optional[IngestStats] = None,
+    ) -> ArticleEnrichment:
+        """
+        Enrich an article with the LLM, reusing a near duplicate's result.
+
+        A copy of a story enriched earlier in this run, possibly from another
+        channel and still waiting for the LLM, is awaited instead of asking
+        again; otherwise the closest stored near duplicate is used. Only when
+        neither has a summary is the LLM called.
+        """
+        distance = self.config.near_duplicate_distance
+        if distance is None:
+            return await self.generate_enrichment(plain_text, title)
+
+        earlier = next(
+            (
+                future
+                for other, future in self.enrichments
+                if hamming_distance(fingerprint, other) <= distance
+            ),
+            None,
+        )
+        own = asyncio.get_running_loop().create_future()
+        self.enrichments.append((fingerprint, own))
+        try:
+            reused = await earlier if earlier is not None else None
+            if reused is None:
+                window = timedelta(hours=self.config.near_duplicate_window_hours)
+                match = await self.run_db(
+                    find_near_duplicate,
+                    fingerprint,
+                    distance,
+                    published_date - window,
+                )
+                if match is not None and match.ai_summary:
+                    reused = ArticleEnrichment(
+                        ai_summary=match.ai_summary,
+                        category=match.category,
+                        keywords=match.keywords,
+                        sentiment_score=match.sentiment_score,
+                    )
+
+            if reused is not None:
+                if stats is not None:
+                    stats.near_duplicates += 1
+                result = reused
+            else:
+                result = await self.generate_enrichment(plain_text, title)
+            own.set_result(result if result.ai_summary else None)
+            return result
+        finally:
+            if not own.done():
+                own.set_result(None)
+
+    async def generate_enrichment(
+        self, plain_text: str, title: str
+    ) -> ArticleEnrichment:
+        # Cache hits need neither a slot nor rate limit budget
+        cached = await asyncio.to_thread(cached_enrichment, plain_text, title)
+        if cached is not None:
+            return cached
+        logger.info(f"Generating AI enrichment for: {title or 'Untitled'}")
+        return await self.run_ai(enrich_article, plain_text, title, lookup_cache=False)
+
+    async def ingest_channel(self, channel_alias: str) -> IngestStats:
+        stats = IngestStats(channel_alias=channel_alias)
+        logger.info(f"Starting to process articles for channel: {channel_alias}")
+
+        try:
+            # Read stored rows before the next await: commits made for other
+            # channels would otherwise expire them
+            channel = await self.run_db(get_or_create_channel, channel_alias)
+            channel_id, state_key = channel.id, channel.alias
+            state = await self.run_db(get_channel_fetch_state, state_key)
+            headers = conditional_headers(state)
+            previous_hash = state.content_hash if state is not None else None
+
+            response = await self.fetch(channel_alias, headers)
+            if response is None:
+                stats.errors.append("fetch failed")
+                return stats
+
+            if response.status_code == 304:
+                stats.unchanged = True
+                logger.info(f"Feed for {channel_alias} not modified (304)")
+                await self.run_db(
+                    save_channel_fetch_state,
+                    state_key,
+                    last_status=304,
+                    last_fetched_at=datetime.now(),
+                )
+                return stats
+
+            content = response.content
+            content_hash = hashlib.sha256(content).hexdigest()
+            fetch_state = {
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "last_status": response.status_code,
+                "last_fetched_at": datetime.now(),
+            }
+            if content_hash == previous_hash:
+                stats.unchanged = True
+                logger.info(f"Feed for {channel_alias} unchanged (identical body)")
+                await self.run_db(save_channel_fetch_state, state_key, **fetch_state)
+                return stats
+
+            rss_feed = await self.run_parse(feedparser.parse, content)
+            if not rss_feed.entries:
+                logger.warning(f"No entries found in RSS feed for {channel_alias}")
+                # Keep the validators, so the empty feed is fetched
+                # conditionally next time
+                await self.run_db(
+                    save_channel_fetch_state,
+                    state_key,
+                    content_hash=content_hash,
+                    **fetch_state,
+                )
+                return stats
+
+            entries = rss_feed.entries[: self.config.max_articles]
+            stats.entries = len(entries)
+            logger.info(f"Found {len(entries)} entries in feed for {channel_alias}")
+
+            # Pre-filter: diff links and GUIDs against the DB before any
+            # HTML extraction or LLM work happens
+            known_keys = await self.run_db(
+                get_existing_entry_keys,
+                [key for entry in entries for key in entry_keys(entry)],
+            )
+            pending = select_unseen_entries(entries, known_keys, stats)
+
+            built = await asyncio.gather(
+                *(
+                    self.build_article(channel_id, state_key, entry, stats)
+                    for entry in pending
+                )
+            )
+            articles = [article for article in built if article is not None]
+            stats.skipped_short = len(built) - len(articles)
+
+            batch_size = self.config.persist_batch_size
+            for start in range(0, len(articles), batch_size):
+                batch = articles[start : start + batch_size]
+                inserted = await self.run_db(bulk_upsert_articles, batch)
+                if self.config.near_duplicate_distance is not None:
+                    await self.run_db(
+                        assign_article_clusters,
+                        [article["url"] for article in batch],
+                        self.config.near_duplicate_distance,
+                        timedelta(hours=self.config.near_duplicate_window_hours),
+                    )
+                stats.processed += len(batch)
+                stats.new_articles += inserted
+            if articles:
+                # Cached listings may include the channel; drop them instead
+                # of waiting for their ETags to be revalidated
+                response_cache.clear()
+
+            # Only remember the body once its entries are safely stored, so a
+            # failed run is retried in full on the next poll
+            await self.run_db(
+                save_channel_fetch_state,
+                state_key,
+                content_hash=content_hash,
+                last_entry_guid=entries[0].get("id") or entries[0].get("link"),
+                **fetch_state,
+            )
+            logger.info(stats.summary())
+        except Exception as e:
+            logger.error(f"Error processing channel {channel_alias}: {str(e)}")
+            stats.errors.append(str(e))
+
+        return stats
+
+    async def ingest_channel_once(
+        self, channel_alias: str, coalescer: ChannelCoalescer
+    ) -> IngestStats:
+        """Ingest a channel unless an equivalent run is in flight or fresh."""
+        key = normalize_channel_alias(channel_alias)
+        future, is_leader = coalescer.claim(key, self.config.freshness_seconds)
+        if not is_leader:
+            logger.info(f"Reusing in-flight or recent ingestion of {key}")
+            stats = await asyncio.wrap_future(future)
+            return replace(stats, channel_alias=channel_alias, coalesced=True)
+
+        stats = IngestStats(channel_alias=channel_alias, errors=["cancelled"])
+        try:
+            stats = await self.ingest_channel(channel_alias)
+        finally:
+            coalescer.complete(key, stats, self.config.freshness_seconds)
+        return stats
+
+
+async def ingest_channels(
+    channel_aliases: List[str],
+    db: Session,
+    config: Optional[IngestConfig] = None,
+    transport: Optional[httpx.AsyncBaseTransport] = None,
+    coalescer: Optional[ChannelCoalescer] = None,
+) -> List[IngestStats]:
+    """
+    Ingest several channels concurrently.
+
+    Each distinct channel is fetched at most once, however many aliases
+    refer to it and however many runs ask for it at the same time.
+
+    Args:
+        channel_aliases: Telegram channel aliases to fetch articles from
+        db: Database session whose engine is used for duplicate checks and
+            persistence
+        config: Concurrency and retry settings, defaults from app settings
+        transport: Optional HTTP transport, e.g. for tests and benchmarks
+        coalescer: Fetch de-duplication registry, the process-wide one by default
+
+    Returns:
+        One IngestStats per channel, in input order
+    """
+    config = config or IngestConfig()
+    coalescer = coalescer or channel_coalescer
+    # A private session that keeps loaded objects usable across commits
+    session = Session(bind=db.get_bind(), autoflush=False, expire_on_commit=False)
+    try:
+        async with httpx.AsyncClient(
+            headers={"User-Agent": USER_AGENT},
+            timeout=config.request_timeout,
+            follow_redirects=True,
+            transport=transport,
+        ) as client:
+            run = _IngestionRun(session, config, client)
+            results = list(
+                await asyncio.gather(
+                    *(
+                        run.ingest_channel_once(alias, coalescer)
+                        for alias in channel_aliases
+                    )
+                )
+            )
+    finally:
+        session.close()
+    if any(stats.processed and not stats.coalesced for stats in results):
+        # Embedding may take long, e.g. filling an empty index, so it runs
+        # once per run on its own session instead of under the run's DB lock
+        await asyncio.to_thread(_sync_semantic_index, db.get_bind())
+    return results
+
+
+def _sync_semantic_index(bind) -> None:
+    try:
+        with Session(bind=bind) as session:
+            sync_semantic_index(session)
+    except Exception as e:
+        logger.error(f"Error updating the semantic index: {str(e)}")
+
+
+def run_ingestion(
+    channel_aliases: List[str],
+    db: Session,
+    config: Optional[IngestConfig] = None,
+) -> List[IngestStats]:
+    """Synchronous entry point for background tasks and scripts."""
+    return asyncio.run(ingest_channels(channel_aliases, db, config))
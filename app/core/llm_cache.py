@@ -0,0 +1,241 @@
+"""
+Persistent cache of LLM results.
+
+Summaries and categories only depend on the prompt, the model and the
+article text, yet the same text reaches the model again on article
+updates, reposts and when a channel is retried after a failed run. Each
+result is stored under (task, model, prompt version, SHA-256 of the
+normalized inputs), so a changed prompt or model never serves stale
+results; bump a task's prompt version whenever its prompt changes.
+
+Entries live in a SQLite file of their own at LLM_CACHE_PATH, shared by
+all workers on a host and kept across restarts. Each worker keeps a
+running count of the entries; once it passes LLM_CACHE_MAX_ENTRIES the
+table is counted and the least recently used entries are evicted in a
+batch of ``EVICTION_BATCH_SHARE`` of the cap, so inserts don't count the
+table. Inserts of other workers are only seen at those counts, so the
+file may briefly hold somewhat more entries than the cap. A size of 0
+disables the cache. Failures of the cache are logged and treated as
+misses, so enrichment never depends on it.
+"""
+
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_cache (
+    task TEXT NOT NULL,
+    model TEXT NOT NULL,
+    prompt_version INTEGER NOT NULL,
+    input_sha256 TEXT NOT NULL,
+    result TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    last_used_at REAL NOT NULL,
+    PRIMARY KEY (task, model, prompt_version, input_sha256)
+)
+"""
+LRU_INDEX = (
+    "CREATE INDEX IF NOT EXISTS ix_llm_cache_last_used ON llm_cache (last_used_at)"
+)
+# Share of the cap freed by an eviction, so the next ones are far apart
+EVICTION_BATCH_SHARE = 0.05
+
+
+def normalize_input(text: str) -> str:
+    """Unicode-normalize a prompt input and collapse its whitespace."""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def input_digest(*inputs: str) -> str:
+    """SHA-256 over the normalized inputs that fill a prompt."""
+    digest = hashlib.sha256()
+    for value in inputs:
+        digest.update(normalize_input(value).encode())
+        # Separator, so ("ab", "c") and ("a", "bc") differ
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+class LLMCache:
+    """
+    SQLite-backed LRU cache of LLM results.
+
+    Hit and miss counters are per process.
+
+    Args:
+        path: SQLite file holding the entries, created on first use
+        max_entries: Entries kept at most; 0 disables the cache
+    """
+
+    def __init__(self, path: str, max_entries: int):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.errors = 0
+        # Entries in the file as far as this process knows, None until counted
+        self._size_estimate: Optional[int] = None
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections must stay on the thread that opened them
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(SCHEMA)
+            connection.execute(LRU_INDEX)
+            self._local.connection = connection
+        return connection
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def get(
+        self, task: str, model: str, prompt_version: int, *inputs: str
+    ) -> Optional[str]:
+        """
+        Look up a stored result and mark it as recently used.
+
+        Args:
+            task: Name of the prompt, e.g. "summary"
+            model: Model or deployment the result came from
+            prompt_version: Version of the task's prompt
+            inputs: Every value the prompt is built from
+
+        Returns:
+            The stored result, or None on a miss or when disabled
+        """
+        if not self.enabled:
+            return None
+        key = (task, model, prompt_version, input_digest(*inputs))
+        try:
+            connection = self._connection()
+            row = connection.execute(
+                "SELECT result FROM llm_cache WHERE task = ? AND model = ? "
+                "AND prompt_version = ? AND input_sha256 = ?",
+                key,
+            ).fetchone()
+            if row is not None:
+                connection.execute(
+                    "UPDATE llm_cache SET last_used_at = ? WHERE task = ? "
+                    "AND model = ? AND prompt_version = ? AND input_sha256 = ?",
+                    (time.time(), *key),
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"LLM cache lookup failed: {str(e)}")
+            self._count("errors")
+            row = None
+        self._count("misses" if row is None else "hits")
+        return None if row is None else row[0]
+
+    def set(
+        self, task: str, model: str, prompt_version: int, result: str, *inputs: str
+    ) -> None:
+        """
+        Store a result, evicting least recently used entries once over the cap.
+
+        Args:
+            task: Name of the prompt, e.g. "summary"
+            model: Model or deployment the result came from
+            prompt_version: Version of the task's prompt
+            result: The model's answer
+            inputs: Every value the prompt is built from
+        """
+        if not self.enabled:
+            return
+        now = time.time()
+        try:
+            connection = self._connection()
+            connection.execute(
+                "INSERT OR REPLACE INTO llm_cache VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (task, model, prompt_version, input_digest(*inputs), result, now, now),
+            )
+            with self._lock:
+                # A replaced entry is counted too; that only evicts sooner
+                if self._size_estimate is not None:
+                    self._size_estimate += 1
+                full = (
+                    self._size_estimate is None
+                    or self._size_estimate > self.max_entries
+                )
+            if full:
+                self._evict(connection)
+        except sqlite3.Error as e:
+            logger.warning(f"LLM cache update failed: {str(e)}")
+            self._count("errors")
+            self._size_estimate = None
+
+    def _evict(self, connection: sqlite3.Connection) -> None:
+        # Count the table, which other workers write too, and when it is
+        # over the cap evict down to a batch below it
+        size = connection.execute("SELECT count(*) FROM llm_cache").fetchone()[0]
+        if size > self.max_entries:
+            keep = self.max_entries - int(self.max_entries * EVICTION_BATCH_SHARE)
+            connection.execute(
+                "DELETE FROM llm_cache WHERE rowid IN (SELECT rowid FROM "
+                "llm_cache ORDER BY last_used_at LIMIT ?)",
+                (size - keep,),
+            )
+            with self._lock:
+                self.evictions += size - keep
+            size = keep
+        self._size_estimate = size
+
+    def size(self) -> int:
+        if not self.enabled:
+            return 0
+        try:
+            query = "SELECT count(*) FROM llm_cache"
+            return self._connection().execute(query).fetchone()[0]
+        except sqlite3.Error:
+            return 0
+
+    def clear(self) -> None:
+        """Drop all entries and zero the counters."""
+        if self.enabled:
+            self._connection().execute("DELETE FROM llm_cache")
+            self._size_estimate = 0
+        with self._lock:
+            self.hits = self.misses = self.evictions = self.errors = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters of this process; makes no database query."""
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            # Every hit is a model call that was not made
+            "llm_calls_saved": self.hits,
+            "evictions": self.evictions,
+            "errors": self.errors,
+            # The running count, so /metrics never scans the table; None
+            # until this process stored an entry
+            "size": self._size_estimate if self.enabled else 0,
+        }
+
+
+llm_cache = LLMCache(settings.LLM_CACHE_PATH, settings.LLM_CACHE_MAX_ENTRIES)
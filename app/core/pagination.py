@@ -0,0 +1,98 @@
+"""
+Opaque cursor tokens for keyset pagination.
+
+Listings are ordered by ``(published_date DESC, id DESC)``. A cursor stores
+the sort key of the last row of a page, so the next page is a range scan
+on the composite indexes instead of an ever-growing OFFSET.
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Optional, Tuple
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a cursor token cannot be decoded."""
+
+
+def encode_cursor(
+    published_date: datetime, article_id: int, channel_id: Optional[int] = None
+) -> str:
+    """
+    Encode the sort key of the last row of a page into an opaque token.
+
+    Args:
+        published_date: Publication date of the last returned article
+        article_id: ID of the last returned article
+        channel_id: Channel the page belongs to, for per-channel feed cursors
+
+    Returns:
+        URL-safe cursor token
+    """
+    payload = {"d": published_date.isoformat(), "i": article_id}
+    if channel_id is not None:
+        payload["c"] = channel_id
+    return _encode(payload)
+
+
+def decode_cursor(token: str) -> Tuple[datetime, int, Optional[int]]:
+    """
+    Decode a cursor token produced by ``encode_cursor``.
+
+    Args:
+        token: Cursor token received from a client
+
+    Returns:
+        Tuple of (published_date, article_id, channel_id)
+
+    Raises:
+        InvalidCursorError: If the token is malformed
+    """
+    try:
+        payload = _decode(token)
+        channel_id = payload.get("c")
+        return (
+            datetime.fromisoformat(payload["d"]),
+            int(payload["i"]),
+            int(channel_id) if channel_id is not None else None,
+        )
+    except (ValueError, KeyError, TypeError, AttributeError) as e:
+        raise InvalidCursorError(f"Invalid cursor: {token}") from e
+
+
+def encode_rank_cursor(score: float, article_id: int) -> str:
+    """
+    Encode the position of the last row of a page of ranked search results.
+
+    Search results are ordered by ``(score DESC, id DESC)``; JSON keeps the
+    float score exact, so the next page starts right after this row.
+    """
+    return _encode({"s": score, "i": article_id})
+
+
+def decode_rank_cursor(token: str) -> Tuple[float, int]:
+    """
+    Decode a cursor token produced by ``encode_rank_cursor``.
+
+    Returns:
+        Tuple of (score, article_id)
+
+    Raises:
+        InvalidCursorError: If the token is malformed
+    """
+    try:
+        payload = _decode(token)
+        return float(payload["s"]), int(payload["i"])
+    except (ValueError, KeyError, TypeError, AttributeError) as e:
+        raise InvalidCursorError(f"Invalid cursor: {token}") from e
+
+
+def _encode(payload: dict) -> str:
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode(token: str) -> dict:
+    padded = token + "=" * (-len(token) % 4)
+    return json.loads(base64.urlsafe_b64decode(padded.encode()))
@@ -1,10 +1,15 @@
+import asyncio
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Any, Callable, Optional
 
 from jose import jwt
 from passlib.context import CryptContext
 
+from app.core.config import settings
+
 # Security configuration
 SECRET_KEY = os.environ.get("SECRET_KEY", "09d25e094faa6ca2556c818166b7a9563b93f7099f6f0f4caa6cf63b88e8d3e7")
 if not SECRET_KEY:
@@ -14,8 +19,72 @@ if not SECRET_KEY:
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
-# Password context for hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Password context for hashing; lower BCRYPT_ROUNDS only outside production
+pwd_context = CryptContext(
+    schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS
+)
+
+
+class PasswordExecutorBusy(RuntimeError):
+    """Raised when the password executor has no room for more work."""
+
+
+class PasswordExecutor:
+    """
+    Dedicated, bounded thread pool for password hashing and verification.
+
+    bcrypt is deliberately slow and releases the GIL while it works. Running
+    it on its own threads keeps login bursts from occupying the threadpool
+    that serves sync endpoints, and the bound on queued work turns overload
+    into a fast rejection instead of an ever-growing backlog.
+
+    Args:
+        workers: Number of hashing threads
+        max_pending: Calls allowed to wait for a free thread
+    """
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self._slots = threading.BoundedSemaphore(workers + max_pending)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="password"
+                )
+            return self._executor
+
+    async def run(self, func: Callable[..., Any], *args) -> Any:
+        """
+        Run a password function on the pool.
+
+        Raises:
+            PasswordExecutorBusy: If all threads and queue slots are taken
+        """
+        if not self._slots.acquire(blocking=False):
+            raise PasswordExecutorBusy("Password executor is saturated")
+        try:
+            future = self._get_executor().submit(func, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        # Released when the work finishes, even if the caller goes away
+        future.add_done_callback(lambda _: self._slots.release())
+        return await asyncio.wrap_future(future)
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+
+
+password_executor = PasswordExecutor(
+    settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_MAX_PENDING
+)
 
 
 def verify_password(plain_password, hashed_password):
@@ -28,6 +97,16 @@ def get_password_hash(password):
     return pwd_context.hash(password)
 
 
+async def verify_password_async(plain_password, hashed_password):
+    """Verify a password on the password executor."""
+    return await password_executor.run(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password):
+    """Generate a password hash on the password executor."""
+    return await password_executor.run(get_password_hash, password)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Create a new JWT token."""
     to_encode = data.copy()
@@ -0,0 +1,563 @@
+"""
+Local semantic search over articles.
+
+Articles are embedded offline by a hashing vectorizer: words and the
+character trigrams inside them are hashed into a fixed number of signed
+buckets, so inflected or differently spelled forms of a word still share
+most of their features, in any language and without a model download or
+network access. Vectors are L2-normalised, making a dot product their
+cosine similarity.
+
+The vectors live in a float32 NumPy matrix memory-mapped from
+``SEMANTIC_INDEX_DIR``, with one row per article and a parallel array of
+article ids. A query is a single matrix-vector product followed by
+``argpartition`` for the top k, so no Python code runs per article and
+the operating system's page cache shares the matrix between workers.
+
+Ingestion embeds new and edited articles after every run through
+``sync_semantic_index``, which also fills an empty index from the
+database; ``python -m app.core.semantic`` does the same from a shell.
+Writers take an exclusive file lock next to the index, so of several
+workers syncing at once one writes and the others skip; readers in other
+processes pick up its changes on their next query. numpy is optional;
+without it semantic search is unavailable and ingestion skips the index.
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+import zlib
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from math import log
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import func, select, true, union
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.models import NewsArticle
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 2
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+# Trigrams weigh less than whole words, which stay the strongest signal
+NGRAM_SIZE = 3
+NGRAM_WEIGHT = 0.5
+# Initial number of rows allocated in a new index file
+MIN_CAPACITY = 1024
+# A sync looks this far behind the previous one for updated articles, for
+# transactions that committed after it started and coarse clocks
+SYNC_OVERLAP = timedelta(minutes=5)
+
+
+class SemanticSearchUnavailable(RuntimeError):
+    """Raised when semantic search is used without numpy installed."""
+
+
+def available() -> bool:
+    """Whether semantic search can be used in this environment."""
+    return np is not None and settings.SEMANTIC_SEARCH_ENABLED
+
+
+class HashingEmbedder:
+    """
+    Stateless text embedder based on the hashing trick.
+
+    Args:
+        dim: Number of dimensions of the produced vectors
+        max_chars: Characters of text embedded at most
+    """
+
+    def __init__(self, dim: int, max_chars: int = 2000):
+        if np is None:
+            raise SemanticSearchUnavailable("Semantic search requires numpy")
+        self.dim = dim
+        self.max_chars = max_chars
+
+    @property
+    def signature(self) -> str:
+        """Identifies the vector space; vectors from different ones don't mix."""
+        return f"hash-crc32-w1-c{NGRAM_SIZE}-{NGRAM_WEIGHT}-{self.dim}"
+
+    def features(self, text: str) -> List[Tuple[str, float]]:
+        """
+        Weighted features of a text: words and padded character trigrams.
+
+        Repeated words are damped logarithmically so a long article is not
+        dominated by its most frequent words.
+        """
+        words = Counter(TOKEN_RE.findall(text[: self.max_chars].lower()))
+        features = []
+        for word, count in words.items():
+            weight = 1.0 + log(count)
+            features.append((f"w:{word}", weight))
+            padded = f"<{word}>"
+            for start in range(len(padded) - NGRAM_SIZE + 1):
+                features.append(
+                    (padded[start : start + NGRAM_SIZE], weight * NGRAM_WEIGHT)
+                )
+        return features
+
+    def embed(self, text: str) -> "np.ndarray":
+        """
+        Embed one text.
+
+        Returns:
+            A unit float32 vector, or all zeros when the text has no words
+        """
+        features = self.features(text)
+        if not features:
+            return np.zeros(self.dim, dtype=np.float32)
+        hashes = np.fromiter(
+            (zlib.crc32(name.encode()) for name, _ in features),
+            dtype=np.uint32,
+            count=len(features),
+        )
+        weights = np.fromiter(
+            (weight for _, weight in features), dtype=np.float32, count=len(features)
+        )
+        # The lowest bit picks the sign so colliding features tend to cancel
+        signs = np.where(hashes & 1, np.float32(-1.0), np.float32(1.0))
+        vector = np.bincount(
+            (hashes >> 1) % self.dim, weights=weights * signs, minlength=self.dim
+        ).astype(np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def embed_many(self, texts: Sequence[str]) -> "np.ndarray":
+        """Embed several texts into a (len(texts), dim) float32 matrix."""
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            matrix[row] = self.embed(text)
+        return matrix
+
+
+def article_text(
+    title: Optional[str], ai_summary: Optional[str], content: Optional[str]
+) -> str:
+    """Text of an article that is embedded; the title comes first."""
+    return " ".join(part for part in (title, ai_summary, content) if part)
+
+
+def text_checksum(text: str) -> int:
+    """Checksum stored with a vector to tell whether its text changed."""
+    return zlib.crc32(text.encode())
+
+
+class SemanticIndex:
+    """
+    Article vectors in a memory-mapped matrix with parallel arrays of
+    article ids and checksums of the embedded texts.
+
+    Args:
+        path: Directory holding ``vectors.npy``, ``ids.npy``,
+            ``checksums.npy`` and ``meta.json``
+        embedder: Embedder whose vectors the index stores
+    """
+
+    def __init__(self, path: str, embedder: HashingEmbedder):
+        self.path = path
+        self.embedder = embedder
+        self.count = 0
+        # Database time up to which updated articles were embedded
+        self.synced_until: Optional[datetime] = None
+        self._vectors = None
+        self._ids = None
+        self._checksums = None
+        self._meta_mtime = None
+        self._writable = False
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+
+    @property
+    def dim(self) -> int:
+        return self.embedder.dim
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    @property
+    def generation(self) -> Tuple[int, Optional[int]]:
+        """Changes whenever rows are added; part of response ETags."""
+        self.refresh()
+        return self.count, self._meta_mtime
+
+    def refresh(self) -> None:
+        """Re-open the files when another process changed the index."""
+        try:
+            mtime = os.stat(self._file("meta.json")).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if mtime == self._meta_mtime:
+            return
+        with self._lock:
+            self._load(mtime, writable=self._writable)
+
+    def _load(self, mtime: Optional[int], writable: bool) -> None:
+        self._meta_mtime = mtime
+        self._writable = writable
+        self.count, self._vectors, self._ids, self._checksums = 0, None, None, None
+        self.synced_until = None
+        if mtime is None:
+            return
+        with open(self._file("meta.json")) as f:
+            meta = json.load(f)
+        if (
+            meta.get("format") != FORMAT_VERSION
+            or meta.get("signature") != self.embedder.signature
+        ):
+            # Written by other settings; a sync starts it over
+            logger.warning(f"Ignoring semantic index with other settings: {meta}")
+            return
+        if meta.get("synced_until"):
+            self.synced_until = datetime.fromisoformat(meta["synced_until"])
+        if not os.path.exists(self._file("ids.npy")):
+            return
+        mode = "r+" if writable else "r"
+        self._vectors = np.load(self._file("vectors.npy"), mmap_mode=mode)
+        self._ids = np.load(self._file("ids.npy"), mmap_mode=mode)
+        self._checksums = np.load(self._file("checksums.npy"), mmap_mode=mode)
+        self.count = min(meta["count"], len(self._ids))
+
+    @contextmanager
+    def writer(self) -> Iterator[bool]:
+        """
+        Hold the index's single-writer lock for a series of writes.
+
+        The lock is an exclusive ``flock`` on a file next to the index, so
+        it is held against other processes too; it is released when the
+        block ends or the process dies.
+
+        Yields:
+            True with the files reloaded from disk for writing, or False
+            without waiting when another thread or process holds the lock
+        """
+        if not self._write_lock.acquire(blocking=False):
+            yield False
+            return
+        try:
+            os.makedirs(self.path, exist_ok=True)
+            with open(self._file("write.lock"), "a") as lock_file:
+                if fcntl is not None:
+                    try:
+                        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    except BlockingIOError:
+                        yield False
+                        return
+                with self._lock:
+                    # The last writer may have been another process
+                    self._load(self._current_mtime(), writable=True)
+                yield True
+        finally:
+            self._write_lock.release()
+
+    def max_id(self) -> int:
+        """Highest article id in the index, 0 when empty."""
+        self.refresh()
+        ids, count = self._ids, self.count
+        return int(ids[:count].max()) if count else 0
+
+    def search(self, query: "np.ndarray", k: int) -> List[Tuple[int, float]]:
+        """
+        Find the rows most similar to a query vector.
+
+        Args:
+            query: Unit vector from the index's embedder
+            k: Number of results wanted
+
+        Returns:
+            Up to k (article id, cosine similarity) pairs with a positive
+            similarity, most similar first
+        """
+        self.refresh()
+        # Take one consistent view; a concurrent add may swap the arrays
+        vectors, ids, count = self._vectors, self._ids, self.count
+        if not count or k <= 0:
+            return []
+        scores = vectors[:count] @ query
+        k = min(k, count)
+        # Selects the k best in linear time; only those k are sorted
+        top = np.argpartition(scores, count - k)[count - k :]
+        top = top[np.argsort(scores[top])[::-1]]
+        return [
+            (int(ids[row]), float(scores[row])) for row in top if scores[row] > 0
+        ]
+
+    def _rows(self, article_ids: "np.ndarray") -> "np.ndarray":
+        # Row of each article in the index, -1 for those not in it
+        rows = np.full(len(article_ids), -1, dtype=np.int64)
+        if self.count:
+            present = self._ids[: self.count]
+            order = np.argsort(present, kind="stable")
+            found = np.searchsorted(present, article_ids, sorter=order)
+            found = np.minimum(found, self.count - 1)
+            hit = present[order[found]] == article_ids
+            rows[hit] = order[found[hit]]
+        return rows
+
+    def checksums(self, article_ids: Sequence[int]) -> List[Optional[int]]:
+        """Text checksum stored for each article, None when not indexed."""
+        self.refresh()
+        with self._lock:
+            rows = self._rows(np.asarray(article_ids, dtype=np.int64))
+            return [
+                int(self._checksums[row]) if row >= 0 else None for row in rows
+            ]
+
+    def add(
+        self,
+        article_ids: Sequence[int],
+        vectors: "np.ndarray",
+        checksums: Optional[Sequence[int]] = None,
+    ) -> None:
+        """
+        Store vectors, replacing those of articles already in the index.
+
+        Args:
+            article_ids: Article id of each row of ``vectors``
+            vectors: (len(article_ids), dim) float32 matrix
+            checksums: text_checksum() of each embedded text
+        """
+        if not len(article_ids):
+            return
+        with self._lock:
+            os.makedirs(self.path, exist_ok=True)
+            if not self._writable:
+                self._load(self._current_mtime(), writable=True)
+            article_ids = np.asarray(article_ids, dtype=np.int64)
+            vectors = np.asarray(vectors, dtype=np.float32)
+            if checksums is None:
+                checksums = np.zeros(len(article_ids), dtype=np.int64)
+
+            rows = self._rows(article_ids)
+            new = rows < 0
+            rows[new] = self.count + np.arange(int(new.sum()))
+
+            self._reserve(self.count + int(new.sum()))
+            self._vectors[rows] = vectors
+            self._ids[rows] = article_ids
+            self._checksums[rows] = np.asarray(checksums, dtype=np.int64)
+            for array in (self._vectors, self._ids, self._checksums):
+                array.flush()
+            self.count += int(new.sum())
+            self._write_meta()
+
+    def mark_synced(self, until: datetime) -> None:
+        """Record that articles updated before ``until`` are embedded."""
+        with self._lock:
+            os.makedirs(self.path, exist_ok=True)
+            self.synced_until = until
+            self._write_meta()
+
+    def clear(self) -> None:
+        """Drop every vector, e.g. before a full rebuild."""
+        with self._lock:
+            os.makedirs(self.path, exist_ok=True)
+            self._vectors, self._ids, self._checksums = None, None, None
+            self.count, self.synced_until = 0, None
+            self._writable = True
+            self._write_meta()
+
+    def _current_mtime(self) -> Optional[int]:
+        try:
+            return os.stat(self._file("meta.json")).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _reserve(self, needed: int) -> None:
+        capacity = 0 if self._ids is None else len(self._ids)
+        if needed <= capacity:
+            return
+        capacity = max(needed, capacity * 2, MIN_CAPACITY)
+        # Grown copies replace the files whole, so readers that still map
+        # the old ones keep a consistent view until they refresh
+        vectors = self._grow("vectors.npy", self._vectors, (capacity, self.dim))
+        ids = self._grow("ids.npy", self._ids, (capacity,), dtype="int64")
+        checksums = self._grow(
+            "checksums.npy", self._checksums, (capacity,), dtype="int64"
+        )
+        self._vectors, self._ids, self._checksums = vectors, ids, checksums
+
+    def _grow(self, name, old, shape, dtype="float32"):
+        tmp = self._file(f"{name}.tmp")
+        grown = np.lib.format.open_memmap(tmp, mode="w+", dtype=dtype, shape=shape)
+        if old is not None and self.count:
+            grown[: self.count] = old[: self.count]
+        grown.flush()
+        del grown
+        os.replace(tmp, self._file(name))
+        return np.load(self._file(name), mmap_mode="r+")
+
+    def _write_meta(self) -> None:
+        meta = {
+            "format": FORMAT_VERSION,
+            "signature": self.embedder.signature,
+            "dim": self.dim,
+            "count": self.count,
+            "synced_until": self.synced_until and self.synced_until.isoformat(),
+        }
+        tmp = self._file("meta.json.tmp")
+        with open(tmp, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp, self._file("meta.json"))
+        self._meta_mtime = self._current_mtime()
+
+
+_index: Optional[SemanticIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_semantic_index() -> SemanticIndex:
+    """
+    The process-wide index configured by the SEMANTIC_* settings.
+
+    Raises:
+        SemanticSearchUnavailable: When numpy is missing or the feature is off
+    """
+    global _index
+    if not available():
+        raise SemanticSearchUnavailable("Semantic search is not available")
+    with _index_lock:
+        if _index is None:
+            embedder = HashingEmbedder(
+                settings.SEMANTIC_DIMENSIONS, settings.SEMANTIC_MAX_TEXT_CHARS
+            )
+            _index = SemanticIndex(settings.SEMANTIC_INDEX_DIR, embedder)
+        return _index
+
+
+def sync_semantic_index(
+    db: Session,
+    index: Optional[SemanticIndex] = None,
+    batch_size: int = 500,
+) -> int:
+    """
+    Embed the articles stored or edited since the index was last synced.
+
+    Candidates are the articles with an id above the highest indexed one
+    and those updated since shortly before the previous sync started, so
+    edits and ids SQLite reuses after a delete are seen too; an empty
+    index is filled with all articles. Candidates whose text is unchanged
+    are not embedded again. Nothing is written, and 0 returned, while
+    another worker is writing the index; its next sync catches up.
+
+    Args:
+        db: Database session
+        index: Index to update, the process-wide one by default
+        batch_size: Articles read and embedded at a time
+
+    Returns:
+        Number of articles embedded
+    """
+    if index is None:
+        if not available():
+            return 0
+        index = get_semantic_index()
+
+    with index.writer() as acquired:
+        if not acquired:
+            logger.info("Semantic index is being written by another worker")
+            return 0
+        added = _sync(db, index, batch_size)
+    if added:
+        logger.info(f"Embedded {added} articles into the semantic index")
+    return added
+
+
+def _sync(db: Session, index: SemanticIndex, batch_size: int) -> int:
+    # Database time, so the next sync's window ignores the app's clock
+    started = db.execute(select(func.now())).scalar()
+    if index.count and index.synced_until is not None:
+        # A union of two index lookups; SQLite would scan the table for OR
+        candidates = NewsArticle.id.in_(
+            union(
+                select(NewsArticle.id).where(NewsArticle.id > index.max_id()),
+                select(NewsArticle.id).where(
+                    NewsArticle.updated_at >= index.synced_until - SYNC_OVERLAP
+                ),
+            )
+        )
+    else:
+        candidates = true()
+
+    after = 0
+    added = 0
+    while True:
+        rows = db.execute(
+            select(
+                NewsArticle.id,
+                NewsArticle.title,
+                NewsArticle.ai_summary,
+                NewsArticle.content,
+            )
+            .where(candidates, NewsArticle.id > after)
+            .order_by(NewsArticle.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        after = rows[-1].id
+        texts = [article_text(row.title, row.ai_summary, row.content) for row in rows]
+        checksums = [text_checksum(text) for text in texts]
+        changed = [
+            i
+            for i, stored in enumerate(index.checksums([row.id for row in rows]))
+            if stored != checksums[i]
+        ]
+        if not changed:
+            continue
+        index.add(
+            [rows[i].id for i in changed],
+            index.embedder.embed_many([texts[i] for i in changed]),
+            [checksums[i] for i in changed],
+        )
+        added += len(changed)
+    index.mark_synced(started)
+    return added
+
+
+def rebuild_semantic_index(db: Session, index: Optional[SemanticIndex] = None) -> int:
+    """
+    Re-embed every article, e.g. after a change of settings.
+
+    Returns:
+        Number of articles embedded
+    """
+    index = index or get_semantic_index()
+    with index.writer() as acquired:
+        if not acquired:
+            logger.info("Semantic index is being written by another worker")
+            return 0
+        index.clear()
+        return _sync(db, index, batch_size=500)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    import argparse
+
+    from app.db.database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Update the semantic search index")
+    parser.add_argument(
+        "--rebuild", action="store_true", help="re-embed all articles from scratch"
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    with SessionLocal() as session:
+        update = rebuild_semantic_index if args.rebuild else sync_semantic_index
+        print(f"Embedded {update(session)} articles into {settings.SEMANTIC_INDEX_DIR}")
@@ -0,0 +1,38 @@
+"""
+Newline-delimited JSON responses for large listings.
+
+Clients opt in with ``Accept: application/x-ndjson`` or ``?stream=true``.
+The body is produced batch by batch from a server-side cursor, so the
+first bytes leave as soon as the first batch is read and memory stays flat
+however many rows the response holds. Each batch is written as one chunk,
+which the compression middleware flushes on its own.
+"""
+
+from typing import Any, AsyncIterator, Iterable
+
+import orjson
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def wants_ndjson(request: Request, stream: bool = False) -> bool:
+    """Check whether the client asked for an NDJSON stream."""
+    return stream or NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+def ndjson_lines(items: Iterable[Any]) -> bytes:
+    """Serialize items as NDJSON, one line each."""
+    return b"".join(orjson.dumps(item, option=orjson.OPT_APPEND_NEWLINE) for item in items)
+
+
+def ndjson_response(chunks: AsyncIterator[bytes]) -> StreamingResponse:
+    """
+    Stream NDJSON chunks to the client.
+
+    Streamed bodies are neither cached nor validated by ETag.
+    """
+    return StreamingResponse(
+        chunks, media_type=NDJSON_MEDIA_TYPE, headers={"Cache-Control": "no-store"}
+    )
@@ -0,0 +1,263 @@
+"""
+Async versions of the CRUD operations on hot read paths.
+
+The statements are shared with ``app.db.crud`` so both layers always
+return the same rows; only the session type differs.
+"""
+
+from datetime import datetime
+from typing import AsyncIterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Row, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.crud import (
+    select_article_row,
+    select_article_rows,
+    select_articles,
+    select_articles_version,
+    select_bookmarked_articles,
+    select_search,
+    select_search_rows,
+    select_sources,
+    select_user_feed,
+    select_user_feed_version,
+)
+from app.db.models import Bookmark, NewsArticle, User
+
+
+async def get_articles(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 100,
+    source: Optional[str] = None,
+    category: Optional[str] = None,
+    channel_id: Optional[int] = None,
+    after: Optional[Tuple[datetime, int]] = None,
+) -> List[NewsArticle]:
+    """
+    Get articles with optional filtering by source, channel and category.
+
+    See ``app.db.crud.select_articles`` for ordering and keyset pagination.
+    """
+    query = select_articles(skip, limit, source, category, channel_id, after)
+    return list((await db.scalars(query)).all())
+
+
+async def get_article_rows(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 100,
+    source: Optional[str] = None,
+    category: Optional[str] = None,
+    channel_id: Optional[int] = None,
+    after: Optional[Tuple[datetime, int]] = None,
+    fields: Optional[Sequence[str]] = None,
+) -> List[Row]:
+    """
+    Get articles as column tuples for direct serialization.
+
+    See ``app.db.crud.select_article_rows``.
+    """
+    query = select_article_rows(
+        skip, limit, source, category, channel_id, after, fields
+    )
+    return list((await db.execute(query)).all())
+
+
+async def stream_article_rows(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 100,
+    source: Optional[str] = None,
+    category: Optional[str] = None,
+    channel_id: Optional[int] = None,
+    after: Optional[Tuple[datetime, int]] = None,
+    fields: Optional[Sequence[str]] = None,
+    batch_size: int = 200,
+) -> AsyncIterator[Sequence[Row]]:
+    """
+    Yield article rows in batches from a server-side cursor.
+
+    Same rows as ``get_article_rows``, without holding them all in memory.
+    """
+    query = select_article_rows(
+        skip, limit, source, category, channel_id, after, fields
+    ).execution_options(yield_per=batch_size)
+    result = await db.stream(query)
+    async for rows in result.partitions():
+        yield rows
+
+
+async def get_articles_version(
+    db: AsyncSession,
+    source: Optional[str] = None,
+    category: Optional[str] = None,
+    channel_id: Optional[int] = None,
+) -> Tuple:
+    """
+    Get the version marker of an article listing.
+
+    See ``app.db.crud.select_articles_version``.
+    """
+    query = select_articles_version(source, category, channel_id)
+    return tuple((await db.execute(query)).one())
+
+
+async def get_article(db: AsyncSession, article_id: int) -> Optional[NewsArticle]:
+    """
+    Get a specific article by ID.
+    """
+    return await db.get(NewsArticle, article_id)
+
+
+async def get_article_row(
+    db: AsyncSession, article_id: int, fields: Sequence[str]
+) -> Optional[Row]:
+    """
+    Get some columns of a specific article by ID.
+
+    See ``app.db.crud.select_article_row``.
+    """
+    return (await db.execute(select_article_row(article_id, fields))).first()
+
+
+async def get_sources(db: AsyncSession) -> List[str]:
+    """
+    Get all distinct article sources.
+    """
+    return list((await db.scalars(select_sources())).all())
+
+
+async def get_user_feed(
+    db: AsyncSession,
+    user_id: str,
+    per_channel_limit: int = 100,
+    channel_id: Optional[int] = None,
+    after: Optional[Tuple[datetime, int]] = None,
+    fields: Optional[Sequence[str]] = None,
+) -> List[Row]:
+    """
+    Get the newest articles of every channel a user subscribes to.
+
+    See ``app.db.crud.select_user_feed`` for the query and the returned columns.
+    """
+    query = select_user_feed(
+        user_id,
+        per_channel_limit,
+        channel_id,
+        after,
+        fields,
+        dialect=db.bind.dialect.name,
+    )
+    return list((await db.execute(query)).all())
+
+
+async def stream_user_feed(
+    db: AsyncSession,
+    user_id: str,
+    per_channel_limit: int = 100,
+    channel_id: Optional[int] = None,
+    after: Optional[Tuple[datetime, int]] = None,
+    fields: Optional[Sequence[str]] = None,
+    batch_size: int = 200,
+) -> AsyncIterator[Sequence[Row]]:
+    """
+    Yield the rows of a user's feed in batches from a server-side cursor.
+
+    Same rows as ``get_user_feed``, without holding them all in memory. The
+    statement only reads the rows it returns, so the first batch arrives
+    without waiting for the whole feed to be ranked.
+    """
+    query = select_user_feed(
+        user_id,
+        per_channel_limit,
+        channel_id,
+        after,
+        fields,
+        dialect=db.bind.dialect.name,
+    ).execution_options(yield_per=batch_size)
+    result = await db.stream(query)
+    async for rows in result.partitions():
+        yield rows
+
+
+async def get_user_feed_version(db: AsyncSession, user_id: str) -> Tuple:
+    """
+    Get the version marker of a user's feed.
+
+    See ``app.db.crud.select_user_feed_version``.
+    """
+    return tuple((await db.execute(select_user_feed_version(user_id))).one())
+
+
+async def search_articles(
+    db: AsyncSession,
+    terms: str,
+    limit: int = 20,
+    source: Optional[str] = None,
+    category: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    after: Optional[Tuple[float, int]] = None,
+) -> List[Row]:
+    """
+    Run a ranked full-text search.
+
+    See ``app.db.crud.select_search``; the statement is built for the
+    dialect of the session's database.
+    """
+    query = select_search(
+        db.bind.dialect.name, terms, limit, source, category, since, until, after
+    )
+    return list((await db.execute(query)).all())
+
+
+async def get_search_rows(db: AsyncSession, article_ids: List[int]) -> List[Row]:
+    """
+    Get the search columns of the given articles, in no particular order.
+    """
+    if not article_ids:
+        return []
+    return list((await db.execute(select_search_rows(article_ids))).all())
+
+
+async def get_user_by_username(db: AsyncSession, username: str) -> Optional[User]:
+    """
+    Get a user by username.
+    """
+    return await db.scalar(select(User).where(User.username == username).limit(1))
+
+
+async def get_user_by_email(db: AsyncSession, email: str) -> Optional[User]:
+    """
+    Get a user by email.
+    """
+    return await db.scalar(select(User).where(User.email == email).limit(1))
+
+
+async def get_user_bookmarks(db: AsyncSession, user_id: str) -> List[Bookmark]:
+    """
+    Get all bookmarks of a user.
+    """
+    query = select(Bookmark).where(Bookmark.user_id == user_id)
+    return list((await db.scalars(query)).all())
+
+
+async def get_bookmarked_articles(db: AsyncSession, user_id: str) -> List[NewsArticle]:
+    """
+    Get the articles a user bookmarked in a single query.
+    """
+    return list((await db.scalars(select_bookmarked_articles(user_id))).all())
+
+
+async def is_bookmarked(db: AsyncSession, user_id: str, article_id: int) -> bool:
+    """
+    Check whether a user bookmarked an article.
+    """
+    query = (
+        select(Bookmark.id)
+        .where(Bookmark.user_id == user_id, Bookmark.article_id == article_id)
+        .limit(1)
+    )
+    return await db.scalar(query) is not None
@@ -1,39 +1,164 @@
 # from sqlalchemy import and_
-from typing import Any, Dict, List, Optional
+import re
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
 
-from sqlalchemy.orm import Session
+from sqlalchemy import (
+    Column,
+    Row,
+    Select,
+    and_,
+    column,
+    delete,
+    event,
+    func,
+    inspect,
+    literal_column,
+    or_,
+    select,
+    table,
+    true,
+    union,
+    update,
+)
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, aliased
 
+from app.core.cache import principal_cache
+from app.core.dedup import band_buckets, from_signed, hamming_distance, probe_buckets
 from app.core.security import get_password_hash, verify_password
-from app.db.models import Bookmark, NewsArticle, User, UserChannels
+from app.db.models import (
+    ARTICLE_FTS_TABLE,
+    SEARCH_TEXT_CONFIG,
+    ArticleSimhashBand,
+    Bookmark,
+    Channel,
+    ChannelFetchState,
+    NewsArticle,
+    Subscription,
+    User,
+)
+from app.schemas.news import NewsArticle as NewsArticleSchema
 from app.schemas.user import UserCreate
 
 # from datetime import datetime
 
 
-def get_articles(
-    db: Session,
+def published_before(after: Tuple[datetime, int], article=NewsArticle):
+    """
+    Build the keyset condition for rows that sort after a cursor position.
+
+    Rows are ordered by ``(published_date DESC, id DESC)``, so the next page
+    holds rows published earlier, or at the same time with a smaller id.
+
+    Args:
+        after: (published_date, id) of the last row already returned
+        article: NewsArticle or an alias of it to build the condition for
+    """
+    published_date, article_id = after
+    return or_(
+        article.published_date < published_date,
+        and_(
+            article.published_date == published_date,
+            article.id < article_id,
+        ),
+    )
+
+
+def select_articles(
     skip: int = 0,
     limit: int = 100,
     source: Optional[str] = None,
     category: Optional[str] = None,
-) -> List[NewsArticle]:
+    channel_id: Optional[int] = None,
+    after: Optional[Tuple[datetime, int]] = None,
+) -> Select:
     """
-    Get articles with optional filtering by source and category.
+    Build the article listing statement shared by the sync and async CRUD.
 
     Returns articles sorted by published_date in descending order (newest first).
+    When ``after`` is given, only articles that sort after that
+    (published_date, id) position are returned, which pages through the
+    listing without an OFFSET scan.
     """
-    query = db.query(NewsArticle)
+    query = select(NewsArticle)
+
+    if after is not None:
+        query = query.where(published_before(after))
 
     if source:
-        query = query.filter(NewsArticle.source == source)
+        query = query.where(NewsArticle.source == source)
+
+    if channel_id is not None:
+        query = query.where(NewsArticle.channel_id == channel_id)
 
     if category:
-        query = query.filter(NewsArticle.category == category)
+        query = query.where(NewsArticle.category == category)
+
+    # Sort by published_date in descending order (newest first); the id
+    # breaks ties so that keyset pages never skip or repeat rows
+    query = query.order_by(NewsArticle.published_date.desc(), NewsArticle.id.desc())
+
+    return query.offset(skip).limit(limit)
+
+
+# Columns of the public article representation, in the schema's field order
+ARTICLE_COLUMNS = tuple(
+    NewsArticle.__table__.c[name] for name in NewsArticleSchema.model_fields
+)
 
-    # Sort by published_date in descending order (newest first)
-    query = query.order_by(NewsArticle.published_date.desc())
 
-    return query.offset(skip).limit(limit).all()
+def article_columns(fields: Optional[Sequence[str]] = None) -> Tuple[Column, ...]:
+    """Columns for the given article field names, all public columns by default."""
+    if fields is None:
+        return ARTICLE_COLUMNS
+    return tuple(NewsArticle.__table__.c[name] for name in fields)
+
+
+def select_article_rows(
+    skip: int = 0,
+    limit: int = 100,
+    source: Optional[str] = None,
+    category: Optional[str] = None,
+    channel_id: Optional[int] = None,
+    after: Optional[Tuple[datetime, int]] = None,
+    fields: Optional[Sequence[str]] = None,
+) -> Select:
+    """
+    Build the article listing statement returning plain column tuples.
+
+    Same rows and order as ``select_articles``, but only the columns of the
+    public representation, so responses can be serialized straight from the
+    rows without building ORM objects or validating them. ``fields`` narrows
+    the selected columns further, in the order given.
+    """
+    query = select_articles(skip, limit, source, category, channel_id, after)
+    return query.with_only_columns(*article_columns(fields))
+
+
+def select_article_row(article_id: int, fields: Sequence[str]) -> Select:
+    """Build the statement selecting some columns of a single article."""
+    return select(*article_columns(fields)).where(NewsArticle.id == article_id)
+
+
+def get_articles(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    source: Optional[str] = None,
+    category: Optional[str] = None,
+    channel_id: Optional[int] = None,
+    after: Optional[Tuple[datetime, int]] = None,
+) -> List[NewsArticle]:
+    """
+    Get articles with optional filtering by source, channel and category.
+
+    See ``select_articles`` for ordering and keyset pagination.
+    """
+    query = select_articles(skip, limit, source, category, channel_id, after)
+    return list(db.scalars(query).all())
 
 
 def get_article(db: Session, article_id: int) -> Optional[NewsArticle]:
@@ -43,6 +168,36 @@ def get_article(db: Session, article_id: int) -> Optional[NewsArticle]:
     return db.query(NewsArticle).filter(NewsArticle.id == article_id).first()
 
 
+def select_sources() -> Select:
+    """Build the statement listing the distinct article sources."""
+    return select(NewsArticle.source).where(NewsArticle.source.is_not(None)).distinct()
+
+
+def select_articles_version(
+    source: Optional[str] = None,
+    category: Optional[str] = None,
+    channel_id: Optional[int] = None,
+) -> Select:
+    """
+    Build the statement computing a version marker for an article listing.
+
+    The row count and the latest ``updated_at`` of the filtered articles
+    change whenever ingestion adds or rewrites one of them, so they stand in
+    for the listing's content when generating ETags.
+
+    Returns:
+        Statement yielding one (count, max_updated_at) row
+    """
+    query = select(func.count(NewsArticle.id), func.max(NewsArticle.updated_at))
+    if source:
+        query = query.where(NewsArticle.source == source)
+    if channel_id is not None:
+        query = query.where(NewsArticle.channel_id == channel_id)
+    if category:
+        query = query.where(NewsArticle.category == category)
+    return query
+
+
 def get_article_by_url(db: Session, url: str) -> Optional[NewsArticle]:
     """
     Get a news article by its URL.
@@ -85,33 +240,218 @@ def create_or_update_article(db: Session, article_data: Dict[str, Any]) -> NewsA
         return new_article
 
 
-def add_user_channel(db: Session, user_id: str, channel_alias: str):
+# Keep IN lists well below SQLite's bound parameter limit
+URL_LOOKUP_CHUNK_SIZE = 500
+
+
+def get_existing_article_urls(db: Session, urls: Iterable[str]) -> Set[str]:
+    """
+    Return the subset of the given URLs that are already stored.
+
+    One set-based query is issued per chunk of URLs instead of one query
+    per URL.
+    """
+    unique_urls = list(dict.fromkeys(url for url in urls if url))
+    existing: Set[str] = set()
+    for start in range(0, len(unique_urls), URL_LOOKUP_CHUNK_SIZE):
+        chunk = unique_urls[start : start + URL_LOOKUP_CHUNK_SIZE]
+        existing.update(
+            db.execute(select(NewsArticle.url).where(NewsArticle.url.in_(chunk)))
+            .scalars()
+            .all()
+        )
+    return existing
+
+
+def get_existing_entry_keys(db: Session, keys: Iterable[str]) -> Set[str]:
+    """
+    Return the subset of the given feed entry keys that are already stored.
+
+    A key is known when it matches the URL or the GUID of a stored article,
+    so entries are recognised by their GUID even after their link changed.
+    """
+    unique_keys = list(dict.fromkeys(key for key in keys if key))
+    existing: Set[str] = set()
+    for start in range(0, len(unique_keys), URL_LOOKUP_CHUNK_SIZE):
+        chunk = unique_keys[start : start + URL_LOOKUP_CHUNK_SIZE]
+        query = union(
+            select(NewsArticle.url).where(NewsArticle.url.in_(chunk)),
+            select(NewsArticle.guid).where(NewsArticle.guid.in_(chunk)),
+        )
+        existing.update(db.execute(query).scalars().all())
+    return existing
+
+
+# Dialects with a native INSERT ... ON CONFLICT construct
+UPSERT_INSERTS = {"sqlite": sqlite_insert, "postgresql": postgresql_insert}
+
+
+def bulk_upsert_articles(db: Session, articles: List[Dict[str, Any]]) -> int:
+    """
+    Insert or update many articles in a single transaction.
+
+    Uses ``INSERT ... ON CONFLICT(url) DO UPDATE`` on SQLite and PostgreSQL.
+    Rows whose values did not change are left untouched so their
+    ``updated_at`` is preserved. Other dialects fall back to upserting one
+    article at a time.
+
+    Args:
+        db: Database session
+        articles: Article dictionaries, each containing at least a URL
+
+    Returns:
+        Number of articles inserted; updates of stored URLs are not counted
+    """
+    if not articles:
+        return 0
+    if any(not article.get("url") for article in articles):
+        raise ValueError("Article data must contain URL")
+
+    # Last occurrence wins when a batch repeats a URL
+    rows_by_url = {article["url"]: article for article in articles}
+    inserted = len(rows_by_url) - len(get_existing_article_urls(db, rows_by_url))
+
+    insert = UPSERT_INSERTS.get(db.get_bind().dialect.name)
+    if insert is None:
+        for article in rows_by_url.values():
+            create_or_update_article(db, article)
+        return inserted
+
+    table = NewsArticle.__table__
+    columns = sorted(
+        {key for row in rows_by_url.values() for key in row if key in table.c}
+    )
+    rows = [{col: row.get(col) for col in columns} for row in rows_by_url.values()]
+
+    stmt = insert(table)
+    update_columns = [col for col in columns if col not in ("id", "url", "created_at")]
+    if update_columns:
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.url],
+            set_={
+                **{col: stmt.excluded[col] for col in update_columns},
+                "updated_at": func.now(),
+            },
+            where=or_(
+                *(
+                    table.c[col].is_distinct_from(stmt.excluded[col])
+                    for col in update_columns
+                )
+            ),
+        )
+    else:
+        stmt = stmt.on_conflict_do_nothing(index_elements=[table.c.url])
+
+    db.execute(stmt, rows)
+    db.commit()
+    return inserted
+
+
+def get_channel_fetch_state(
+    db: Session, channel_alias: str
+) -> Optional[ChannelFetchState]:
     """
-    Add a channel for a user.
+    Get the conditional-fetch state stored for a channel.
     """
-    db_channel = UserChannels(user_id=user_id, channel_alias=channel_alias)
+    return db.get(ChannelFetchState, channel_alias)
+
+
+def save_channel_fetch_state(
+    db: Session, channel_alias: str, **fields: Any
+) -> ChannelFetchState:
+    """
+    Create or update the conditional-fetch state of a channel.
+
+    Args:
+        db: Database session
+        channel_alias: Channel the state belongs to
+        fields: Column values to set, e.g. etag or content_hash
+
+    Returns:
+        The stored ChannelFetchState object
+    """
+    state = db.get(ChannelFetchState, channel_alias)
+    if state is None:
+        state = ChannelFetchState(channel_alias=channel_alias)
+        db.add(state)
+    for key, value in fields.items():
+        setattr(state, key, value)
+    db.commit()
+    db.refresh(state)
+    return state
+
+
+def normalize_channel_alias(channel_alias: str) -> str:
+    """Canonical form of a Telegram alias: stripped, lower-case, with '@'."""
+    return "@" + channel_alias.strip().lstrip("@").lower()
+
+
+def get_channel_by_alias(db: Session, channel_alias: str) -> Optional[Channel]:
+    """
+    Get a channel by alias, in any spelling.
+    """
+    alias = normalize_channel_alias(channel_alias)
+    return db.query(Channel).filter(Channel.alias == alias).first()
+
+
+def get_or_create_channel(db: Session, channel_alias: str) -> Channel:
+    """
+    Get the channel for an alias, creating it on first use.
+    """
+    channel = get_channel_by_alias(db, channel_alias)
+    if channel:
+        return channel
+
+    channel = Channel(alias=normalize_channel_alias(channel_alias))
+    db.add(channel)
+    try:
+        db.commit()
+    except IntegrityError:
+        # Another session created it concurrently
+        db.rollback()
+        return get_channel_by_alias(db, channel_alias)
+    db.refresh(channel)
+    return channel
+
+
+def add_user_channel(db: Session, user_id: str, channel_alias: str) -> Subscription:
+    """
+    Subscribe a user to a channel.
+
+    Subscribing twice to the same channel returns the existing subscription.
+    """
+    channel = get_or_create_channel(db, channel_alias)
+    existing = (
+        db.query(Subscription)
+        .filter(Subscription.user_id == user_id, Subscription.channel_id == channel.id)
+        .first()
+    )
+    if existing:
+        return existing
+
+    db_channel = Subscription(user_id=user_id, channel_id=channel.id)
     db.add(db_channel)
     db.commit()
     db.refresh(db_channel)
     return db_channel
 
 
-def get_user_channels(db: Session, user_id: str):
+def get_user_channels(db: Session, user_id: str) -> List[Subscription]:
     """
-    Get all channels for a user.
+    Get all channel subscriptions for a user.
     """
-    return db.query(UserChannels).filter(UserChannels.user_id == user_id).all()
+    return db.query(Subscription).filter(Subscription.user_id == user_id).all()
 
 
 def get_channel(db: Session, channel_id: str):
-    return db.query(UserChannels).filter(UserChannels.id == channel_id).first()
+    return db.query(Subscription).filter(Subscription.id == channel_id).first()
 
 
 def get_user_channel(
     db: Session, user_id: str, channel_alias: str
-) -> Optional[UserChannels]:
+) -> Optional[Subscription]:
     """
-    Get a specific channel for a user.
+    Get a specific channel subscription for a user.
 
     Args:
         db: Database session
@@ -119,34 +459,515 @@ def get_user_channel(
         channel_alias: Channel alias to check
 
     Returns:
-        UserChannels object if found, None otherwise
+        Subscription object if found, None otherwise
     """
     return (
-        db.query(UserChannels)
+        db.query(Subscription)
+        .join(Channel, Subscription.channel_id == Channel.id)
         .filter(
-            UserChannels.user_id == user_id, UserChannels.channel_alias == channel_alias
+            Subscription.user_id == user_id,
+            Channel.alias == normalize_channel_alias(channel_alias),
         )
         .first()
     )
 
 
 def update_channel(db: Session, channel_id: str, new_channel_alias: str):
-    db_channel = db.query(UserChannels).filter(UserChannels.id == channel_id).first()
+    db_channel = db.query(Subscription).filter(Subscription.id == channel_id).first()
     if db_channel:
-        db_channel.channel_alias = new_channel_alias
+        db_channel.channel_id = get_or_create_channel(db, new_channel_alias).id
         db.commit()
         db.refresh(db_channel)
     return db_channel
 
 
 def delete_channel(db: Session, channel_id: str):
-    db_channel = db.query(UserChannels).filter(UserChannels.id == channel_id).first()
+    db_channel = db.query(Subscription).filter(Subscription.id == channel_id).first()
     if db_channel:
         db.delete(db_channel)
         db.commit()
     return db_channel
 
 
+# Article columns of /feed rows; the key columns locate a row for cursors
+FEED_ARTICLE_COLUMNS = (
+    NewsArticle.id,
+    NewsArticle.title,
+    NewsArticle.content,
+    NewsArticle.url,
+    NewsArticle.published_date,
+    NewsArticle.ai_summary,
+    NewsArticle.category,
+)
+FEED_KEY_COLUMNS = ("id", "published_date")
+
+
+def select_user_feed(
+    user_id: str,
+    per_channel_limit: int = 100,
+    channel_id: Optional[int] = None,
+    after: Optional[Tuple[datetime, int]] = None,
+    fields: Optional[Sequence[str]] = None,
+    dialect: str = "sqlite",
+) -> Select:
+    """
+    Build the statement selecting the newest articles of every channel a
+    user subscribes to.
+
+    A single query fetches the top ``per_channel_limit`` articles of each
+    channel through the (channel_id, published_date) index, without ranking
+    or sorting all of a channel's articles, so the work and the time to the
+    first row are bounded by the rows returned rather than by the size of
+    the channels. PostgreSQL joins each subscription to a LATERAL top-N
+    subquery. SQLite has no LATERAL joins: a materialized CTE looks up the
+    (published_date, id) of each channel's ``per_channel_limit``-th newest
+    article and articles are joined by an index range scan down to that
+    cutoff. Subscriptions without articles yield one row whose article
+    columns are NULL.
+
+    Args:
+        user_id: ID of the subscribed user
+        per_channel_limit: Maximum number of articles per channel
+        channel_id: Restrict the feed to one subscribed channel
+        after: Only include articles after this (published_date, id) position
+        fields: Article columns to select among title, content, url,
+            ai_summary and category; all of them by default. id and
+            published_date are always selected
+        dialect: Database dialect name, "sqlite" or "postgresql"
+
+    Returns:
+        Statement yielding rows ordered by subscription, then newest article
+        first, with the columns subscription_id, channel_id, channel_alias, id, title,
+        content, url, published_date, ai_summary and category
+    """
+    columns = [
+        column
+        for column in FEED_ARTICLE_COLUMNS
+        if fields is None or column.name in fields or column.name in FEED_KEY_COLUMNS
+    ]
+    if dialect == "postgresql":
+        newest_query = (
+            select(*columns)
+            .where(NewsArticle.channel_id == Subscription.channel_id)
+            .order_by(NewsArticle.published_date.desc(), NewsArticle.id.desc())
+            .limit(per_channel_limit)
+        )
+        if after is not None:
+            newest_query = newest_query.where(published_before(after))
+        newest = newest_query.lateral("newest")
+
+        query = (
+            select(
+                Subscription.id.label("subscription_id"),
+                Subscription.channel_id,
+                Channel.alias.label("channel_alias"),
+                *(newest.c[column.name] for column in columns),
+            )
+            .join(Channel, Channel.id == Subscription.channel_id)
+            .outerjoin(newest, true())
+            .where(Subscription.user_id == user_id)
+            .order_by(
+                Subscription.created_at,
+                Subscription.id,
+                newest.c.published_date.desc(),
+                newest.c.id.desc(),
+            )
+        )
+        if channel_id is not None:
+            query = query.where(Subscription.channel_id == channel_id)
+        return query
+
+    older = aliased(NewsArticle)
+
+    def cutoff(column: Column):
+        # Value of the channel's per_channel_limit-th newest article
+        nth = (
+            select(column)
+            .where(older.channel_id == Subscription.channel_id)
+            .order_by(older.published_date.desc(), older.id.desc())
+            .offset(per_channel_limit - 1)
+            .limit(1)
+        )
+        if after is not None:
+            nth = nth.where(published_before(after, older))
+        return nth.scalar_subquery()
+
+    subscriptions_query = select(
+        Subscription.id,
+        Subscription.channel_id,
+        Subscription.created_at,
+        cutoff(older.published_date).label("cutoff_date"),
+        cutoff(older.id).label("cutoff_id"),
+    ).where(Subscription.user_id == user_id)
+    if channel_id is not None:
+        subscriptions_query = subscriptions_query.where(
+            Subscription.channel_id == channel_id
+        )
+    # Materialized so each cutoff is computed once per subscription
+    subscriptions = subscriptions_query.cte("feed_subscriptions").prefix_with(
+        "MATERIALIZED"
+    )
+
+    # Channels with fewer articles than the limit have no cutoff and
+    # contribute all of them
+    cutoff_date = func.coalesce(subscriptions.c.cutoff_date, datetime.min)
+    cutoff_id = func.coalesce(subscriptions.c.cutoff_id, 0)
+    in_window = and_(
+        NewsArticle.channel_id == subscriptions.c.channel_id,
+        NewsArticle.published_date >= cutoff_date,
+        or_(NewsArticle.published_date > cutoff_date, NewsArticle.id >= cutoff_id),
+    )
+    if after is not None:
+        in_window = and_(in_window, published_before(after))
+
+    return (
+        select(
+            subscriptions.c.id.label("subscription_id"),
+            subscriptions.c.channel_id,
+            Channel.alias.label("channel_alias"),
+            *columns,
+        )
+        .select_from(subscriptions)
+        .join(Channel, Channel.id == subscriptions.c.channel_id)
+        .outerjoin(NewsArticle, in_window)
+        .order_by(
+            subscriptions.c.created_at,
+            subscriptions.c.id,
+            NewsArticle.published_date.desc(),
+            NewsArticle.id.desc(),
+        )
+    )
+
+
+def select_user_feed_version(user_id: str) -> Select:
+    """
+    Build the statement computing a version marker for a user's feed.
+
+    Covers the user's subscriptions as well as the articles of the
+    subscribed channels, so subscribing, unsubscribing and ingestion all
+    change it.
+
+    Returns:
+        Statement yielding one (subscriptions, max_subscription_id,
+        articles, max_updated_at) row
+    """
+    return (
+        select(
+            func.count(func.distinct(Subscription.id)),
+            func.max(Subscription.id),
+            func.count(NewsArticle.id),
+            func.max(NewsArticle.updated_at),
+        )
+        .select_from(Subscription)
+        .outerjoin(NewsArticle, NewsArticle.channel_id == Subscription.channel_id)
+        .where(Subscription.user_id == user_id)
+    )
+
+
+def get_user_feed(
+    db: Session,
+    user_id: str,
+    per_channel_limit: int = 100,
+    channel_id: Optional[int] = None,
+    after: Optional[Tuple[datetime, int]] = None,
+    fields: Optional[Sequence[str]] = None,
+) -> List[Row]:
+    """
+    Get the newest articles of every channel a user subscribes to.
+
+    See ``select_user_feed`` for the query and the returned columns.
+    """
+    query = select_user_feed(
+        user_id,
+        per_channel_limit,
+        channel_id,
+        after,
+        fields,
+        dialect=db.get_bind().dialect.name,
+    )
+    return db.execute(query).all()
+
+
+# Search-related operations
+
+# Relative weight of title, content and ai_summary matches in SQLite's
+# bm25(); PostgreSQL ranks with the A/B/C weights of the search_vector
+FTS_COLUMN_WEIGHTS = (4.0, 1.0, 2.0)
+SNIPPET_WORDS = 16
+
+SEARCH_COLUMNS = (
+    NewsArticle.id,
+    NewsArticle.title,
+    NewsArticle.url,
+    NewsArticle.source,
+    NewsArticle.published_date,
+    NewsArticle.category,
+    NewsArticle.ai_summary,
+)
+
+
+def search_terms(text: str) -> Optional[str]:
+    """
+    Turn user input into a search expression both backends accept.
+
+    Every word has to match, and text in double quotes has to match as a
+    phrase. Each term is quoted and punctuation is dropped, so no input can
+    be a syntax error for FTS5 MATCH or ``websearch_to_tsquery``.
+
+    Returns:
+        The expression, or None when the input holds no searchable word
+    """
+    terms = []
+    for phrase, word in re.findall(r'"([^"]*)"|(\S+)', text):
+        tokens = re.findall(r"\w+", phrase or word)
+        if tokens:
+            terms.append('"' + " ".join(tokens) + '"')
+    return " ".join(terms) or None
+
+
+def select_search(
+    dialect: str,
+    terms: str,
+    limit: int = 20,
+    source: Optional[str] = None,
+    category: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    after: Optional[Tuple[float, int]] = None,
+) -> Select:
+    """
+    Build the ranked full-text search statement.
+
+    Matches are scored with bm25 on SQLite and ts_rank_cd on PostgreSQL,
+    best first with the id breaking ties. Only the page of ``limit`` rows
+    gets a snippet, which is the costly part of a search.
+
+    Args:
+        dialect: Database dialect name, "sqlite" or "postgresql"
+        terms: Expression built by ``search_terms``
+        limit: Maximum number of rows
+        source: Only match articles from this source
+        category: Only match articles in this category
+        since: Only match articles published at or after this time
+        until: Only match articles published before this time
+        after: (score, id) of the last row already returned
+
+    Returns:
+        Statement yielding rows with the columns id, title, url, source,
+        published_date, category, ai_summary, score and snippet
+    """
+    filters = []
+    if source:
+        filters.append(NewsArticle.source == source)
+    if category:
+        filters.append(NewsArticle.category == category)
+    if since is not None:
+        filters.append(NewsArticle.published_date >= since)
+    if until is not None:
+        filters.append(NewsArticle.published_date < until)
+
+    if dialect == "postgresql":
+        tsquery = func.websearch_to_tsquery(SEARCH_TEXT_CONFIG, terms)
+        vector = literal_column("news_articles.search_vector")
+        score = func.ts_rank_cd(vector, tsquery)
+        article_id = NewsArticle.id
+        ranked = select(article_id, score.label("score")).where(
+            vector.op("@@")(tsquery)
+        )
+    else:
+        fts = table(ARTICLE_FTS_TABLE, column("rowid"))
+        match = literal_column(ARTICLE_FTS_TABLE).op("MATCH")(terms)
+        # bm25() is lower for better matches
+        score = -func.bm25(literal_column(ARTICLE_FTS_TABLE), *FTS_COLUMN_WEIGHTS)
+        # The FTS rowid is the article id; the articles table is only
+        # joined to filter, as common terms match most of the rows
+        article_id = fts.c.rowid
+        ranked = select(article_id.label("id"), score.label("score")).where(match)
+        if filters:
+            ranked = ranked.join(NewsArticle, NewsArticle.id == article_id)
+
+    if filters:
+        ranked = ranked.where(*filters)
+    if after is not None:
+        after_score, after_id = after
+        ranked = ranked.where(
+            or_(
+                score < after_score,
+                and_(score == after_score, article_id < after_id),
+            )
+        )
+    ranked = ranked.order_by(score.desc(), article_id.desc()).limit(limit).subquery()
+
+    if dialect == "postgresql":
+        snippet = func.ts_headline(
+            SEARCH_TEXT_CONFIG,
+            func.coalesce(NewsArticle.content, ""),
+            tsquery,
+            f"StartSel=<b>, StopSel=</b>, MaxWords={SNIPPET_WORDS}, "
+            f"MinWords={SNIPPET_WORDS // 2}",
+        )
+    else:
+        # snippet() needs the MATCH of its own query; the rowid lookup
+        # keeps it to the rows of the page
+        snippet = func.snippet(
+            literal_column(ARTICLE_FTS_TABLE), 1, "<b>", "</b>", "…", SNIPPET_WORDS
+        )
+
+    query = (
+        select(*SEARCH_COLUMNS, ranked.c.score, snippet.label("snippet"))
+        .select_from(ranked)
+        .join(NewsArticle, NewsArticle.id == ranked.c.id)
+    )
+    if dialect != "postgresql":
+        query = query.join(fts, fts.c.rowid == ranked.c.id).where(match)
+    return query.order_by(ranked.c.score.desc(), ranked.c.id.desc())
+
+
+def select_search_rows(article_ids: List[int]) -> Select:
+    """
+    Build a statement returning the search columns of the given articles.
+
+    Used to turn ids ranked outside the database, e.g. by semantic search,
+    into result rows; the rows come back in no particular order.
+    """
+    return select(*SEARCH_COLUMNS).where(NewsArticle.id.in_(article_ids))
+
+
+# Near-duplicate operations
+
+# Articles compared bit by bit per lookup at most
+NEAR_DUPLICATE_CANDIDATES = 1000
+
+
+def find_near_duplicate(
+    db: Session,
+    fingerprint: int,
+    max_distance: int,
+    since: Optional[datetime] = None,
+) -> Optional[Row]:
+    """
+    Find the stored article whose SimHash is closest to a fingerprint.
+
+    Candidates have an LSH band within ``app.core.dedup.PROBE_RADIUS``
+    bits of the fingerprint's, which every article within
+    ``app.core.dedup.MAX_GUARANTEED_DISTANCE`` bits does; only they are
+    compared bit by bit, the newest ``NEAR_DUPLICATE_CANDIDATES`` of
+    them at most.
+
+    Args:
+        db: Database session
+        fingerprint: Unsigned SimHash of the new article's text
+        max_distance: Largest number of differing bits of a near duplicate
+        since: Only consider articles published at or after this time
+
+    Returns:
+        Row with id, cluster_id and the LLM enrichment (ai_summary,
+        category, keywords, sentiment_score) of the closest article, the
+        oldest one on ties, or None
+    """
+    bands = or_(
+        *(
+            and_(
+                ArticleSimhashBand.band == band,
+                ArticleSimhashBand.bucket.in_(probe_buckets(bucket)),
+            )
+            for band, bucket in enumerate(band_buckets(fingerprint))
+        )
+    )
+    query = (
+        select(
+            NewsArticle.id,
+            NewsArticle.simhash,
+            NewsArticle.cluster_id,
+            NewsArticle.ai_summary,
+            NewsArticle.category,
+            NewsArticle.keywords,
+            NewsArticle.sentiment_score,
+        )
+        .where(NewsArticle.id.in_(select(ArticleSimhashBand.article_id).where(bands)))
+        # Reposts follow the original closely, so the newest candidates
+        # are kept when a common fingerprint matches too many articles
+        .order_by(NewsArticle.id.desc())
+        .limit(NEAR_DUPLICATE_CANDIDATES)
+    )
+    if since is not None:
+        query = query.where(NewsArticle.published_date >= since)
+
+    best, best_distance = None, max_distance + 1
+    for row in db.execute(query):
+        distance = hamming_distance(fingerprint, from_signed(row.simhash))
+        if distance < best_distance or (
+            best is not None and distance == best_distance and row.id < best.id
+        ):
+            best, best_distance = row, distance
+    return best
+
+
+def assign_article_clusters(
+    db: Session,
+    urls: List[str],
+    max_distance: int,
+    window: Optional[timedelta] = None,
+) -> int:
+    """
+    Put newly stored articles into the cluster of their nearest duplicate.
+
+    Articles with a fingerprint and no cluster yet join the cluster of the
+    closest earlier article within ``max_distance`` bits, or start their
+    own cluster under their own id. Their LSH bands are stored so later
+    articles find them.
+
+    Args:
+        db: Database session
+        urls: URLs of the stored articles
+        max_distance: Largest number of differing bits of a near duplicate
+        window: Only link to articles published at most this long before
+            the new one, all articles when None
+
+    Returns:
+        Number of articles that joined an existing cluster
+    """
+    rows = db.execute(
+        select(NewsArticle.id, NewsArticle.simhash, NewsArticle.published_date)
+        .where(
+            NewsArticle.url.in_(urls),
+            NewsArticle.simhash.is_not(None),
+            NewsArticle.cluster_id.is_(None),
+        )
+        .order_by(NewsArticle.id)
+    ).all()
+
+    linked = 0
+    for row in rows:
+        fingerprint = from_signed(row.simhash)
+        since = None
+        if window is not None and row.published_date is not None:
+            since = row.published_date - window
+        match = find_near_duplicate(db, fingerprint, max_distance, since)
+        cluster_id = row.id
+        if match is not None:
+            cluster_id = match.cluster_id or match.id
+            linked += 1
+        db.execute(
+            update(NewsArticle)
+            .where(NewsArticle.id == row.id)
+            .values(cluster_id=cluster_id)
+        )
+        # Bands of a deleted article may remain where foreign keys are not
+        # enforced, and SQLite can hand its id out again
+        db.execute(
+            delete(ArticleSimhashBand).where(ArticleSimhashBand.article_id == row.id)
+        )
+        db.execute(
+            ArticleSimhashBand.__table__.insert(),
+            [
+                {"band": band, "bucket": bucket, "article_id": row.id}
+                for band, bucket in enumerate(band_buckets(fingerprint))
+            ],
+        )
+    return linked
+
+
 # User-related operations
 
 
@@ -164,11 +985,19 @@ def get_user_by_email(db: Session, email: str) -> Optional[User]:
     return db.query(User).filter(User.email == email).first()
 
 
-def create_user(db: Session, user: UserCreate) -> User:
+def create_user(
+    db: Session, user: UserCreate, hashed_password: Optional[str] = None
+) -> User:
     """
     Create a new user.
+
+    Args:
+        db: Database session
+        user: Registration data
+        hashed_password: Precomputed hash of user.password; hashed here if omitted
     """
-    hashed_password = get_password_hash(user.password)
+    if hashed_password is None:
+        hashed_password = get_password_hash(user.password)
     db_user = User(
         username=user.username, email=user.email, hashed_password=hashed_password
     )
@@ -178,6 +1007,47 @@ def create_user(db: Session, user: UserCreate) -> User:
     return db_user
 
 
+def set_user_active(db: Session, username: str, is_active: bool) -> Optional[User]:
+    """
+    Activate or deactivate a user.
+
+    Cached principals of the user are dropped after the commit, so a
+    deactivated account is rejected on its next request.
+    """
+    user = get_user_by_username(db, username)
+    if not user:
+        return None
+    user.is_active = is_active
+    db.commit()
+    db.refresh(user)
+    return user
+
+
+# Principal cache invalidation. Any change of User.is_active flushed by an
+# ORM session, sync or async, drops the user's cached principals once the
+# transaction commits. Bulk UPDATE statements bypass these hooks; their
+# changes apply within AUTH_CACHE_TTL_SECONDS
+CHANGED_PRINCIPALS_KEY = "changed_principals"
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changed_principals(session: Session, flush_context) -> None:
+    for obj in session.dirty:
+        if isinstance(obj, User) and inspect(obj).attrs.is_active.history.has_changes():
+            session.info.setdefault(CHANGED_PRINCIPALS_KEY, set()).add(obj.username)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_principals(session: Session) -> None:
+    for username in session.info.pop(CHANGED_PRINCIPALS_KEY, ()):
+        principal_cache.invalidate_user(username)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_changed_principals(session: Session) -> None:
+    session.info.pop(CHANGED_PRINCIPALS_KEY, None)
+
+
 def authenticate_user(db: Session, username: str, password: str) -> Optional[User]:
     """
     Authenticate a user by username and password.
@@ -213,6 +1083,22 @@ def get_user_bookmarks(db: Session, user_id: str) -> list[Bookmark]:
     return db.query(Bookmark).filter_by(user_id=user_id).all()
 
 
+def select_bookmarked_articles(user_id: str) -> Select:
+    """Build the statement selecting the articles a user bookmarked."""
+    return (
+        select(NewsArticle)
+        .join(Bookmark, Bookmark.article_id == NewsArticle.id)
+        .where(Bookmark.user_id == user_id)
+    )
+
+
+def get_bookmarked_articles(db: Session, user_id: str) -> List[NewsArticle]:
+    """
+    Get the articles a user bookmarked in a single query.
+    """
+    return list(db.scalars(select_bookmarked_articles(user_id)).all())
+
+
 def is_bookmarked(db: Session, user_id: str, article_id: int) -> bool:
     return (
         db.query(Bookmark).filter_by(user_id=user_id, article_id=article_id).first()
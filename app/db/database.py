@@ -1,16 +1,177 @@
-from sqlalchemy import create_engine
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./news_aggregator.db"
+from app.core.config import settings
+
+SQLALCHEMY_DATABASE_URL = settings.DATABASE_URL
+
+# asyncio drivers used in place of the sync ones for the async engine
+ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+
+
+def _is_sqlite_memory(url: str) -> bool:
+    return url in ("sqlite://", "sqlite:///:memory:") or "mode=memory" in url
+
+
+def _apply_sqlite_pragmas(dbapi_connection, read_only: bool):
+    """Tune a new SQLite connection; runs once per pooled connection."""
+    cursor = dbapi_connection.cursor()
+    try:
+        # WAL lets readers proceed while a writer commits
+        cursor.execute("PRAGMA journal_mode=WAL")
+        # Durable across application crashes; only an OS crash can lose
+        # the last transactions, which ingestion simply refetches
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        # Negative cache_size is in KiB rather than pages
+        cursor.execute(f"PRAGMA cache_size=-{settings.SQLITE_CACHE_SIZE_KB}")
+        cursor.execute(f"PRAGMA mmap_size={settings.SQLITE_MMAP_SIZE}")
+        cursor.execute(f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}")
+        if read_only:
+            cursor.execute("PRAGMA query_only=ON")
+    finally:
+        cursor.close()
+
+
+def create_db_engine(url: str, read_only: bool = False) -> Engine:
+    """
+    Create an engine for the application database.
+
+    SQLite connections are tuned through a connect hook (WAL, synchronous,
+    cache and mmap sizes, busy timeout). Read-only engines refuse writes and
+    get a pool sized for concurrent GET requests, while the writer pool
+    holds SQLITE_WRITE_POOL_SIZE connections so writes queue in the pool
+    instead of contending for the database lock.
+
+    Other databases (PostgreSQL) get a QueuePool sized by the DB_POOL_*
+    settings, with pre-ping and recycling so connections dropped by the
+    server or a proxy are replaced transparently.
+
+    Args:
+        url: SQLAlchemy database URL
+        read_only: Whether connections should reject writes
+
+    Returns:
+        Configured engine
+    """
+    if not url.startswith("sqlite"):
+        kwargs = {}
+        if read_only and url.startswith("postgresql"):
+            # Enforced by the server for every transaction on the connection
+            kwargs["connect_args"] = {
+                "options": "-c default_transaction_read_only=on"
+            }
+        return create_engine(
+            url,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+            pool_pre_ping=settings.DB_POOL_PRE_PING,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            **kwargs,
+        )
+
+    kwargs = {"connect_args": {"check_same_thread": False}}
+    if not _is_sqlite_memory(url):
+        kwargs["pool_size"] = (
+            settings.SQLITE_READ_POOL_SIZE
+            if read_only
+            else settings.SQLITE_WRITE_POOL_SIZE
+        )
+        kwargs["max_overflow"] = 0
+    engine = create_engine(url, **kwargs)
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        _apply_sqlite_pragmas(dbapi_connection, read_only)
+
+    return engine
 
-# Connect with SQLite
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
+
+def to_async_url(url: str) -> str:
+    """
+    Swap the driver of a database URL for its asyncio counterpart.
+
+    Raises:
+        ValueError: If no async driver is known for the database
+    """
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if driver is None:
+        raise ValueError(f"No async driver configured for {parsed.drivername}")
+    return parsed.set(drivername=driver).render_as_string(hide_password=False)
+
+
+def create_async_db_engine(url: str, read_only: bool = False) -> AsyncEngine:
+    """
+    Create an asyncio engine with the same tuning as ``create_db_engine``.
+
+    Args:
+        url: SQLAlchemy database URL, with either a sync or an async driver
+        read_only: Whether connections should reject writes
+
+    Returns:
+        Configured async engine
+    """
+    async_url = to_async_url(url)
+    if not async_url.startswith("sqlite"):
+        kwargs = {}
+        if read_only and async_url.startswith("postgresql"):
+            kwargs["connect_args"] = {
+                "server_settings": {"default_transaction_read_only": "on"}
+            }
+        return create_async_engine(
+            async_url,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+            pool_pre_ping=settings.DB_POOL_PRE_PING,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            **kwargs,
+        )
+
+    kwargs = {}
+    if not _is_sqlite_memory(url):
+        kwargs["pool_size"] = (
+            settings.SQLITE_READ_POOL_SIZE
+            if read_only
+            else settings.SQLITE_WRITE_POOL_SIZE
+        )
+        kwargs["max_overflow"] = 0
+    engine = create_async_engine(async_url, **kwargs)
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        _apply_sqlite_pragmas(dbapi_connection, read_only)
+
+    return engine
+
+
+# Writer pool for anything that modifies data
+engine = create_db_engine(SQLALCHEMY_DATABASE_URL)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async read-only engine for the hot GET paths, so those requests wait on
+# the database without holding a threadpool worker
+async_engine = create_async_db_engine(
+    settings.DATABASE_READ_URL or SQLALCHEMY_DATABASE_URL,
+    read_only=not _is_sqlite_memory(SQLALCHEMY_DATABASE_URL),
+)
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
 Base = declarative_base()
 
 # Dependency to get DB session
@@ -22,3 +183,23 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    """Dependency yielding a read-only AsyncSession."""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+@asynccontextmanager
+async def streaming_session(db: AsyncSession) -> AsyncIterator[AsyncSession]:
+    """
+    Open a session for a streamed response body on the engine of ``db``.
+
+    Dependencies with yield close the request's session before a
+    StreamingResponse sends its body, so the body needs a session of its own.
+    """
+    async with AsyncSession(
+        db.bind, autoflush=False, expire_on_commit=False
+    ) as stream_db:
+        yield stream_db
@@ -1,16 +1,23 @@
 import uuid
 
 from sqlalchemy import (
+    DDL,
     UUID,
+    BigInteger,
     Boolean,
     Column,
     DateTime,
     Float,
     ForeignKey,
+    Index,
     Integer,
+    SmallInteger,
     String,
     Text,
+    UniqueConstraint,
+    event,
 )
+from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
 from app.db.database import Base
@@ -18,12 +25,25 @@ from app.db.database import Base
 
 class NewsArticle(Base):
     __tablename__ = "news_articles"
+    # Listings filter on one column and sort newest first, so each filter
+    # gets a composite index that already returns rows in published order
+    __table_args__ = (
+        Index("ix_news_articles_published_date", "published_date"),
+        Index("ix_news_articles_source_published", "source", "published_date"),
+        Index("ix_news_articles_category_published", "category", "published_date"),
+        Index("ix_news_articles_channel_published", "channel_id", "published_date"),
+        # Semantic index syncs look up recently updated articles
+        Index("ix_news_articles_updated_at", "updated_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(255), index=True)
     content = Column(Text)
     url = Column(String(255), unique=True, index=True)
+    # Feed entry GUID; it stays stable when a channel rewrites its links
+    guid = Column(String(255), index=True, nullable=True)
     source = Column(String(100))
+    channel_id = Column(Integer, ForeignKey("channels.id"), index=True, nullable=True)
     published_date = Column(DateTime)
     created_at = Column(DateTime, default=func.now())
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
@@ -34,16 +54,149 @@ class NewsArticle(Base):
     keywords = Column(String(255), nullable=True)
     ai_summary = Column(Text, nullable=True)
 
+    # Near-duplicate detection, see app.core.dedup. The fingerprint is the
+    # signed form of the content's SimHash; cluster_id is the id of the
+    # first stored article of the story
+    simhash = Column(BigInteger, nullable=True)
+    cluster_id = Column(Integer, index=True, nullable=True)
 
-class UserChannels(Base):
-    __tablename__ = "user_channels"
+
+class ArticleSimhashBand(Base):
+    """One LSH bucket of an article's fingerprint, for candidate lookups."""
+
+    __tablename__ = "article_simhash_bands"
+
+    band = Column(SmallInteger, primary_key=True)
+    bucket = Column(Integer, primary_key=True)
+    article_id = Column(
+        Integer,
+        ForeignKey("news_articles.id", ondelete="CASCADE"),
+        primary_key=True,
+        index=True,
+    )
+
+
+# Full-text search over title, content and ai_summary. SQLite keeps an
+# external-content FTS5 table in sync through triggers; PostgreSQL gets a
+# generated tsvector column with a GIN index. Both are created with the
+# table, and by the add_article_search migration for existing databases.
+# Channels mix languages, so neither backend stems words
+ARTICLE_FTS_TABLE = "news_articles_fts"
+SEARCH_TEXT_CONFIG = "simple"
+
+SQLITE_SEARCH_DDL = (
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {ARTICLE_FTS_TABLE} USING fts5(
+        title, content, ai_summary,
+        content='news_articles', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS news_articles_fts_insert
+    AFTER INSERT ON news_articles BEGIN
+        INSERT INTO {ARTICLE_FTS_TABLE} (rowid, title, content, ai_summary)
+        VALUES (new.id, new.title, new.content, new.ai_summary);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS news_articles_fts_delete
+    AFTER DELETE ON news_articles BEGIN
+        INSERT INTO {ARTICLE_FTS_TABLE}
+            ({ARTICLE_FTS_TABLE}, rowid, title, content, ai_summary)
+        VALUES ('delete', old.id, old.title, old.content, old.ai_summary);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS news_articles_fts_update
+    AFTER UPDATE OF title, content, ai_summary ON news_articles BEGIN
+        INSERT INTO {ARTICLE_FTS_TABLE}
+            ({ARTICLE_FTS_TABLE}, rowid, title, content, ai_summary)
+        VALUES ('delete', old.id, old.title, old.content, old.ai_summary);
+        INSERT INTO {ARTICLE_FTS_TABLE} (rowid, title, content, ai_summary)
+        VALUES (new.id, new.title, new.content, new.ai_summary);
+    END
+    """,
+)
+
+POSTGRES_SEARCH_DDL = (
+    f"""
+    ALTER TABLE news_articles ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('{SEARCH_TEXT_CONFIG}', coalesce(title, '')), 'A')
+        || setweight(to_tsvector('{SEARCH_TEXT_CONFIG}', coalesce(ai_summary, '')), 'B')
+        || setweight(to_tsvector('{SEARCH_TEXT_CONFIG}', coalesce(content, '')), 'C')
+    ) STORED
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS ix_news_articles_search_vector
+    ON news_articles USING gin (search_vector)
+    """,
+)
+
+for statement in SQLITE_SEARCH_DDL:
+    event.listen(
+        NewsArticle.__table__,
+        "after_create",
+        DDL(statement).execute_if(dialect="sqlite"),
+    )
+for statement in POSTGRES_SEARCH_DDL:
+    event.listen(
+        NewsArticle.__table__,
+        "after_create",
+        DDL(statement).execute_if(dialect="postgresql"),
+    )
+event.listen(
+    NewsArticle.__table__,
+    "before_drop",
+    DDL(f"DROP TABLE IF EXISTS {ARTICLE_FTS_TABLE}").execute_if(dialect="sqlite"),
+)
+
+
+class Channel(Base):
+    __tablename__ = "channels"
+
+    id = Column(Integer, primary_key=True, index=True)
+    # Normalized form, see app.db.crud.normalize_channel_alias
+    alias = Column(String(255), unique=True, index=True, nullable=False)
+    created_at = Column(DateTime, default=func.now())
+
+
+class Subscription(Base):
+    __tablename__ = "subscriptions"
+    __table_args__ = (
+        UniqueConstraint("user_id", "channel_id", name="uq_subscriptions_user_channel"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    user_id = Column(String(255), index=True)
-    channel_alias = Column(String(255), index=True)
+    user_id = Column(String(255), index=True, nullable=False)
+    channel_id = Column(Integer, ForeignKey("channels.id"), index=True, nullable=False)
     created_at = Column(DateTime, default=func.now())
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
 
+    channel = relationship(Channel, lazy="joined")
+
+    @property
+    def channel_alias(self):
+        return self.channel.alias if self.channel else None
+
+
+# Alias for backward compatibility with code written against user_channels
+UserChannels = Subscription
+
+
+class ChannelFetchState(Base):
+    __tablename__ = "channel_fetch_state"
+
+    channel_alias = Column(String(255), primary_key=True)
+    etag = Column(String(255), nullable=True)
+    last_modified = Column(String(64), nullable=True)
+    last_status = Column(Integer, nullable=True)
+    last_entry_guid = Column(String(255), nullable=True)
+    content_hash = Column(String(64), nullable=True)
+    last_fetched_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+
 
 class User(Base):
     __tablename__ = "users"
@@ -6,7 +6,7 @@ from dotenv import load_dotenv
 from fastapi import FastAPI, Request, status
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
 
 # Load environment variables from .env file
 if os.path.exists(".env"):
@@ -16,7 +16,11 @@ if os.path.exists(".env"):
 from app.api.auth import router as auth_router
 from app.api.feed import router as feed_router
 from app.api.routes import router as news_router
+from app.core.cache import principal_cache
+from app.core.compression import CompressionMiddleware
 from app.core.config import Settings
+from app.core.http_cache import response_cache
+from app.core.llm_cache import llm_cache
 from app.db import models
 from app.db.database import engine
 
@@ -30,6 +34,8 @@ app = FastAPI(
     title="AI-Powered News Aggregator",
     description="API for an AI-powered news aggregation service",
     version="0.1.0",
+    # orjson serializes large article lists several times faster
+    default_response_class=ORJSONResponse,
 )
 
 
@@ -56,8 +62,19 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],  # Pagination cursor for browser clients
 )
 
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+        encodings=settings.COMPRESSION_ENCODINGS,
+        gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+        brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+        zstd_level=settings.COMPRESSION_ZSTD_LEVEL,
+    )
+
 # Include routers
 app.include_router(news_router)
 app.include_router(feed_router)
@@ -121,6 +138,22 @@ async def health_check():
     return {"status": "ok", "ai_status": ai_status}
 
 
+@app.get(
+    "/metrics",
+    response_model=dict,
+    status_code=status.HTTP_200_OK,
+    summary="Cache metrics",
+    description="Returns hit and miss counters of the response, auth and LLM caches",
+    tags=["Health"],
+)
+async def metrics():
+    return {
+        "auth_cache": principal_cache.stats(),
+        "response_cache": response_cache.stats(),
+        "llm_cache": llm_cache.stats(),
+    }
+
+
 if __name__ == "__main__":
     import uvicorn
 
@@ -18,6 +18,8 @@ class NewsArticle(ArticleBase):
     category: Optional[str] = None
     keywords: Optional[str] = None
     ai_summary: Optional[str] = None
+    # Id of the story this article is a copy of, shared by its near duplicates
+    cluster_id: Optional[int] = None
     created_at: datetime
     updated_at: datetime
 
@@ -32,6 +34,18 @@ class ArticleCreate(ArticleBase):
     ai_summary: Optional[str] = None
 
 
+class SearchResult(BaseModel):
+    id: int
+    title: str
+    url: str
+    source: Optional[str] = None
+    published_date: Optional[datetime] = None
+    category: Optional[str] = None
+    ai_summary: Optional[str] = None
+    score: float
+    snippet: Optional[str] = None
+
+
 class Bookmark(BaseModel):
     id: int
     user_id: str
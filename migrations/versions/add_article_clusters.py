@@ -0,0 +1,65 @@
+"""Add SimHash fingerprints and near-duplicate clusters to articles
+
+Articles stored before this revision have no fingerprint and are not
+matched; only newly ingested ones are clustered.
+
+Revision ID: add_article_clusters
+Revises: add_article_search
+Create Date: 2025-05-24 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.engine.reflection import Inspector
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_article_clusters'
+down_revision = 'add_article_search'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Columns and table may already exist when create_all() made them
+    conn = op.get_bind()
+    inspector = Inspector.from_engine(conn)
+    columns = [column['name']
+               for column in inspector.get_columns('news_articles')]
+
+    if 'simhash' not in columns:
+        op.add_column('news_articles', sa.Column(
+            'simhash', sa.BigInteger(), nullable=True))
+    if 'cluster_id' not in columns:
+        op.add_column('news_articles', sa.Column(
+            'cluster_id', sa.Integer(), nullable=True))
+        op.create_index('ix_news_articles_cluster_id',
+                        'news_articles', ['cluster_id'])
+
+    if 'article_simhash_bands' not in inspector.get_table_names():
+        op.create_table(
+            'article_simhash_bands',
+            sa.Column('band', sa.SmallInteger(), primary_key=True),
+            sa.Column('bucket', sa.Integer(), primary_key=True),
+            sa.Column('article_id', sa.Integer(),
+                      sa.ForeignKey('news_articles.id', ondelete='CASCADE'),
+                      primary_key=True),
+        )
+        op.create_index('ix_article_simhash_bands_article_id',
+                        'article_simhash_bands', ['article_id'])
+
+
+def downgrade():
+    conn = op.get_bind()
+    inspector = Inspector.from_engine(conn)
+
+    if 'article_simhash_bands' in inspector.get_table_names():
+        op.drop_table('article_simhash_bands')
+
+    columns = [column['name']
+               for column in inspector.get_columns('news_articles')]
+    if 'cluster_id' in columns:
+        op.drop_index('ix_news_articles_cluster_id', table_name='news_articles')
+        op.drop_column('news_articles', 'cluster_id')
+    if 'simhash' in columns:
+        op.drop_column('news_articles', 'simhash')
@@ -0,0 +1,44 @@
+"""Store the feed entry GUID of articles
+
+Ingestion recognises known entries by link or GUID; articles stored
+before this revision have no GUID and are only matched by link.
+
+Revision ID: add_article_guid
+Revises: add_article_clusters
+Create Date: 2025-05-26 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.engine.reflection import Inspector
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_article_guid'
+down_revision = 'add_article_clusters'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # The column may already exist when create_all() made it
+    conn = op.get_bind()
+    inspector = Inspector.from_engine(conn)
+    columns = [column['name']
+               for column in inspector.get_columns('news_articles')]
+
+    if 'guid' not in columns:
+        op.add_column('news_articles', sa.Column(
+            'guid', sa.String(255), nullable=True))
+        op.create_index('ix_news_articles_guid', 'news_articles', ['guid'])
+
+
+def downgrade():
+    conn = op.get_bind()
+    inspector = Inspector.from_engine(conn)
+    columns = [column['name']
+               for column in inspector.get_columns('news_articles')]
+
+    if 'guid' in columns:
+        op.drop_index('ix_news_articles_guid', table_name='news_articles')
+        op.drop_column('news_articles', 'guid')
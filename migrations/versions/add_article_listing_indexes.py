@@ -0,0 +1,49 @@
+"""Add composite indexes for article listings
+
+get_articles and the feed filter on source, category or channel_id and
+sort by published_date DESC. These indexes let the database walk rows in
+published order for each filter value instead of scanning and sorting.
+
+Revision ID: add_article_listing_indexes
+Revises: add_channels_and_subscriptions
+Create Date: 2025-05-16 10:00:00.000000
+
+"""
+from alembic import op
+from sqlalchemy.engine.reflection import Inspector
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_article_listing_indexes'
+down_revision = 'add_channels_and_subscriptions'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = {
+    'ix_news_articles_published_date': ['published_date'],
+    'ix_news_articles_source_published': ['source', 'published_date'],
+    'ix_news_articles_category_published': ['category', 'published_date'],
+    'ix_news_articles_channel_published': ['channel_id', 'published_date'],
+}
+
+
+def upgrade():
+    # The indexes may already exist when the table was created by create_all()
+    conn = op.get_bind()
+    inspector = Inspector.from_engine(conn)
+    existing = {index['name'] for index in inspector.get_indexes('news_articles')}
+
+    for name, columns in INDEXES.items():
+        if name not in existing:
+            op.create_index(name, 'news_articles', columns)
+
+
+def downgrade():
+    conn = op.get_bind()
+    inspector = Inspector.from_engine(conn)
+    existing = {index['name'] for index in inspector.get_indexes('news_articles')}
+
+    for name in INDEXES:
+        if name in existing:
+            op.drop_index(name, table_name='news_articles')
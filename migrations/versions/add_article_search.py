@@ -0,0 +1,116 @@
+"""Add full-text search over articles
+
+SQLite gets an external-content FTS5 table over title, content and
+ai_summary, kept in sync by triggers and filled from the existing rows.
+PostgreSQL gets a generated, weighted tsvector column with a GIN index.
+
+Revision ID: add_article_search
+Revises: add_article_listing_indexes
+Create Date: 2025-05-20 10:00:00.000000
+
+"""
+from alembic import op
+from sqlalchemy.engine.reflection import Inspector
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_article_search'
+down_revision = 'add_article_listing_indexes'
+branch_labels = None
+depends_on = None
+
+
+SQLITE_UPGRADE = [
+    """
+    CREATE VIRTUAL TABLE news_articles_fts USING fts5(
+        title, content, ai_summary,
+        content='news_articles', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS news_articles_fts_insert
+    AFTER INSERT ON news_articles BEGIN
+        INSERT INTO news_articles_fts (rowid, title, content, ai_summary)
+        VALUES (new.id, new.title, new.content, new.ai_summary);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS news_articles_fts_delete
+    AFTER DELETE ON news_articles BEGIN
+        INSERT INTO news_articles_fts
+            (news_articles_fts, rowid, title, content, ai_summary)
+        VALUES ('delete', old.id, old.title, old.content, old.ai_summary);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS news_articles_fts_update
+    AFTER UPDATE OF title, content, ai_summary ON news_articles BEGIN
+        INSERT INTO news_articles_fts
+            (news_articles_fts, rowid, title, content, ai_summary)
+        VALUES ('delete', old.id, old.title, old.content, old.ai_summary);
+        INSERT INTO news_articles_fts (rowid, title, content, ai_summary)
+        VALUES (new.id, new.title, new.content, new.ai_summary);
+    END
+    """,
+    # Index the articles stored before the table existed
+    "INSERT INTO news_articles_fts (news_articles_fts) VALUES ('rebuild')",
+]
+
+SQLITE_DOWNGRADE = [
+    "DROP TRIGGER IF EXISTS news_articles_fts_insert",
+    "DROP TRIGGER IF EXISTS news_articles_fts_delete",
+    "DROP TRIGGER IF EXISTS news_articles_fts_update",
+    "DROP TABLE IF EXISTS news_articles_fts",
+]
+
+POSTGRES_UPGRADE = [
+    # Generated columns are filled for the existing rows when added
+    """
+    ALTER TABLE news_articles ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(title, '')), 'A')
+        || setweight(to_tsvector('simple', coalesce(ai_summary, '')), 'B')
+        || setweight(to_tsvector('simple', coalesce(content, '')), 'C')
+    ) STORED
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS ix_news_articles_search_vector
+    ON news_articles USING gin (search_vector)
+    """,
+]
+
+POSTGRES_DOWNGRADE = [
+    "DROP INDEX IF EXISTS ix_news_articles_search_vector",
+    "ALTER TABLE news_articles DROP COLUMN IF EXISTS search_vector",
+]
+
+
+def upgrade():
+    conn = op.get_bind()
+    if conn.dialect.name == 'sqlite':
+        # The table and triggers may already exist when create_all() made them
+        inspector = Inspector.from_engine(conn)
+        if 'news_articles_fts' in inspector.get_table_names():
+            return
+        statements = SQLITE_UPGRADE
+    elif conn.dialect.name == 'postgresql':
+        statements = POSTGRES_UPGRADE
+    else:
+        return
+
+    for statement in statements:
+        op.execute(statement)
+
+
+def downgrade():
+    conn = op.get_bind()
+    if conn.dialect.name == 'sqlite':
+        statements = SQLITE_DOWNGRADE
+    elif conn.dialect.name == 'postgresql':
+        statements = POSTGRES_DOWNGRADE
+    else:
+        return
+
+    for statement in statements:
+        op.execute(statement)
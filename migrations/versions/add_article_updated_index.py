@@ -0,0 +1,40 @@
+"""Index articles by update time
+
+Semantic index syncs look up the articles updated since the previous sync.
+
+Revision ID: add_article_updated_index
+Revises: add_article_guid
+Create Date: 2025-05-27 10:00:00.000000
+
+"""
+from alembic import op
+from sqlalchemy.engine.reflection import Inspector
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_article_updated_index'
+down_revision = 'add_article_guid'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # The index may already exist when create_all() made it
+    conn = op.get_bind()
+    inspector = Inspector.from_engine(conn)
+    indexes = [index['name']
+               for index in inspector.get_indexes('news_articles')]
+
+    if 'ix_news_articles_updated_at' not in indexes:
+        op.create_index('ix_news_articles_updated_at',
+                        'news_articles', ['updated_at'])
+
+
+def downgrade():
+    conn = op.get_bind()
+    inspector = Inspector.from_engine(conn)
+    indexes = [index['name']
+               for index in inspector.get_indexes('news_articles')]
+
+    if 'ix_news_articles_updated_at' in indexes:
+        op.drop_index('ix_news_articles_updated_at', table_name='news_articles')
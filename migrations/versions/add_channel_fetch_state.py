@@ -0,0 +1,44 @@
+"""Add channel_fetch_state table for conditional feed fetching
+
+Revision ID: add_channel_fetch_state
+Revises: add_category_field
+Create Date: 2025-05-12 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.engine.reflection import Inspector
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_channel_fetch_state'
+down_revision = 'add_category_field'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # The table may already exist when it was created by create_all()
+    conn = op.get_bind()
+    inspector = Inspector.from_engine(conn)
+
+    if 'channel_fetch_state' not in inspector.get_table_names():
+        op.create_table(
+            'channel_fetch_state',
+            sa.Column('channel_alias', sa.String(255), primary_key=True),
+            sa.Column('etag', sa.String(255), nullable=True),
+            sa.Column('last_modified', sa.String(64), nullable=True),
+            sa.Column('last_status', sa.Integer(), nullable=True),
+            sa.Column('last_entry_guid', sa.String(255), nullable=True),
+            sa.Column('content_hash', sa.String(64), nullable=True),
+            sa.Column('last_fetched_at', sa.DateTime(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+        )
+
+
+def downgrade():
+    conn = op.get_bind()
+    inspector = Inspector.from_engine(conn)
+
+    if 'channel_fetch_state' in inspector.get_table_names():
+        op.drop_table('channel_fetch_state')
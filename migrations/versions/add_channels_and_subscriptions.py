@@ -0,0 +1,192 @@
+"""Normalize channels into channels/subscriptions tables
+
+Replaces the free-text user_channels table with a channels table keyed by
+an integer id and a normalized alias, plus a subscriptions table with one
+row per (user, channel). news_articles gains an indexed channel_id.
+Existing subscriptions and article sources are backfilled.
+
+Revision ID: add_channels_and_subscriptions
+Revises: add_channel_fetch_state
+Create Date: 2025-05-14 10:00:00.000000
+
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.engine.reflection import Inspector
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_channels_and_subscriptions'
+down_revision = 'add_channel_fetch_state'
+branch_labels = None
+depends_on = None
+
+
+def _normalize(alias):
+    # Mirrors app.db.crud.normalize_channel_alias at the time of writing
+    return "@" + alias.strip().lstrip("@").lower()
+
+
+channels_table = sa.table(
+    'channels',
+    sa.column('id', sa.Integer),
+    sa.column('alias', sa.String),
+    sa.column('created_at', sa.DateTime),
+)
+subscriptions_table = sa.table(
+    'subscriptions',
+    sa.column('id', sa.Uuid),
+    sa.column('user_id', sa.String),
+    sa.column('channel_id', sa.Integer),
+    sa.column('created_at', sa.DateTime),
+    sa.column('updated_at', sa.DateTime),
+)
+
+
+def upgrade():
+    conn = op.get_bind()
+    inspector = Inspector.from_engine(conn)
+    tables = inspector.get_table_names()
+
+    if 'channels' not in tables:
+        op.create_table(
+            'channels',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('alias', sa.String(255), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+        )
+        op.create_index('ix_channels_id', 'channels', ['id'])
+        op.create_index('ix_channels_alias', 'channels', ['alias'], unique=True)
+
+    if 'subscriptions' not in tables:
+        op.create_table(
+            'subscriptions',
+            sa.Column('id', sa.Uuid(), primary_key=True),
+            sa.Column('user_id', sa.String(255), nullable=False),
+            sa.Column(
+                'channel_id',
+                sa.Integer(),
+                sa.ForeignKey('channels.id'),
+                nullable=False,
+            ),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.UniqueConstraint(
+                'user_id', 'channel_id', name='uq_subscriptions_user_channel'
+            ),
+        )
+        op.create_index('ix_subscriptions_user_id', 'subscriptions', ['user_id'])
+        op.create_index(
+            'ix_subscriptions_channel_id', 'subscriptions', ['channel_id']
+        )
+
+    columns = [column['name']
+               for column in inspector.get_columns('news_articles')]
+    if 'channel_id' not in columns:
+        with op.batch_alter_table('news_articles') as batch_op:
+            batch_op.add_column(
+                sa.Column('channel_id', sa.Integer(), nullable=True))
+            batch_op.create_foreign_key(
+                'fk_news_articles_channel_id', 'channels',
+                ['channel_id'], ['id'])
+            batch_op.create_index(
+                'ix_news_articles_channel_id', ['channel_id'])
+
+    # Backfill channels from both subscriptions and article sources
+    old_subscriptions = []
+    if 'user_channels' in tables:
+        old_subscriptions = conn.execute(sa.text(
+            "SELECT id, user_id, channel_alias, created_at, updated_at "
+            "FROM user_channels WHERE channel_alias IS NOT NULL"
+        )).fetchall()
+    sources = [row[0] for row in conn.execute(sa.text(
+        "SELECT DISTINCT source FROM news_articles WHERE source IS NOT NULL"
+    ))]
+
+    wanted = {_normalize(row.channel_alias) for row in old_subscriptions}
+    wanted.update(_normalize(source) for source in sources)
+    channel_ids = dict(conn.execute(
+        sa.select(channels_table.c.alias, channels_table.c.id)).fetchall())
+    missing = sorted(alias for alias in wanted if alias not in channel_ids)
+    if missing:
+        now = datetime.utcnow()
+        conn.execute(channels_table.insert(), [
+            {'alias': alias, 'created_at': now} for alias in missing
+        ])
+        channel_ids = dict(conn.execute(
+            sa.select(channels_table.c.alias, channels_table.c.id)).fetchall())
+
+    # One subscription per (user, channel); keep the oldest row's id
+    existing_pairs = set(conn.execute(sa.select(
+        subscriptions_table.c.user_id, subscriptions_table.c.channel_id)))
+    new_rows = []
+    for row in sorted(old_subscriptions,
+                      key=lambda r: (r.created_at is None, r.created_at)):
+        pair = (row.user_id, channel_ids[_normalize(row.channel_alias)])
+        if pair in existing_pairs:
+            continue
+        existing_pairs.add(pair)
+        new_rows.append({
+            'id': row.id, 'user_id': row.user_id, 'channel_id': pair[1],
+            'created_at': row.created_at, 'updated_at': row.updated_at,
+        })
+    if new_rows:
+        # Copy ids verbatim so subscription ids returned earlier stay valid
+        conn.execute(sa.text(
+            "INSERT INTO subscriptions "
+            "(id, user_id, channel_id, created_at, updated_at) "
+            "VALUES (:id, :user_id, :channel_id, :created_at, :updated_at)"
+        ), new_rows)
+
+    for source in sources:
+        conn.execute(
+            sa.text("UPDATE news_articles SET channel_id = :channel_id "
+                    "WHERE source = :source AND channel_id IS NULL"),
+            {'channel_id': channel_ids[_normalize(source)], 'source': source},
+        )
+
+    if 'user_channels' in tables:
+        op.drop_table('user_channels')
+
+
+def downgrade():
+    conn = op.get_bind()
+    inspector = Inspector.from_engine(conn)
+    tables = inspector.get_table_names()
+
+    if 'user_channels' not in tables:
+        op.create_table(
+            'user_channels',
+            sa.Column('id', sa.Uuid(), primary_key=True),
+            sa.Column('user_id', sa.String(255), nullable=True),
+            sa.Column('channel_alias', sa.String(255), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+        )
+        op.create_index('ix_user_channels_user_id', 'user_channels', ['user_id'])
+        op.create_index(
+            'ix_user_channels_channel_alias', 'user_channels', ['channel_alias'])
+
+    if 'subscriptions' in tables and 'channels' in tables:
+        conn.execute(sa.text(
+            "INSERT INTO user_channels "
+            "(id, user_id, channel_alias, created_at, updated_at) "
+            "SELECT s.id, s.user_id, c.alias, s.created_at, s.updated_at "
+            "FROM subscriptions s JOIN channels c ON c.id = s.channel_id"
+        ))
+
+    columns = [column['name']
+               for column in inspector.get_columns('news_articles')]
+    if 'channel_id' in columns:
+        with op.batch_alter_table('news_articles') as batch_op:
+            batch_op.drop_index('ix_news_articles_channel_id')
+            batch_op.drop_constraint(
+                'fk_news_articles_channel_id', type_='foreignkey')
+            batch_op.drop_column('channel_id')
+
+    if 'subscriptions' in tables:
+        op.drop_table('subscriptions')
+    if 'channels' in tables:
+        op.drop_table('channels')
@@ -0,0 +1,72 @@
+"""Store SimHash fingerprints in four 16-bit LSH bands
+
+Lookups probe every bucket within one bit of a band instead of matching
+eight 8-bit bands exactly, so the band rows of fingerprinted articles are
+recomputed from their stored SimHash.
+
+Revision ID: widen_simhash_bands
+Revises: add_article_updated_index
+Create Date: 2025-05-28 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'widen_simhash_bands'
+down_revision = 'add_article_updated_index'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 5000
+
+articles = sa.table(
+    'news_articles',
+    sa.column('id', sa.Integer),
+    sa.column('simhash', sa.BigInteger),
+)
+bands = sa.table(
+    'article_simhash_bands',
+    sa.column('band', sa.SmallInteger),
+    sa.column('bucket', sa.Integer),
+    sa.column('article_id', sa.Integer),
+)
+
+
+def _rebuild_bands(band_count):
+    # Same layout as app.core.dedup.band_buckets, lowest bits first
+    band_bits = 64 // band_count
+    band_mask = (1 << band_bits) - 1
+    conn = op.get_bind()
+    conn.execute(bands.delete())
+    after = None
+    while True:
+        query = (
+            sa.select(articles.c.id, articles.c.simhash)
+            .where(articles.c.simhash.is_not(None))
+            .order_by(articles.c.id)
+            .limit(BATCH_SIZE)
+        )
+        if after is not None:
+            query = query.where(articles.c.id > after)
+        rows = conn.execute(query).all()
+        if not rows:
+            break
+        conn.execute(bands.insert(), [
+            {'band': band,
+             'bucket': (fingerprint >> (band * band_bits)) & band_mask,
+             'article_id': article_id}
+            for article_id, simhash in rows
+            for fingerprint in [simhash & (2 ** 64 - 1)]
+            for band in range(band_count)
+        ])
+        after = rows[-1][0]
+
+
+def upgrade():
+    _rebuild_bands(4)
+
+
+def downgrade():
+    _rebuild_bands(8)
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Compare sync and async database routes under many concurrent connections.
+
+Serves two copies of the article listing from one uvicorn process: a
+``def`` route with a sync Session, which runs in the threadpool, and an
+``async def`` route with an AsyncSession. Both use the same CRUD
+statement, so the difference is only how requests wait on the database.
+
+Usage:
+    python performance/benchmark_async_db.py --connections 500 --requests 5000
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import socket
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import httpx  # noqa: E402
+import uvicorn  # noqa: E402
+from fastapi import Depends, FastAPI  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker  # noqa: E402
+from sqlalchemy.orm import Session, sessionmaker  # noqa: E402
+
+from app.db import async_crud, crud  # noqa: E402
+from app.db.database import (  # noqa: E402
+    Base,
+    create_async_db_engine,
+    create_db_engine,
+)
+
+
+def build_app(url):
+    engine = create_db_engine(url)
+    Base.metadata.create_all(bind=engine)
+    with sessionmaker(bind=engine)() as db:
+        start = datetime(2025, 1, 1)
+        crud.bulk_upsert_articles(
+            db,
+            [
+                {
+                    "title": f"Article {i}",
+                    "content": "Synthetic content " * 20,
+                    "url": f"https://t.me/bench/{i}",
+                    "source": f"@bench_{i % 10}",
+                    "published_date": start + timedelta(minutes=i),
+                }
+                for i in range(2000)
+            ],
+        )
+
+    read_engine = create_db_engine(url, read_only=True)
+    ReadSession = sessionmaker(bind=read_engine)
+    AsyncReadSession = async_sessionmaker(
+        create_async_db_engine(url, read_only=True), expire_on_commit=False
+    )
+
+    def get_db():
+        with ReadSession() as db:
+            yield db
+
+    async def get_async_db():
+        async with AsyncReadSession() as db:
+            yield db
+
+    app = FastAPI()
+
+    @app.get("/sync")
+    def sync_articles(source: str = "@bench_1", db: Session = Depends(get_db)):
+        return [a.id for a in crud.get_articles(db, limit=20, source=source)]
+
+    @app.get("/async")
+    async def async_articles(
+        source: str = "@bench_1", db: AsyncSession = Depends(get_async_db)
+    ):
+        articles = await async_crud.get_articles(db, limit=20, source=source)
+        return [a.id for a in articles]
+
+    return app
+
+
+def serve(url, port):
+    uvicorn.run(build_app(url), host="127.0.0.1", port=port, log_level="warning")
+
+
+def start_server(url):
+    """Run the app in a separate process so the load generator has its own GIL."""
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    process = multiprocessing.Process(target=serve, args=(url, port), daemon=True)
+    process.start()
+    while True:
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/docs")
+            return process, port
+        except httpx.TransportError:
+            time.sleep(0.1)
+
+
+async def hammer(port, path, connections, total):
+    limits = httpx.Limits(max_connections=connections)
+    latencies = []
+    errors = 0
+    queue = asyncio.Queue()
+    for i in range(total):
+        queue.put_nowait(f"@bench_{i % 10}")
+
+    async with httpx.AsyncClient(
+        base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=60
+    ) as client:
+
+        async def worker():
+            nonlocal errors
+            while not queue.empty():
+                source = queue.get_nowait()
+                start = time.perf_counter()
+                try:
+                    response = await client.get(path, params={"source": source})
+                    response.raise_for_status()
+                except httpx.HTTPError:
+                    errors += 1
+                    continue
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(connections)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "rps": len(latencies) / elapsed,
+        "p50": statistics.median(latencies),
+        "p95": latencies[int(len(latencies) * 0.95)],
+        "errors": errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--connections", type=int, default=500)
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        server, port = start_server(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+
+        print(f"{args.connections} concurrent connections, {args.requests} requests")
+        print(f"{'route':<7} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'errors':>7}")
+        for path in ("/sync", "/async"):
+            # Warm up pools and caches
+            asyncio.run(hammer(port, path, 20, 200))
+            result = asyncio.run(hammer(port, path, args.connections, args.requests))
+            print(
+                f"{path:<7} {result['rps']:>8.0f} {result['p50'] * 1000:>8.1f} "
+                f"{result['p95'] * 1000:>8.1f} {result['errors']:>7}"
+            )
+
+        server.terminate()
+        server.join()
+
+
+if __name__ == "__main__":
+    main()
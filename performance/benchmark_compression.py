@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Report bytes on the wire and CPU cost of each response compression setting.
+
+Builds a /feed-like JSON body of synthetic Telegram posts and runs it
+through CompressionMiddleware once per encoding and level, the way the API
+serves it, so slicing and thread hand-offs are part of the measured cost.
+
+Usage:
+    python performance/benchmark_compression.py --articles 5000
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import orjson  # noqa: E402
+from starlette.responses import Response  # noqa: E402
+
+from app.core.compression import (  # noqa: E402
+    CompressionMiddleware,
+    available_encodings,
+)
+
+WORDS = (
+    "market government election technology startup energy climate research "
+    "report minister company investment security update launch network "
+    "police court health university price growth data city war peace sport "
+    "team league season player record announced yesterday today according"
+).split()
+
+LEVELS = {
+    "zstd": {"zstd_level": [1, 3, 9, 15]},
+    "br": {"brotli_quality": [1, 4, 6, 9]},
+    "gzip": {"gzip_level": [1, 6, 9]},
+}
+
+
+def build_body(articles, channels, seed=42):
+    rng = random.Random(seed)
+
+    def text(n):
+        return " ".join(rng.choice(WORDS) for _ in range(n)).capitalize() + "."
+
+    per_channel = articles // channels
+    feed = [
+        {
+            "id": f"sub-{c}",
+            "channel_alias": f"@channel_{c}",
+            "articles": [
+                {
+                    "id": c * per_channel + i,
+                    "title": text(8),
+                    "description": text(rng.randint(40, 200)),
+                    "link": f"https://t.me/channel_{c}/{i}",
+                    "published_date": f"2025-01-{1 + i % 28:02d}T12:{i % 60:02d}:00",
+                    "ai_summary": text(30),
+                    "category": rng.choice(["Politics", "Technology", "Sports"]),
+                }
+                for i in range(per_channel)
+            ],
+            "next_cursor": None,
+        }
+        for c in range(channels)
+    ]
+    return orjson.dumps(feed)
+
+
+def serve_once(middleware, encoding):
+    """Send one request through the middleware, return the bytes sent."""
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": "/feed/",
+        "headers": [(b"accept-encoding", encoding.encode())],
+    }
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            sent.append(len(message.get("body", b"")))
+
+    asyncio.run(middleware(scope, receive, send))
+    return sum(sent)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--articles", type=int, default=5000)
+    parser.add_argument("--channels", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    body = build_body(args.articles, args.channels)
+    app = Response(body, media_type="application/json")
+
+    print(f"Uncompressed body: {len(body) / 1024:.0f} KiB")
+    print(f"{'encoding':<10} {'level':>5} {'KiB':>8} {'ratio':>6} {'CPU ms':>8} {'wall ms':>8}")
+    for encoding in available_encodings():
+        (option, levels), = LEVELS[encoding].items()
+        for level in levels:
+            middleware = CompressionMiddleware(
+                app, encodings=[encoding], **{option: level}
+            )
+            cpu, wall = [], []
+            for _ in range(args.repeat):
+                cpu_start, wall_start = time.process_time(), time.perf_counter()
+                size = serve_once(middleware, encoding)
+                cpu.append(time.process_time() - cpu_start)
+                wall.append(time.perf_counter() - wall_start)
+            print(
+                f"{encoding:<10} {level:>5} {size / 1024:>8.0f} "
+                f"{len(body) / size:>6.1f} {statistics.median(cpu) * 1000:>8.1f} "
+                f"{statistics.median(wall) * 1000:>8.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Compare LSH band layouts of the near-duplicate lookup at table scale.
+
+Seeds a database with SimHash fingerprints of synthetic articles published
+at a steady rate, then for each band layout stores the band rows and runs
+find_near_duplicate, as ingestion does with its publication window, for
+reposts of articles inside the window, with up to MAX_GUARANTEED_DISTANCE
+flipped bits, and for unrelated texts. Reports the median lookup time, the
+share of reposts found and the number of articles whose bands match an
+unrelated text; at most NEAR_DUPLICATE_CANDIDATES of them are compared.
+
+Usage:
+    python performance/benchmark_dedup.py --articles 200000
+    python performance/benchmark_dedup.py --database-url postgresql://...
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import and_, delete, func, insert, or_, select, text  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.core import dedup  # noqa: E402
+from app.db import crud  # noqa: E402
+from app.db.database import Base, create_db_engine  # noqa: E402
+from app.db.models import ArticleSimhashBand, NewsArticle  # noqa: E402
+
+# (bands, probe radius): exact matches on 8-bit bands, and 16-bit bands
+# probed within one bit; both find every pair within 7 bits
+LAYOUTS = ((8, 0), (4, 1))
+START = datetime(2024, 1, 1)
+VOCABULARY = [f"word{i}" for i in range(5000)]
+# Zipf-like word frequencies, as in real text
+WEIGHTS = [1 / (rank + 1) for rank in range(len(VOCABULARY))]
+
+
+def synthetic_text(rng, words=60):
+    return " ".join(rng.choices(VOCABULARY, WEIGHTS, k=words))
+
+
+def seed(db, articles, interval, batch_size=5000):
+    rng = random.Random(42)
+    fingerprints = []
+    for offset in range(0, articles, batch_size):
+        rows = []
+        for i in range(offset, min(offset + batch_size, articles)):
+            fingerprint = dedup.simhash(synthetic_text(rng))
+            fingerprints.append(fingerprint)
+            rows.append(
+                {
+                    "title": f"Article {i}",
+                    "url": f"https://t.me/bench/{i}",
+                    "simhash": dedup.to_signed(fingerprint),
+                    "published_date": START + i * interval,
+                }
+            )
+        db.execute(insert(NewsArticle), rows)
+    db.commit()
+    return fingerprints
+
+
+def use_layout(bands, radius):
+    dedup.SIMHASH_BANDS = bands
+    dedup.BAND_BITS = dedup.FINGERPRINT_BITS // bands
+    dedup.PROBE_RADIUS = radius
+    dedup.MAX_GUARANTEED_DISTANCE = bands * (radius + 1) - 1
+
+
+def store_bands(db, fingerprints, batch_size=5000):
+    db.execute(delete(ArticleSimhashBand))
+    for offset in range(0, len(fingerprints), batch_size):
+        db.execute(
+            insert(ArticleSimhashBand),
+            [
+                {"band": band, "bucket": bucket, "article_id": article_id}
+                for article_id, fingerprint in enumerate(
+                    fingerprints[offset : offset + batch_size], start=offset + 1
+                )
+                for band, bucket in enumerate(dedup.band_buckets(fingerprint))
+            ],
+        )
+    db.commit()
+    db.execute(text("ANALYZE"))
+    db.commit()
+
+
+def candidates(db, fingerprint):
+    bands = or_(
+        *(
+            and_(
+                ArticleSimhashBand.band == band,
+                ArticleSimhashBand.bucket.in_(dedup.probe_buckets(bucket)),
+            )
+            for band, bucket in enumerate(dedup.band_buckets(fingerprint))
+        )
+    )
+    return db.execute(
+        select(func.count(ArticleSimhashBand.article_id.distinct())).where(bands)
+    ).scalar()
+
+
+def queries(fingerprints, count, recent):
+    rng = random.Random(7)
+    reposts, unrelated = [], []
+    for _ in range(count):
+        article_id = len(fingerprints) - rng.randrange(min(recent, len(fingerprints)))
+        repost = fingerprints[article_id - 1]
+        distance = rng.randint(0, dedup.MAX_GUARANTEED_DISTANCE)
+        for bit in rng.sample(range(dedup.FINGERPRINT_BITS), distance):
+            repost ^= 1 << bit
+        reposts.append((article_id, repost))
+        unrelated.append(dedup.simhash(synthetic_text(rng)))
+    return reposts, unrelated
+
+
+def timed(func, items):
+    samples, results = [], []
+    for item in items:
+        start = time.perf_counter()
+        results.append(func(item))
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--articles", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--distance", type=int, default=7)
+    parser.add_argument("--window-hours", type=float, default=72.0)
+    parser.add_argument("--articles-per-hour", type=float, default=60.0)
+    parser.add_argument("--database-url", help="Empty database to use instead")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = args.database_url or f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        engine = create_db_engine(url)
+        Base.metadata.drop_all(bind=engine)
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(bind=engine)()
+        interval = timedelta(hours=1 / args.articles_per_hour)
+        fingerprints = seed(db, args.articles, interval)
+        recent = int(args.window_hours * args.articles_per_hour)
+        since = START + (args.articles - recent) * interval
+        reposts, unrelated = queries(fingerprints, args.queries, recent)
+        print(
+            f"{args.articles} fingerprinted articles, {recent} in the "
+            f"{args.window_hours:g}h window, {args.queries} lookups each"
+        )
+        print(
+            f"{'layout':<14} {'repost ms':>10} {'found':>6} "
+            f"{'unrelated ms':>13} {'candidates':>11}"
+        )
+
+        for bands, radius in LAYOUTS:
+            use_layout(bands, radius)
+            store_bands(db, fingerprints)
+            repost_ms, matches = timed(
+                lambda query: crud.find_near_duplicate(
+                    db, query[1], args.distance, since
+                ),
+                reposts,
+            )
+            found = sum(
+                match is not None and match.id == article_id
+                for match, (article_id, _) in zip(matches, reposts)
+            )
+            unrelated_ms, _ = timed(
+                lambda query: crud.find_near_duplicate(
+                    db, query, args.distance, since
+                ),
+                unrelated,
+            )
+            mean_candidates = statistics.mean(
+                candidates(db, query) for query in unrelated
+            )
+            layout = f"{bands}x{dedup.BAND_BITS} r={radius}"
+            print(
+                f"{layout:<14} {repost_ms:>10.2f} {found / len(reposts):>6.0%} "
+                f"{unrelated_ms:>13.2f} {mean_candidates:>11.0f}"
+            )
+
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
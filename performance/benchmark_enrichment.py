@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Compare LLM round trips and prompt size of article enrichment.
+
+Runs synthetic articles of several lengths through the separate summary
+and category prompts and through the single structured enrich_article
+prompt, against a stub client that records every request, and reports
+requests and prompt characters per article. Prompt characters stand in
+for input tokens.
+
+Usage:
+    python performance/benchmark_enrichment.py --articles 100
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+from unittest.mock import MagicMock, patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.core import ai  # noqa: E402
+from app.core.llm_cache import LLMCache  # noqa: E402
+
+WORDS = (
+    "market government election technology startup energy climate research "
+    "report minister company investment security update launch network "
+    "police court health university price growth data city war peace sport"
+).split()
+ANSWER = json.dumps(
+    {
+        "summary": "Stub summary.",
+        "category": "Technology",
+        "keywords": ["stub"],
+        "sentiment_score": 0.0,
+    }
+)
+
+
+def stub_client(requests):
+    def create(**kwargs):
+        requests.append(kwargs["messages"])
+        response = MagicMock()
+        response.choices = [MagicMock(message=MagicMock(content=ANSWER))]
+        return response
+
+    client = MagicMock()
+    client.chat.completions.create.side_effect = create
+    return client
+
+
+def articles(count, length, seed=42):
+    rng = random.Random(seed + length)
+    for i in range(count):
+        text = " ".join(rng.choice(WORDS) for _ in range(length // 7))
+        yield f"Post {i}", text[:length]
+
+
+def measure(enrich, count, length):
+    requests = []
+    with patch("app.core.ai.client", stub_client(requests)), patch(
+        "app.core.ai.llm_cache", LLMCache("", max_entries=0)
+    ):
+        for title, content in articles(count, length):
+            enrich(content, title)
+    chars = sum(len(m["content"]) for messages in requests for m in messages)
+    return len(requests) / count, chars / count
+
+
+def separate_calls(content, title):
+    ai.generate_article_summary(content)
+    ai.generate_article_category(content, title)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--articles", type=int, default=100)
+    parser.add_argument(
+        "--lengths", type=int, nargs="+", default=[300, 1000, 3000, 10000]
+    )
+    args = parser.parse_args()
+
+    print(f"{'chars':>7} {'method':<10} {'requests':>9} {'prompt chars':>13}")
+    for length in args.lengths:
+        for method, enrich in (
+            ("separate", separate_calls),
+            ("combined", ai.enrich_article),
+        ):
+            calls, chars = measure(enrich, args.articles, length)
+            print(f"{length:>7} {method:<10} {calls:>9.1f} {chars:>13.0f}")
+
+
+if __name__ == "__main__":
+    main()
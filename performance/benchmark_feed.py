@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Compare the single /feed query with one listing query per subscription.
+
+Seeds a database with synthetic articles spread over many channels and a
+user subscribed to all of them, then times the full feed built by
+get_user_feed, the time to the first row of the same statement when it is
+streamed, and the loop of get_articles(channel_id=..., limit=...) calls the
+feed query replaced, after printing the plan of the feed statement.
+
+Usage:
+    python performance/benchmark_feed.py --articles 100000 --channels 50
+    python performance/benchmark_feed.py --database-url postgresql://...
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import insert, text  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.db import crud  # noqa: E402
+from app.db.database import Base, create_db_engine  # noqa: E402
+from app.db.models import Channel, NewsArticle, Subscription  # noqa: E402
+
+USER_ID = "bench-user"
+
+
+def seed(db, articles, channels, batch_size=20000):
+    rng = random.Random(42)
+    start = datetime(2024, 1, 1)
+    db.execute(
+        insert(Channel),
+        [{"id": i + 1, "alias": f"@channel_{i}"} for i in range(channels)],
+    )
+    db.execute(
+        insert(Subscription),
+        [
+            {"user_id": USER_ID, "channel_id": i + 1, "created_at": start}
+            for i in range(channels)
+        ],
+    )
+    for offset in range(0, articles, batch_size):
+        rows = []
+        for i in range(offset, min(offset + batch_size, articles)):
+            channel = rng.randrange(channels)
+            rows.append(
+                {
+                    "title": f"Article {i}",
+                    "content": "Synthetic content",
+                    "url": f"https://t.me/channel_{channel}/{i}",
+                    "source": f"@channel_{channel}",
+                    "channel_id": channel + 1,
+                    "published_date": start
+                    + timedelta(seconds=rng.randrange(365 * 86400)),
+                }
+            )
+        db.execute(insert(NewsArticle), rows)
+    db.commit()
+    db.execute(text("ANALYZE"))
+    db.commit()
+
+
+def timed(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000, result
+
+
+def per_channel_loop(db, limit):
+    rows = 0
+    for subscription in crud.get_user_channels(db, USER_ID):
+        rows += len(
+            crud.get_articles(db, channel_id=subscription.channel_id, limit=limit)
+        )
+    return rows
+
+
+def first_row(db, limit):
+    query = crud.select_user_feed(
+        USER_ID, limit, dialect=db.get_bind().dialect.name
+    ).execution_options(yield_per=200)
+    result = db.execute(query)
+    row = result.fetchone()
+    result.close()
+    return row is not None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--articles", type=int, default=100000)
+    parser.add_argument("--channels", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--database-url", help="Empty database to use instead")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = args.database_url or f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        engine = create_db_engine(url)
+        Base.metadata.drop_all(bind=engine)
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(bind=engine)()
+        seed(db, args.articles, args.channels)
+        print(f"{args.articles} articles in {args.channels} subscribed channels")
+
+        query = crud.select_user_feed(
+            USER_ID, args.limit, dialect=engine.dialect.name
+        )
+        sql = str(query.compile(engine, compile_kwargs={"literal_binds": True}))
+        explain = "EXPLAIN QUERY PLAN" if engine.dialect.name == "sqlite" else "EXPLAIN"
+        for row in db.execute(text(f"{explain} {sql}")):
+            print(f"    {row[-1]}")
+
+        for name, func in (
+            ("per-channel loop", lambda: per_channel_loop(db, args.limit)),
+            (
+                "feed query",
+                lambda: len(crud.get_user_feed(db, USER_ID, args.limit)),
+            ),
+            ("feed first row", lambda: first_row(db, args.limit)),
+        ):
+            ms, rows = timed(func, args.repeat)
+            print(f"{name:<18} {ms:>9.1f} ms {rows!s:>7}")
+
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Show how article listing queries use the composite indexes.
+
+Fills a throwaway SQLite database with synthetic articles, then prints
+EXPLAIN QUERY PLAN and timings for the listing queries issued by
+get_articles and the feed, first without and then with the indexes
+declared on NewsArticle.
+
+Usage:
+    python performance/benchmark_indexes.py --rows 1000000
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import create_engine, text  # noqa: E402
+
+from app.db.database import Base  # noqa: E402
+from app.db.models import NewsArticle  # noqa: E402
+
+COMPOSITE_INDEXES = [
+    index for index in NewsArticle.__table__.indexes if "published" in index.name
+]
+
+QUERIES = {
+    "by source": (
+        "SELECT * FROM news_articles WHERE source = :source "
+        "ORDER BY published_date DESC LIMIT 100"
+    ),
+    "by category": (
+        "SELECT * FROM news_articles WHERE category = :category "
+        "ORDER BY published_date DESC LIMIT 100"
+    ),
+    "by source and category": (
+        "SELECT * FROM news_articles WHERE source = :source AND category = :category "
+        "ORDER BY published_date DESC LIMIT 100"
+    ),
+    "by channel": (
+        "SELECT * FROM news_articles WHERE channel_id = :channel_id "
+        "ORDER BY published_date DESC LIMIT 100"
+    ),
+    "latest": "SELECT * FROM news_articles ORDER BY published_date DESC LIMIT 100",
+}
+PARAMS = {"source": "@channel_7", "category": "Technology", "channel_id": 8}
+CATEGORIES = ["Technology", "Politics", "Sports", "Business", "Science", "Health"]
+
+
+def populate(engine, rows, channels, batch_size=50000):
+    """Insert `rows` synthetic articles spread over `channels` sources."""
+    start = datetime(2024, 1, 1)
+    rng = random.Random(42)
+    with engine.begin() as conn:
+        conn.execute(
+            text("INSERT INTO channels (id, alias) VALUES (:id, :alias)"),
+            [{"id": i + 1, "alias": f"@channel_{i}"} for i in range(channels)],
+        )
+        for offset in range(0, rows, batch_size):
+            batch = []
+            for i in range(offset, min(offset + batch_size, rows)):
+                channel = rng.randrange(channels)
+                batch.append(
+                    {
+                        "title": f"Article {i}",
+                        "content": "Synthetic content",
+                        "url": f"https://t.me/channel_{channel}/{i}",
+                        "source": f"@channel_{channel}",
+                        "channel_id": channel + 1,
+                        "category": rng.choice(CATEGORIES),
+                        "published_date": start
+                        + timedelta(seconds=rng.randrange(365 * 86400)),
+                    }
+                )
+            conn.execute(
+                text(
+                    "INSERT INTO news_articles "
+                    "(title, content, url, source, channel_id, category, published_date) "
+                    "VALUES (:title, :content, :url, :source, :channel_id, "
+                    ":category, :published_date)"
+                ),
+                batch,
+            )
+
+
+def report(engine, label, repeat):
+    print(f"\n== {label} ==")
+    with engine.connect() as conn:
+        for name, sql in QUERIES.items():
+            plan = conn.execute(text(f"EXPLAIN QUERY PLAN {sql}"), PARAMS).fetchall()
+            start = time.perf_counter()
+            for _ in range(repeat):
+                conn.execute(text(sql), PARAMS).fetchall()
+            elapsed = (time.perf_counter() - start) / repeat * 1000
+            print(f"{name:<24} {elapsed:>9.2f} ms")
+            for row in plan:
+                print(f"{'':<4}{row[-1]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--channels", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        for index in COMPOSITE_INDEXES:
+            index.drop(bind=engine)
+
+        start = time.perf_counter()
+        populate(engine, args.rows, args.channels)
+        print(f"Inserted {args.rows} rows in {time.perf_counter() - start:.1f}s")
+
+        report(engine, "without listing indexes", args.repeat)
+
+        start = time.perf_counter()
+        for index in COMPOSITE_INDEXES:
+            index.create(bind=engine)
+        with engine.begin() as conn:
+            conn.execute(text("ANALYZE"))
+        print(f"\nBuilt indexes in {time.perf_counter() - start:.1f}s")
+
+        report(engine, "with listing indexes", args.repeat)
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
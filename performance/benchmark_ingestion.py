@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Benchmark the ingestion engine against a local stub RSS server.
+
+A threaded HTTP server serves synthetic Telegram-style feeds and the LLM
+calls are replaced by a fixed sleep, so the numbers show how articles/sec
+scale with the concurrency settings rather than with network conditions.
+Near-duplicate reuse is disabled, so every entry costs one LLM call.
+
+Usage:
+    python performance/benchmark_ingestion.py --channels 20 --entries 30
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+
+from app.core.ai import ArticleEnrichment  # noqa: E402
+from app.core.ingestion import IngestConfig, run_ingestion  # noqa: E402
+from app.db.database import Base  # noqa: E402
+from app.db.models import ChannelFetchState, NewsArticle  # noqa: E402
+
+TEXT = "Synthetic breaking news paragraph used for ingestion benchmarking. " * 5
+
+
+def build_feed(channel, count):
+    items = "".join(
+        f"<item><title>{channel} post {i}</title>"
+        f"<link>https://t.me/{channel}/{i}</link>"
+        f"<guid>https://t.me/{channel}/{i}</guid>"
+        f"<description>&lt;p&gt;{TEXT}&lt;/p&gt;</description>"
+        f"<pubDate>Mon, 01 Jan 2025 12:{i % 60:02d}:00 GMT</pubDate></item>"
+        for i in range(count)
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel>'
+        f"<title>{channel}</title>{items}</channel></rss>"
+    ).encode()
+
+
+def start_stub_server(entries, latency):
+    """Start a stub RSS server on a free port and return it."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(latency)
+            body = build_feed(self.path.rsplit("/", 1)[-1], entries)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/rss+xml")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run_once(session, base_url, channels, concurrency, ai_latency):
+    session.query(NewsArticle).delete()
+    session.query(ChannelFetchState).delete()
+    session.commit()
+
+    def fake_llm(*args, **kwargs):
+        time.sleep(ai_latency)
+        return ArticleEnrichment(ai_summary="stub", category="Other")
+
+    config = IngestConfig(
+        base_url=base_url,
+        fetch_concurrency=concurrency,
+        parse_concurrency=concurrency,
+        ai_concurrency=concurrency,
+        ai_rate_per_second=0,
+        freshness_seconds=0,
+        # Every entry has the same text; measure the LLM path, not reuse
+        near_duplicate_distance=None,
+    )
+    with patch("app.core.ingestion.enrich_article", fake_llm):
+        start = time.perf_counter()
+        results = run_ingestion(channels, session, config)
+        elapsed = time.perf_counter() - start
+
+    articles = sum(r.new_articles for r in results)
+    return articles, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--channels", type=int, default=20)
+    parser.add_argument("--entries", type=int, default=30)
+    parser.add_argument("--ai-latency", type=float, default=0.05)
+    parser.add_argument("--fetch-latency", type=float, default=0.2)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    args = parser.parse_args()
+
+    server = start_stub_server(args.entries, args.fetch_latency)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/telegram/channel"
+
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    channels = [f"@bench_{i}" for i in range(args.channels)]
+
+    print(
+        f"{args.channels} channels x {args.entries} entries, "
+        f"LLM latency {args.ai_latency * 1000:.0f}ms, "
+        f"fetch latency {args.fetch_latency * 1000:.0f}ms"
+    )
+    print(f"{'concurrency':>12} {'articles':>9} {'seconds':>9} {'articles/s':>11}")
+    for concurrency in args.concurrency:
+        articles, elapsed = run_once(
+            session, base_url, channels, concurrency, args.ai_latency
+        )
+        print(
+            f"{concurrency:>12} {articles:>9} {elapsed:>9.2f} "
+            f"{articles / elapsed:>11.1f}"
+        )
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
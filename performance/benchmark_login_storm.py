@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Measure article listing latency while a burst of logins hashes passwords.
+
+Starts the application in a separate uvicorn process, logs in once to get a
+token, then compares /api/news/articles latency on its own and during a
+storm of concurrent /auth/login requests, the pattern Locust users create
+when they all log in from on_start. Logins beyond the password executor's
+capacity are answered with 429 instead of queueing.
+
+Usage:
+    python performance/benchmark_login_storm.py --logins 200 --rounds 12
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import socket
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import httpx  # noqa: E402
+
+USERNAME = "storm_user"
+PASSWORD = "password123"
+
+
+def serve(env, port):
+    # Settings are read at import time, so configure before importing the app
+    os.environ.update(env)
+    import uvicorn
+
+    from app.main import app
+
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning")
+
+
+def start_server(env):
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    process = multiprocessing.Process(target=serve, args=(env, port), daemon=True)
+    process.start()
+    while True:
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/health")
+            return process, port
+        except httpx.TransportError:
+            time.sleep(0.1)
+
+
+async def read_latencies(client, headers, total):
+    latencies = []
+    for _ in range(total):
+        start = time.perf_counter()
+        response = await client.get("/api/news/articles/", headers=headers)
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    return statistics.median(latencies), latencies[int(len(latencies) * 0.95)]
+
+
+async def run(port, logins, reads):
+    async with httpx.AsyncClient(
+        base_url=f"http://127.0.0.1:{port}",
+        limits=httpx.Limits(max_connections=logins + 10),
+        timeout=120,
+    ) as client:
+        await client.post(
+            "/auth/register",
+            json={"username": USERNAME, "email": "storm@example.com", "password": PASSWORD},
+        )
+        response = await client.post(
+            "/auth/login", data={"username": USERNAME, "password": PASSWORD}
+        )
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+        idle = await read_latencies(client, headers, reads)
+
+        async def login():
+            response = await client.post(
+                "/auth/login", data={"username": USERNAME, "password": PASSWORD}
+            )
+            return response.status_code
+
+        start = time.perf_counter()
+        storm = asyncio.gather(*(login() for _ in range(logins)))
+        busy = await read_latencies(client, headers, reads)
+        statuses = await storm
+        elapsed = time.perf_counter() - start
+
+    return idle, busy, statuses, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--reads", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=12, help="bcrypt rounds")
+    parser.add_argument("--workers", type=int, default=2, help="password threads")
+    parser.add_argument("--max-pending", type=int, default=16)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {
+            "DATABASE_URL": f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+            "BCRYPT_ROUNDS": str(args.rounds),
+            "PASSWORD_HASH_WORKERS": str(args.workers),
+            "PASSWORD_HASH_MAX_PENDING": str(args.max_pending),
+        }
+        server, port = start_server(env)
+        try:
+            idle, busy, statuses, elapsed = asyncio.run(
+                run(port, args.logins, args.reads)
+            )
+        finally:
+            server.terminate()
+            server.join()
+
+    print(
+        f"bcrypt rounds={args.rounds}, workers={args.workers}, "
+        f"max pending={args.max_pending}"
+    )
+    print(f"{'articles':<14} {'p50 ms':>8} {'p95 ms':>8}")
+    print(f"{'idle':<14} {idle[0] * 1000:>8.1f} {idle[1] * 1000:>8.1f}")
+    print(f"{'login storm':<14} {busy[0] * 1000:>8.1f} {busy[1] * 1000:>8.1f}")
+    print(
+        f"{args.logins} logins in {elapsed:.1f}s: "
+        f"{statuses.count(200)} accepted, {statuses.count(429)} rejected with 429"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Compare full-text search with a LIKE scan over article text.
+
+Seeds a temporary SQLite database with synthetic articles and times a
+page of 20 results for a rare and a common term, once with the FTS5
+statement behind /api/news/search and once with a case-insensitive LIKE
+over title, content and ai_summary, the way a naive server-side filter
+would run. The seeding time includes the FTS triggers.
+
+Usage:
+    python performance/benchmark_search.py --articles 50000
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import or_, select  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.db import crud  # noqa: E402
+from app.db.database import Base, create_db_engine  # noqa: E402
+from app.db.models import NewsArticle  # noqa: E402
+
+WORDS = (
+    "market government election technology startup energy climate research "
+    "report minister company investment security update launch network "
+    "police court health university price growth data city war peace sport "
+    "team league season player record announced yesterday today according"
+).split()
+RARE = "quasar"
+
+
+def seed(db, articles, seed=42):
+    rng = random.Random(seed)
+
+    def text(n):
+        return " ".join(rng.choice(WORDS) for _ in range(n))
+
+    start = datetime(2025, 1, 1)
+    rows = []
+    for i in range(articles):
+        content = text(rng.randint(40, 200))
+        if i % 1000 == 0:
+            content += f" {RARE}"
+        rows.append(
+            {
+                "title": text(8),
+                "content": content,
+                "url": f"https://t.me/bench/{i}",
+                "source": "@bench",
+                "ai_summary": text(30),
+                "published_date": start + timedelta(minutes=i),
+            }
+        )
+    started = time.perf_counter()
+    for offset in range(0, len(rows), 1000):
+        crud.bulk_upsert_articles(db, rows[offset : offset + 1000])
+    return time.perf_counter() - started
+
+
+def like_query(term, limit):
+    pattern = f"%{term}%"
+    return (
+        select(*crud.SEARCH_COLUMNS)
+        .where(
+            or_(
+                NewsArticle.title.ilike(pattern),
+                NewsArticle.content.ilike(pattern),
+                NewsArticle.ai_summary.ilike(pattern),
+            )
+        )
+        .order_by(NewsArticle.published_date.desc())
+        .limit(limit)
+    )
+
+
+def timed(db, query, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = db.execute(query).all()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples), len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--articles", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_db_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(bind=engine)()
+        elapsed = seed(db, args.articles)
+        print(f"Seeded {args.articles} articles in {elapsed:.1f}s")
+
+        print(f"{'term':<12} {'method':<6} {'median ms':>10} {'rows':>5}")
+        for term in (RARE, "technology"):
+            for method, query in (
+                ("like", like_query(term, 20)),
+                ("fts", crud.select_search("sqlite", crud.search_terms(term), 20)),
+            ):
+                seconds, rows = timed(db, query, args.repeat)
+                print(f"{term:<12} {method:<6} {seconds * 1000:>10.1f} {rows:>5}")
+
+        db.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
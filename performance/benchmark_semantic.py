@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Measure semantic search latency at growing index sizes.
+
+Builds a memory-mapped index in a temporary directory for each size and
+times one query end to end: embedding the query text, the matrix-vector
+product and the top-k selection with argpartition, next to a full
+argsort of the scores for comparison. It also times appending one
+ingestion batch of vectors to the full index.
+
+Article vectors are random unit vectors, since hashing a million texts
+would only measure the embedder; its throughput is reported separately
+on synthetic articles.
+
+Usage:
+    python performance/benchmark_semantic.py --sizes 100000 1000000
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np  # noqa: E402
+
+from app.core.semantic import HashingEmbedder, SemanticIndex  # noqa: E402
+
+WORDS = (
+    "market government election technology startup energy climate research "
+    "report minister company investment security update launch network "
+    "рынок правительство выборы технологии энергия климат исследование "
+    "министр компания инвестиции безопасность запуск сеть полиция суд"
+).split()
+QUERY = "министр энергетики объявил об инвестициях в климатические технологии"
+
+
+def synthetic_text(rng, words):
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def random_vectors(rng, rows, dim):
+    vectors = rng.standard_normal((rows, dim), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+
+def timed(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100000, 1000000])
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--k", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    embedder = HashingEmbedder(args.dim)
+    rng = random.Random(42)
+    texts = [synthetic_text(rng, rng.randint(60, 300)) for _ in range(2000)]
+    start = time.perf_counter()
+    embedder.embed_many(texts)
+    per_article = (time.perf_counter() - start) / len(texts) * 1000
+    print(f"Embedding: {per_article:.2f} ms per article ({args.dim} dimensions)")
+
+    generator = np.random.default_rng(42)
+    query = embedder.embed(QUERY)
+    print(
+        f"{'articles':>9} {'MiB':>6} {'build s':>8} {'embed ms':>9} "
+        f"{'argpart ms':>11} {'argsort ms':>11} {'add 200 ms':>11}"
+    )
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            index = SemanticIndex(tmp, embedder)
+            start = time.perf_counter()
+            for offset in range(0, size, 100000):
+                rows = min(100000, size - offset)
+                ids = np.arange(offset + 1, offset + rows + 1)
+                index.add(ids, random_vectors(generator, rows, args.dim))
+            build = time.perf_counter() - start
+
+            embed_ms, _ = timed(lambda: embedder.embed(QUERY), args.repeat)
+            search_ms, _ = timed(lambda: index.search(query, args.k), args.repeat)
+
+            def full_sort():
+                scores = index._vectors[: index.count] @ query
+                return np.argsort(scores)[::-1][: args.k]
+
+            sort_ms, _ = timed(full_sort, args.repeat)
+
+            batch = random_vectors(generator, 200, args.dim)
+            add_ms, _ = timed(
+                lambda: index.add(np.arange(size + 1, size + 201), batch), 5
+            )
+            matrix_mib = index.count * args.dim * 4 / 2**20
+            print(
+                f"{size:>9} {matrix_mib:>6.0f} {build:>8.1f} {embed_ms:>9.2f} "
+                f"{search_ms:>11.1f} {sort_ms:>11.1f} {add_ms:>11.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
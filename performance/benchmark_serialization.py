@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Compare response serialization paths on a 5,000-article listing and feed.
+
+For the article listing, the classic path loads ORM objects, validates
+them through the NewsArticle response model and encodes with the standard
+JSONResponse, as FastAPI does for ``response_model``. The lean path selects
+plain column tuples and hands them to orjson. For /feed, both paths group
+the same rows into dicts; the classic one encodes them through
+``jsonable_encoder`` and JSONResponse, the lean one with orjson. The sparse
+paths are the lean ones restricted to the card view's fields, so the
+article text is neither read nor serialized.
+
+Usage:
+    python performance/benchmark_serialization.py --articles 5000 --channels 5
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import orjson  # noqa: E402
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+from pydantic import TypeAdapter  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.api.feed import FEED_ARTICLE_FIELDS, group_feed_rows  # noqa: E402
+from app.db import crud  # noqa: E402
+from app.db.database import Base, create_db_engine  # noqa: E402
+from app.db.models import User  # noqa: E402
+from app.schemas.news import NewsArticle  # noqa: E402
+
+ARTICLES = TypeAdapter(List[NewsArticle])
+
+# Fields shown by the Streamlit card view
+SPARSE = ["title", "url", "ai_summary", "category"]
+
+
+def seed(db, articles, channels):
+    user = User(username="bench", email="bench@example.com", hashed_password="x")
+    db.add(user)
+    db.commit()
+    channel_ids = []
+    for c in range(channels):
+        subscription = crud.add_user_channel(db, str(user.id), f"@bench_{c}")
+        channel_ids.append(subscription.channel_id)
+
+    start = datetime(2025, 1, 1)
+    crud.bulk_upsert_articles(
+        db,
+        [
+            {
+                "title": f"Article {i}",
+                "content": "Synthetic content for serialization. " * 15,
+                "url": f"https://t.me/bench_{i % channels}/{i}",
+                "source": f"@bench_{i % channels}",
+                "channel_id": channel_ids[i % channels],
+                "category": "Technology",
+                "ai_summary": "A short generated summary of the article.",
+                "published_date": start + timedelta(minutes=i),
+            }
+            for i in range(articles)
+        ],
+    )
+    return str(user.id)
+
+
+def timed(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = func()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples), len(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--articles", type=int, default=5000)
+    parser.add_argument("--channels", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_db_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(bind=engine, expire_on_commit=False)()
+        user_id = seed(db, args.articles, args.channels)
+        per_channel = args.articles // args.channels
+
+        def articles_classic():
+            db.expunge_all()
+            objects = db.scalars(crud.select_articles(limit=args.articles)).all()
+            models = ARTICLES.validate_python(objects, from_attributes=True)
+            return JSONResponse(jsonable_encoder(models)).body
+
+        def articles_lean():
+            rows = db.execute(crud.select_article_rows(limit=args.articles)).all()
+            return orjson.dumps([row._asdict() for row in rows])
+
+        def articles_sparse():
+            rows = db.execute(
+                crud.select_article_rows(
+                    limit=args.articles, fields=["id", *SPARSE, "published_date"]
+                )
+            ).all()
+            return orjson.dumps([dict(zip(["id", *SPARSE], row)) for row in rows])
+
+        def feed_classic():
+            rows = crud.get_user_feed(db, user_id, per_channel_limit=per_channel + 1)
+            content = group_feed_rows(rows, per_channel)
+            return JSONResponse(jsonable_encoder(content)).body
+
+        def feed_lean():
+            rows = crud.get_user_feed(db, user_id, per_channel_limit=per_channel + 1)
+            return orjson.dumps(group_feed_rows(rows, per_channel))
+
+        def feed_sparse():
+            fields = ["id", "title", "link", "ai_summary", "category"]
+            rows = crud.get_user_feed(
+                db,
+                user_id,
+                per_channel_limit=per_channel + 1,
+                fields=[FEED_ARTICLE_FIELDS[name] for name in fields],
+            )
+            return orjson.dumps(group_feed_rows(rows, per_channel, fields))
+
+        print(f"{args.articles} articles in {args.channels} channels")
+        print(f"{'path':<20} {'median ms':>10} {'bytes':>10}")
+        for name, func in (
+            ("articles classic", articles_classic),
+            ("articles lean", articles_lean),
+            ("articles sparse", articles_sparse),
+            ("feed classic", feed_classic),
+            ("feed lean", feed_lean),
+            ("feed sparse", feed_sparse),
+        ):
+            seconds, size = timed(func, args.repeat)
+            print(f"{name:<20} {seconds * 1000:>10.1f} {size:>10}")
+
+        db.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Measure read latency while ingestion is writing to SQLite.
+
+One thread upserts article batches the way the ingestion engine does,
+while several reader threads page through the article listing. The run
+is repeated with a bare engine (rollback journal, default pragmas, shared
+pool) and with the tuned engines from app.db.database (WAL, pragmas,
+read-only pool plus a single writer).
+
+Usage:
+    python performance/benchmark_sqlite_concurrency.py --seconds 10 --readers 8
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.exc import OperationalError  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.db import crud  # noqa: E402
+from app.db.database import Base, create_db_engine  # noqa: E402
+
+
+def article_batch(start, size):
+    base = datetime(2025, 1, 1)
+    return [
+        {
+            "title": f"Article {i}",
+            "content": "Synthetic content " * 20,
+            "url": f"https://t.me/bench/{i}",
+            "source": f"@bench_{i % 20}",
+            "category": "Technology",
+            "published_date": base + timedelta(seconds=i),
+        }
+        for i in range(start, start + size)
+    ]
+
+
+def run(write_engine, read_engine, seconds, readers, batch_size):
+    Base.metadata.create_all(bind=write_engine)
+    WriteSession = sessionmaker(bind=write_engine)
+    ReadSession = sessionmaker(bind=read_engine)
+
+    with WriteSession() as db:
+        crud.bulk_upsert_articles(db, article_batch(0, 5000))
+
+    stop = threading.Event()
+    latencies = []
+    errors = {"read": 0, "write": 0}
+    written = [0]
+    lock = threading.Lock()
+
+    def writer():
+        offset = 5000
+        while not stop.is_set():
+            try:
+                with WriteSession() as db:
+                    crud.bulk_upsert_articles(db, article_batch(offset, batch_size))
+                offset += batch_size
+                written[0] += batch_size
+            except OperationalError:
+                errors["write"] += 1
+
+    def reader(index):
+        source = f"@bench_{index % 20}"
+        while not stop.is_set():
+            start = time.perf_counter()
+            try:
+                with ReadSession() as db:
+                    crud.get_articles(db, limit=50, source=source)
+            except OperationalError:
+                with lock:
+                    errors["read"] += 1
+                continue
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+
+    threads = [threading.Thread(target=writer)] + [
+        threading.Thread(target=reader, args=(i,)) for i in range(readers)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95)] if latencies else float("nan")
+    p99 = latencies[int(len(latencies) * 0.99)] if latencies else float("nan")
+    return {
+        "reads": len(latencies),
+        "p50": statistics.median(latencies) if latencies else float("nan"),
+        "p95": p95,
+        "p99": p99,
+        "written": written[0],
+        "errors": errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--batch-size", type=int, default=200)
+    args = parser.parse_args()
+
+    print(
+        f"{'engine':<8} {'reads':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+        f"{'written':>8} {'locked r/w':>11}"
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        for label in ("bare", "tuned"):
+            url = f"sqlite:///{os.path.join(tmp, label + '.db')}"
+            if label == "bare":
+                write_engine = create_engine(
+                    url, connect_args={"check_same_thread": False, "timeout": 1}
+                )
+                read_engine = write_engine
+            else:
+                write_engine = create_db_engine(url)
+                read_engine = create_db_engine(url, read_only=True)
+
+            result = run(
+                write_engine, read_engine, args.seconds, args.readers, args.batch_size
+            )
+            print(
+                f"{label:<8} {result['reads']:>7} {result['p50'] * 1000:>8.2f} "
+                f"{result['p95'] * 1000:>8.2f} {result['p99'] * 1000:>8.2f} "
+                f"{result['written']:>8} "
+                f"{result['errors']['read']:>5}/{result['errors']['write']:<5}"
+            )
+            write_engine.dispose()
+            read_engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
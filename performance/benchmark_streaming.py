@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Compare time to first byte and peak memory of JSON and NDJSON listings.
+
+Seeds a temporary SQLite database and sends /api/news/articles/ requests
+straight to the ASGI application, once as a JSON array and once streamed
+as NDJSON, for growing listing sizes. Peak memory is the tracemalloc peak
+of the Python allocations made while serving the request.
+
+Usage:
+    python performance/benchmark_streaming.py --sizes 1000 10000 50000
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+
+def seed(articles):
+    from app.db import crud
+    from app.db.database import Base, SessionLocal, engine
+
+    Base.metadata.create_all(bind=engine)
+    start = datetime(2025, 1, 1)
+    with SessionLocal() as db:
+        crud.bulk_upsert_articles(
+            db,
+            [
+                {
+                    "title": f"Article {i}",
+                    "content": "Synthetic content for streaming. " * 15,
+                    "url": f"https://t.me/bench/{i}",
+                    "source": "@bench",
+                    "category": "Technology",
+                    "ai_summary": "A short generated summary of the article.",
+                    "published_date": start + timedelta(minutes=i),
+                }
+                for i in range(articles)
+            ],
+        )
+
+
+async def serve_once(app, path, query, accept):
+    """Send one GET through the app; return (first byte s, total s, bytes)."""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0", "spec_version": "2.4"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "server": ("bench", 80),
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": query.encode(),
+        "headers": [(b"host", b"bench"), (b"accept", accept.encode())],
+    }
+    sent = {"first": None, "bytes": 0}
+    received = False
+
+    async def receive():
+        nonlocal received
+        if not received:
+            received = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await asyncio.Event().wait()
+
+    async def send(message):
+        if message["type"] == "http.response.body" and message.get("body"):
+            if sent["first"] is None:
+                sent["first"] = time.perf_counter()
+            sent["bytes"] += len(message["body"])
+
+    start = time.perf_counter()
+    await app(scope, receive, send)
+    return sent["first"] - start, time.perf_counter() - start, sent["bytes"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Settings are read at import time, so configure before importing the app
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        os.environ["RESPONSE_CACHE_MAX_SIZE"] = "0"
+        from app.core.dependencies import get_current_active_user
+        from app.db.models import User
+        from app.main import app
+
+        app.dependency_overrides[get_current_active_user] = lambda: User(id=1)
+        seed(max(args.sizes))
+
+        print(f"{'articles':>8} {'mode':<7} {'TTFB ms':>8} {'total ms':>9} "
+              f"{'KiB':>8} {'peak MiB':>9}")
+        for size in args.sizes:
+            path, query = "/api/news/articles/", f"limit={size}"
+            for mode, accept in (
+                ("json", "application/json"),
+                ("ndjson", "application/x-ndjson"),
+            ):
+                tracemalloc.start()
+                first, total, body = asyncio.run(serve_once(app, path, query, accept))
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                print(
+                    f"{size:>8} {mode:<7} {first * 1000:>8.1f} {total * 1000:>9.1f} "
+                    f"{body / 1024:>8.0f} {peak / 2**20:>9.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -76,9 +76,9 @@ class WebsiteUser(HttpUser):
         search_terms = ["technology", "science", "politics", "sports"]
         for term in search_terms:
             self.client.get(
-                f"/api/news/articles/?search={term}",
+                f"/api/news/search?q={term}",
                 headers={"Authorization": f"Bearer {self.token}"},
-                name="/api/news/articles/?search=TERM",
+                name="/api/news/search?q=TERM",
             )
 
 
@@ -202,7 +202,9 @@ class SearchApiUser(HttpUser):
         search_terms = ["python", "news", "technology", "world"]
         for term in search_terms:
             with self.client.get(
-                f"/api/news/articles/?search={term}", catch_response=True
+                f"/api/news/search?q={term}",
+                catch_response=True,
+                name="/api/news/search?q=TERM",
             ) as response:
                 if response.status_code == 401:
                     # Re-authenticate on 401
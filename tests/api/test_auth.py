@@ -1,12 +1,22 @@
+import asyncio
+import gc
 import logging
+import time
+from unittest.mock import AsyncMock, patch
 from uuid import uuid4
 
+import httpx
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import text
-from sqlalchemy.orm import Session
-
-from app.db.crud import get_user_by_username
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app.core.security import PasswordExecutorBusy, create_access_token
+from app.db.crud import get_user_by_username, set_user_active
+from app.db.database import Base, get_async_db, get_db, to_async_url
+from app.db.models import User
 from app.main import app
 
 # Set up detailed logging
@@ -164,6 +174,52 @@ def test_login_nonexistent_user():
     assert "Incorrect username or password" in response.json()["detail"]
 
 
+def test_login_does_not_use_the_writer_session(clean_db):
+    """Test that logins read through the async session, never get_db."""
+    username = f"testuser_reader_{uuid4().hex[:8]}"
+    client.post(
+        "/auth/register",
+        json={
+            "username": username,
+            "email": f"{username}@example.com",
+            "password": "password123",
+        },
+    )
+
+    def _no_writer():
+        raise AssertionError("login used the writer session")
+        yield
+
+    overrides = dict(app.dependency_overrides)
+    app.dependency_overrides[get_db] = _no_writer
+    try:
+        response = client.post(
+            "/auth/login", data={"username": username, "password": "password123"}
+        )
+    finally:
+        app.dependency_overrides = overrides
+    assert response.status_code == 200
+
+
+def test_register_duplicate_missed_by_the_reader(clean_db):
+    """Test that a duplicate the read session misses is still a 400."""
+    username = f"testuser_race_{uuid4().hex[:8]}"
+    request_data = {
+        "username": username,
+        "email": f"{username}@example.com",
+        "password": "password123",
+    }
+    assert client.post("/auth/register", json=request_data).status_code == 201
+
+    # E.g. a read replica that has not caught up yet
+    with patch(
+        "app.db.async_crud.get_user_by_username", AsyncMock(return_value=None)
+    ), patch("app.db.async_crud.get_user_by_email", AsyncMock(return_value=None)):
+        response = client.post("/auth/register", json=request_data)
+    assert response.status_code == 400
+    assert "already registered" in response.json()["detail"]
+
+
 def test_get_current_user(clean_db):
     """Test getting the current user information."""
     # First register and login
@@ -231,3 +287,170 @@ def test_password_hashing(test_db: Session, clean_db):
     # 1. The password is not stored in plaintext (since changing it breaks auth)
     # 2. The password verification mechanism works
     # 3. The hashing mechanism is properly implemented
+
+
+def test_auth_does_not_block_event_loop(tmp_path):
+    """Test that authenticated requests leave the event loop responsive."""
+    # Every statement stalls in the database driver. Waiting on it from the
+    # event loop thread would stall the loop for at least this long.
+    delay = 0.1
+    url = f"sqlite:///{tmp_path / 'event_loop.db'}"
+
+    def slow_trace(statement):
+        time.sleep(delay)
+
+    sync_engine = create_engine(url, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=sync_engine)
+    username = f"lag_user_{uuid4().hex[:8]}"
+    with Session(sync_engine) as db:
+        db.add(User(username=username, email=f"{username}@example.com", hashed_password="x"))
+        db.commit()
+
+    @event.listens_for(sync_engine, "connect")
+    def _slow_sync(dbapi_connection, connection_record):
+        dbapi_connection.set_trace_callback(slow_trace)
+
+    async_engine = create_async_engine(to_async_url(url), poolclass=NullPool)
+
+    @event.listens_for(async_engine.sync_engine, "connect")
+    def _slow_async(dbapi_connection, connection_record):
+        dbapi_connection.await_(
+            dbapi_connection.driver_connection.set_trace_callback(slow_trace)
+        )
+
+    SyncSession = sessionmaker(bind=sync_engine)
+
+    def _get_test_db():
+        with SyncSession() as db:
+            yield db
+
+    async def _get_test_async_db():
+        async with AsyncSession(async_engine, expire_on_commit=False) as db:
+            yield db
+
+    token = create_access_token(data={"sub": username})
+    headers = {"Authorization": f"Bearer {token}"}
+
+    async def measure():
+        lags = []
+        done = asyncio.Event()
+
+        async def ticker():
+            while not done.is_set():
+                start = time.perf_counter()
+                await asyncio.sleep(0.005)
+                lags.append(time.perf_counter() - start - 0.005)
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+            tick = asyncio.create_task(ticker())
+            responses = await asyncio.gather(
+                *(ac.get("/auth/me", headers=headers) for _ in range(20))
+            )
+            done.set()
+            await tick
+        return responses, max(lags)
+
+    overrides = dict(app.dependency_overrides)
+    app.dependency_overrides[get_db] = _get_test_db
+    app.dependency_overrides[get_async_db] = _get_test_async_db
+    # A collection of the garbage left by earlier tests can pause the loop
+    # on its own, which is not what this test is about
+    gc.collect()
+    gc.disable()
+    try:
+        responses, max_lag = asyncio.run(measure())
+    finally:
+        gc.enable()
+        app.dependency_overrides.clear()
+        app.dependency_overrides.update(overrides)
+        async_engine.sync_engine.dispose()
+        sync_engine.dispose()
+
+    assert all(r.status_code == 200 for r in responses)
+    assert all(r.json()["username"] == username for r in responses)
+    logger.debug(f"Max event loop lag: {max_lag * 1000:.1f}ms")
+    assert max_lag < delay
+
+
+def _register_and_login(client, prefix):
+    username = f"{prefix}_{uuid4().hex[:8]}"
+    client.post(
+        "/auth/register",
+        json={
+            "username": username,
+            "email": f"{username}@example.com",
+            "password": "password123",
+        },
+    )
+    response = client.post(
+        "/auth/login", data={"username": username, "password": "password123"}
+    )
+    return username, {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def test_repeated_requests_hit_principal_cache(client, clean_db):
+    """Test that only the first request with a token resolves the user."""
+    username, headers = _register_and_login(client, "testuser_cache")
+
+    for _ in range(3):
+        response = client.get("/auth/me", headers=headers)
+        assert response.status_code == 200
+        assert response.json()["username"] == username
+
+    stats = client.get("/metrics").json()["auth_cache"]
+    assert stats["misses"] == 1
+    assert stats["hits"] == 2
+
+
+def test_logout_revokes_token(client, clean_db):
+    """Test that a logged out token is rejected even though it was cached."""
+    _, headers = _register_and_login(client, "testuser_logout")
+    assert client.get("/auth/me", headers=headers).status_code == 200
+
+    response = client.post("/auth/logout", headers=headers)
+    assert response.status_code == 204
+
+    assert client.get("/auth/me", headers=headers).status_code == 401
+    assert client.post("/auth/logout", headers=headers).status_code == 401
+
+
+def test_deactivation_invalidates_cached_user(client, test_db: Session, clean_db):
+    """Test that deactivating a user takes effect on their next request."""
+    username, headers = _register_and_login(client, "testuser_inactive")
+    assert client.get("/auth/me", headers=headers).status_code == 200
+
+    set_user_active(test_db, username, False)
+
+    assert client.get("/auth/me", headers=headers).status_code == 403
+
+
+def test_is_active_change_through_orm_invalidates_cached_user(
+    client, test_db: Session, clean_db
+):
+    """Test that any committed is_active change drops cached principals."""
+    username, headers = _register_and_login(client, "testuser_orm_inactive")
+    assert client.get("/auth/me", headers=headers).status_code == 200
+
+    user = get_user_by_username(test_db, username)
+    user.is_active = False
+    test_db.commit()
+
+    assert client.get("/auth/me", headers=headers).status_code == 403
+
+
+def test_login_rejected_when_password_executor_saturated(client, clean_db):
+    """Test that a saturated password executor answers 429 right away."""
+    username, _ = _register_and_login(client, "testuser_busy")
+
+    with patch(
+        "app.api.auth.verify_password_async",
+        new_callable=AsyncMock,
+        side_effect=PasswordExecutorBusy,
+    ):
+        response = client.post(
+            "/auth/login", data={"username": username, "password": "password123"}
+        )
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "1"
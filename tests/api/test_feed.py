@@ -1,15 +1,20 @@
-# import json  # Unused import
+import json
 import logging
 from datetime import datetime
-from unittest.mock import MagicMock, patch
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
 from uuid import uuid4
 
+import httpx
+import orjson
 import pytest
-import requests
 from fastapi.testclient import TestClient
 from sqlalchemy import text
 
 # from sqlalchemy.orm import Session  # Unused import
+from app.api.feed import group_feed_rows
+from app.core.ai import ArticleEnrichment
+from app.core.ingestion import channel_coalescer
 from app.db.crud import create_or_update_article, get_user_by_username
 
 # from app.db.models import User, UserChannels  # Unused import
@@ -25,11 +30,11 @@ client = TestClient(app)
 
 @pytest.fixture(scope="function")
 def clean_user_channels(test_db):
-    """Clean user_channels table before and after tests."""
-    test_db.execute(text("DELETE FROM user_channels"))
+    """Clean subscriptions table before and after tests."""
+    test_db.execute(text("DELETE FROM subscriptions"))
     test_db.commit()
     yield
-    test_db.execute(text("DELETE FROM user_channels"))
+    test_db.execute(text("DELETE FROM subscriptions"))
     test_db.commit()
 
 
@@ -37,10 +42,14 @@ def clean_user_channels(test_db):
 def clean_articles(test_db):
     """Clean news_articles table before and after tests."""
     test_db.execute(text("DELETE FROM news_articles"))
+    test_db.execute(text("DELETE FROM channel_fetch_state"))
     test_db.commit()
+    channel_coalescer.clear()
     yield
     test_db.execute(text("DELETE FROM news_articles"))
+    test_db.execute(text("DELETE FROM channel_fetch_state"))
     test_db.commit()
+    channel_coalescer.clear()
 
 
 @pytest.fixture(scope="function")
@@ -125,22 +134,26 @@ def test_get_channels_with_articles(
     }
     article = create_or_update_article(test_db, article_data)
 
-    # Use patch to mock the response for get_articles
-    with patch("app.api.feed.get_articles") as mock_get_articles:
-        with patch("app.api.feed.get_user_channels") as mock_get_channels:
-            # Create a mock channel
-            mock_channel = MagicMock()
-            mock_channel.id = uuid4()
-            mock_channel.channel_alias = "@test_channel"
-            mock_get_channels.return_value = [mock_channel]
-
-            # Create a mock article list
-            mock_get_articles.return_value = [article]
+    # Use patch to mock the single feed query
+    with patch(
+        "app.api.feed.async_crud.get_user_feed", new_callable=AsyncMock
+    ) as mock_get_feed:
+        # Create a mock feed row joining the channel and its article
+        mock_row = SimpleNamespace(
+            subscription_id=uuid4(),
+            channel_alias="@test_channel",
+            id=article.id,
+            title=article.title,
+            content=article.content,
+            url=article.url,
+            published_date=article.published_date,
+            ai_summary=article.ai_summary,
+            category=article.category,
+        )
+        mock_get_feed.return_value = [mock_row]
 
-            # Get channels
-            response = client.get(
-                "/feed/", headers={"Authorization": f"Bearer {token}"}
-            )
+        # Get channels
+        response = client.get("/feed/", headers={"Authorization": f"Bearer {token}"})
 
     assert response.status_code == 200
     data = response.json()
@@ -154,6 +167,53 @@ def test_get_channels_with_articles(
     assert data[0]["articles"][0]["title"] == "Test Article"
 
 
+def test_get_channels_with_articles_next_cursor(test_user):
+    """Test that a channel with more articles than the limit gets a cursor."""
+    token = test_user["token"]
+    subscription_id = uuid4()
+    rows = [
+        SimpleNamespace(
+            subscription_id=subscription_id,
+            channel_id=7,
+            channel_alias="@paged_channel",
+            id=article_id,
+            title=f"Article {article_id}",
+            content="Content",
+            url=f"https://t.me/paged_channel/{article_id}",
+            published_date=datetime(2025, 1, 1, 12, article_id),
+            ai_summary=None,
+            category=None,
+        )
+        for article_id in (3, 2, 1)
+    ]
+
+    with patch(
+        "app.api.feed.async_crud.get_user_feed", new_callable=AsyncMock, return_value=rows
+    ) as mock_get_feed:
+        response = client.get(
+            "/feed/?limit_per_channel=2", headers={"Authorization": f"Bearer {token}"}
+        )
+        assert response.status_code == 200
+        channel = response.json()[0]
+        assert [a["id"] for a in channel["articles"]] == [3, 2]
+        assert mock_get_feed.call_args.kwargs["per_channel_limit"] == 3
+
+        client.get(
+            f"/feed/?limit_per_channel=2&cursor={channel['next_cursor']}",
+            headers={"Authorization": f"Bearer {token}"},
+        )
+        assert mock_get_feed.call_args.kwargs["channel_id"] == 7
+        assert mock_get_feed.call_args.kwargs["after"] == (
+            datetime(2025, 1, 1, 12, 2),
+            2,
+        )
+
+    response = client.get(
+        "/feed/?cursor=bogus", headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == 400
+
+
 def test_update_all_channels(test_user, test_db, clean_user_channels):
     """Test updating all channels."""
     token = test_user["token"]
@@ -167,7 +227,7 @@ def test_update_all_channels(test_user, test_db, clean_user_channels):
         )
 
     # Test update endpoint
-    with patch("app.api.feed.process_channel_articles") as mock_process:
+    with patch("app.api.feed.process_channels") as mock_process:
         response = client.post(
             "/feed/update", headers={"Authorization": f"Bearer {token}"}
         )
@@ -188,20 +248,31 @@ def test_update_all_channels_no_channels(test_user, clean_user_channels):
     assert "No channels found" in response.json()["detail"]
 
 
-@patch("app.api.feed.requests.get")
-@patch("app.api.feed.feedparser.parse")
-@patch("app.api.feed.generate_article_summary")
-@patch("app.api.feed.generate_article_category")
-@patch("app.api.feed.BeautifulSoup")
+def mock_http_client(responses):
+    """Build an httpx.AsyncClient factory that replays the given responses."""
+    real_client = httpx.AsyncClient
+    responses = list(responses)
+
+    def handler(request):
+        response = responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    def factory(**kwargs):
+        kwargs["transport"] = httpx.MockTransport(handler)
+        return real_client(**kwargs)
+
+    return factory
+
+
+@patch("app.core.ingestion.feedparser.parse")
+@patch("app.core.ingestion.enrich_article")
+@patch("app.core.ingestion.extract_plain_text")
 def test_process_channel_articles(
-    mock_bs, mock_category, mock_summary, mock_parse, mock_get, test_db, clean_articles
+    mock_extract, mock_enrich, mock_parse, test_db, clean_articles
 ):
     """Test the process_channel_articles function directly."""
-    # Mock responses
-    mock_response = MagicMock()
-    mock_response.status_code = 200
-    mock_get.return_value = mock_response
-
     # Mock feedparser
     mock_feed = MagicMock()
     mock_entry = {
@@ -213,21 +284,22 @@ def test_process_channel_articles(
     mock_feed.entries = [mock_entry]
     mock_parse.return_value = mock_feed
 
-    # Mock BeautifulSoup
-    mock_soup = MagicMock()
-    mock_soup.get_text.return_value = (
+    # Mock HTML extraction
+    mock_extract.return_value = (
         "This is a long text that is more than 50 characters to pass the length check"
     )
-    mock_bs.return_value = mock_soup
 
     # Mock AI functions
-    mock_summary.return_value = "This is a summary"
-    mock_category.return_value = "Technology"
+    mock_enrich.return_value = ArticleEnrichment("This is a summary", "Technology")
 
     from app.api.feed import process_channel_articles
 
     # Call function directly
-    process_channel_articles("@test_channel", test_db, max_articles=1)
+    with patch(
+        "app.core.ingestion.httpx.AsyncClient",
+        mock_http_client([httpx.Response(200, content=b"<rss/>")]),
+    ):
+        process_channel_articles("@test_channel", test_db, max_articles=1)
 
     # Check database
     articles = test_db.query(NewsArticle).all()
@@ -238,41 +310,37 @@ def test_process_channel_articles(
     assert articles[0].category == "Technology"
 
 
-@patch("app.api.feed.requests.get")
-def test_process_channel_articles_request_error(mock_get, test_db, clean_articles):
+def test_process_channel_articles_request_error(test_db, clean_articles):
     """Test handling of request errors in process_channel_articles."""
     # Mock network error
-    mock_get.side_effect = requests.RequestException("Network error")
+    error = httpx.ConnectError("Network error")
 
     from app.api.feed import process_channel_articles
 
     # Call function directly with small retry count for testing
-    process_channel_articles("@test_channel", test_db, retry_count=1)
+    with patch("app.core.ingestion.httpx.AsyncClient", mock_http_client([error])):
+        process_channel_articles("@test_channel", test_db, retry_count=1)
 
     # Check no articles were added
     articles = test_db.query(NewsArticle).all()
     assert len(articles) == 0
 
 
-@patch("app.api.feed.requests.get")
-def test_process_channel_articles_rate_limit(mock_get, test_db, clean_articles):
+def test_process_channel_articles_rate_limit(test_db, clean_articles):
     """Test handling of rate limits in process_channel_articles."""
     # First response is rate limited, second is successful
-    mock_response_429 = MagicMock()
-    mock_response_429.status_code = 429
-    mock_response_429.headers = {"Retry-After": "1"}  # Quick retry for testing
+    mock_response_429 = httpx.Response(429, headers={"Retry-After": "1"})
 
-    mock_response_200 = MagicMock()
-    mock_response_200.status_code = 200
     # Empty feed to keep test simple
-    mock_response_200.content = b'{"feed": {}, "entries": []}'
-
-    mock_get.side_effect = [mock_response_429, mock_response_200]
+    mock_response_200 = httpx.Response(200, content=b'{"feed": {}, "entries": []}')
 
     from app.api.feed import process_channel_articles
 
     # Patch sleep to avoid waiting in tests
-    with patch("app.api.feed.time.sleep"):
+    with patch(
+        "app.core.ingestion.httpx.AsyncClient",
+        mock_http_client([mock_response_429, mock_response_200]),
+    ), patch("app.core.ingestion.asyncio.sleep", new_callable=AsyncMock):
         process_channel_articles("@test_channel", test_db)
 
     # We're just testing it didn't raise an exception
@@ -332,10 +400,9 @@ def test_delete_article_bookmark(
     mock_remove_bookmark.assert_called_once()
 
 
-@patch("app.api.feed.get_user_bookmarks")
-@patch("app.db.crud.get_article")
+@patch("app.api.feed.async_crud.get_bookmarked_articles", new_callable=AsyncMock)
 def test_list_user_bookmarks(
-    mock_get_article, mock_get_user_bookmarks, test_user, test_db, clean_articles
+    mock_get_bookmarked_articles, test_user, test_db, clean_articles
 ):
     """Test listing user bookmarks."""
     token = test_user["token"]
@@ -352,15 +419,9 @@ def test_list_user_bookmarks(
     article = create_or_update_article(test_db, article_data)
     print(f"Debug - Created article with ID: {article.id}")
 
-    # Mock bookmarks
-    mock_bookmark = MagicMock()
-    mock_bookmark.article_id = article.id
-    mock_get_user_bookmarks.return_value = [mock_bookmark]
-    print(f"Debug - Mocked bookmark for article ID: {mock_bookmark.article_id}")
-
-    # Mock get_article
-    mock_get_article.return_value = article
-    print(f"Debug - Mocked get_article to return: {article.title}")
+    # Mock bookmarked articles
+    mock_get_bookmarked_articles.return_value = [article]
+    print(f"Debug - Mocked bookmarked article ID: {article.id}")
 
     # Get bookmarks
     auth_header = {"Authorization": f"Bearer {token}"}
@@ -409,7 +470,7 @@ def test_process_new_articles(client, mock_db_session, test_user, clean_user_cha
         )
 
     # Now test the update endpoint with proper mocking
-    with patch("app.api.feed.process_channel_articles") as mock_process:
+    with patch("app.api.feed.process_channels") as mock_process:
         response = client.post(
             "/feed/update", headers={"Authorization": f"Bearer {token}"}
         )
@@ -419,3 +480,116 @@ def test_process_new_articles(client, mock_db_session, test_user, clean_user_cha
         assert "message" in response.json()
         assert "Update started" in response.json()["message"]
         assert mock_process.call_count >= 1
+
+
+def test_get_channels_with_articles_etag(test_user):
+    """Test that the feed is only rebuilt when its version marker changes."""
+    headers = {"Authorization": f"Bearer {test_user['token']}"}
+    row = SimpleNamespace(
+        subscription_id=uuid4(),
+        channel_id=1,
+        channel_alias="@etag_channel",
+        id=None,
+    )
+
+    with patch(
+        "app.api.feed.async_crud.get_user_feed_version",
+        new_callable=AsyncMock,
+        return_value=(1, 1, 0, None),
+    ) as mock_version, patch(
+        "app.api.feed.async_crud.get_user_feed",
+        new_callable=AsyncMock,
+        return_value=[row],
+    ) as mock_get_feed:
+        first = client.get("/feed/", headers=headers)
+        assert first.status_code == 200
+        etag = first.headers["ETag"]
+
+        second = client.get("/feed/", headers={**headers, "If-None-Match": etag})
+        assert second.status_code == 304
+
+        cached = client.get("/feed/", headers=headers)
+        assert cached.json() == first.json()
+        assert mock_get_feed.call_count == 1
+
+        # A new article in a subscribed channel changes the marker
+        mock_version.return_value = (1, 1, 1, datetime(2025, 1, 1))
+        changed = client.get("/feed/", headers={**headers, "If-None-Match": etag})
+        assert changed.status_code == 200
+        assert changed.headers["ETag"] != etag
+        assert mock_get_feed.call_count == 2
+
+
+def test_get_channels_with_articles_ndjson(test_user):
+    """Test that NDJSON mode streams one channel per line across batches."""
+    headers = {"Authorization": f"Bearer {test_user['token']}"}
+    first, second = uuid4(), uuid4()
+
+    def row(subscription_id, alias, article_id):
+        return SimpleNamespace(
+            subscription_id=subscription_id,
+            channel_id=1,
+            channel_alias=alias,
+            id=article_id,
+            title=f"Article {article_id}",
+            content="Content",
+            url=f"https://t.me/c/{article_id}",
+            published_date=datetime(2025, 1, 1, 12, article_id),
+            ai_summary=None,
+            category=None,
+        )
+
+    batches = [
+        [row(first, "@first", 3), row(first, "@first", 2)],
+        [row(first, "@first", 1), row(second, "@second", 4)],
+    ]
+
+    async def stream_user_feed(db, **kwargs):
+        for batch in batches:
+            yield batch
+
+    with patch("app.api.feed.async_crud.stream_user_feed", stream_user_feed):
+        response = client.get(
+            "/feed/?stream=true&limit_per_channel=2", headers=headers
+        )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    channels = [json.loads(line) for line in response.text.splitlines()]
+    # Grouped across batches exactly as the whole result would be
+    assert channels == orjson.loads(
+        orjson.dumps(group_feed_rows(batches[0] + batches[1], 2))
+    )
+    assert [c["channel_alias"] for c in channels] == ["@first", "@second"]
+    assert [a["id"] for a in channels[0]["articles"]] == [3, 2]
+    assert channels[0]["next_cursor"] is not None
+
+
+def test_get_channels_with_articles_fields(test_user):
+    """Test that fields= selects feed columns and limits the article dicts."""
+    headers = {"Authorization": f"Bearer {test_user['token']}"}
+    row = SimpleNamespace(
+        subscription_id=uuid4(),
+        channel_id=1,
+        channel_alias="@sparse_channel",
+        id=5,
+        title="Sparse",
+        url="https://t.me/sparse_channel/5",
+        published_date=datetime(2025, 1, 1),
+    )
+
+    with patch(
+        "app.api.feed.async_crud.get_user_feed",
+        new_callable=AsyncMock,
+        return_value=[row],
+    ) as mock_get_feed:
+        response = client.get("/feed/?fields=link,title", headers=headers)
+
+    assert response.status_code == 200
+    assert mock_get_feed.call_args.kwargs["fields"] == ["id", "title", "url"]
+    assert response.json()[0]["articles"] == [
+        {"id": 5, "title": "Sparse", "link": "https://t.me/sparse_channel/5"}
+    ]
+
+    invalid = client.get("/feed/?fields=content", headers=headers)
+    assert invalid.status_code == 400
@@ -2,9 +2,12 @@
 API tests for routes.
 """
 
+import json
+
 import pytest
 
 from app.db.models import NewsArticle
+from app.schemas.news import NewsArticle as NewsArticleSchema
 
 
 @pytest.fixture(scope="function")
@@ -58,6 +61,32 @@ def test_get_articles_with_filter(
     assert data[0]["title"] == "Test Article 1"
 
 
+def test_get_articles_cursor_pagination(
+    client, clean_articles_table, sample_articles, auth_token
+):
+    """Test paging through articles with the X-Next-Cursor header."""
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    first = client.get("/api/news/articles/?limit=1", headers=headers)
+    assert first.status_code == 200
+    assert len(first.json()) == 1
+    cursor = first.headers["X-Next-Cursor"]
+
+    second = client.get(
+        f"/api/news/articles/?limit=1&cursor={cursor}", headers=headers
+    )
+    assert second.status_code == 200
+    assert len(second.json()) == 1
+    assert second.json()[0]["id"] != first.json()[0]["id"]
+    assert "X-Next-Cursor" not in second.headers
+
+
+def test_get_articles_invalid_cursor(client, clean_articles_table, auth_token):
+    """Test that a malformed cursor is rejected."""
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    response = client.get("/api/news/articles/?cursor=bogus", headers=headers)
+    assert response.status_code == 400
+
+
 def test_get_article_by_id(client, clean_articles_table, sample_articles, auth_token):
     """Test getting an article by ID."""
     article_id = sample_articles[0].id
@@ -76,3 +105,215 @@ def test_get_article_not_found(client, clean_articles_table, auth_token):
     response = client.get("/api/news/articles/999", headers=headers)
     assert response.status_code == 404
     assert "detail" in response.json()
+
+
+def test_get_articles_etag_not_modified(
+    client, test_db, clean_articles_table, sample_articles, auth_token
+):
+    """Test that an unchanged listing answers If-None-Match with 304."""
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    first = client.get("/api/news/articles/", headers=headers)
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+
+    second = client.get(
+        "/api/news/articles/", headers={**headers, "If-None-Match": etag}
+    )
+    assert second.status_code == 304
+    assert second.content == b""
+    assert second.headers["ETag"] == etag
+
+    # Other query parameters are a different representation
+    filtered = client.get(
+        "/api/news/articles/?category=politics",
+        headers={**headers, "If-None-Match": etag},
+    )
+    assert filtered.status_code == 200
+
+    test_db.add(
+        NewsArticle(
+            title="Test Article 3",
+            content="Test content 3",
+            url="http://example.com/article3",
+            source="Test Source",
+            published_date=sample_articles[0].published_date,
+        )
+    )
+    test_db.commit()
+
+    third = client.get(
+        "/api/news/articles/", headers={**headers, "If-None-Match": etag}
+    )
+    assert third.status_code == 200
+    assert len(third.json()) == 3
+    assert third.headers["ETag"] != etag
+
+
+def test_get_articles_served_from_response_cache(
+    client, clean_articles_table, sample_articles, auth_token
+):
+    """Test that a repeated request reuses the cached body."""
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    first = client.get("/api/news/articles/?limit=1", headers=headers)
+    second = client.get("/api/news/articles/?limit=1", headers=headers)
+
+    assert second.status_code == 200
+    assert second.content == first.content
+    assert second.headers["X-Next-Cursor"] == first.headers["X-Next-Cursor"]
+    assert client.get("/metrics").json()["response_cache"]["hits"] == 1
+
+
+def test_get_article_etag_not_modified(
+    client, clean_articles_table, sample_articles, auth_token
+):
+    """Test that an unchanged article answers If-None-Match with 304."""
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    url = f"/api/news/articles/{sample_articles[0].id}"
+    first = client.get(url, headers=headers)
+    etag = first.headers["ETag"]
+
+    second = client.get(url, headers={**headers, "If-None-Match": f"W/{etag}"})
+    assert second.status_code == 304
+
+
+def test_get_articles_lean_rows_match_schema(
+    client, clean_articles_table, sample_articles, auth_token
+):
+    """Test that rows serialized directly match the NewsArticle schema output."""
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    response = client.get("/api/news/articles/?category=politics", headers=headers)
+    assert response.status_code == 200
+
+    expected = NewsArticleSchema.model_validate(
+        sample_articles[0], from_attributes=True
+    ).model_dump(mode="json")
+    assert response.json() == [expected]
+    assert list(response.json()[0]) == list(expected)
+
+
+def test_get_articles_ndjson_stream(
+    client, clean_articles_table, sample_articles, auth_token
+):
+    """Test that NDJSON mode streams the same articles, one per line."""
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    listing = client.get("/api/news/articles/", headers=headers).json()
+
+    response = client.get(
+        "/api/news/articles/",
+        headers={**headers, "Accept": "application/x-ndjson"},
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert "ETag" not in response.headers
+    assert [json.loads(line) for line in response.text.splitlines()] == listing
+
+    first = client.get("/api/news/articles/?stream=true&limit=1", headers=headers)
+    lines = [json.loads(line) for line in first.text.splitlines()]
+    assert lines[0] == listing[0]
+    cursor = lines[1]["next_cursor"]
+
+    second = client.get(
+        f"/api/news/articles/?stream=true&limit=1&cursor={cursor}", headers=headers
+    )
+    assert [json.loads(line) for line in second.text.splitlines()] == [listing[1]]
+
+
+def test_get_articles_fields(client, clean_articles_table, sample_articles, auth_token):
+    """Test that fields= limits listings and single articles to those fields."""
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    response = client.get(
+        "/api/news/articles/?category=politics&fields=category,title", headers=headers
+    )
+    assert response.status_code == 200
+    assert response.json() == [
+        {"id": sample_articles[0].id, "title": "Test Article 1", "category": "politics"}
+    ]
+
+    paged = client.get("/api/news/articles/?limit=1&fields=title", headers=headers)
+    assert list(paged.json()[0]) == ["title", "id"]
+    assert "X-Next-Cursor" in paged.headers
+
+    streamed = client.get(
+        "/api/news/articles/?stream=true&limit=1&fields=title", headers=headers
+    )
+    lines = [json.loads(line) for line in streamed.text.splitlines()]
+    assert lines[0] == paged.json()[0]
+    assert list(lines[1]) == ["next_cursor"]
+
+    url = f"/api/news/articles/{sample_articles[0].id}"
+    single = client.get(f"{url}?fields=url", headers=headers)
+    assert single.json() == {
+        "id": sample_articles[0].id,
+        "url": "http://example.com/article1",
+    }
+    full = client.get(url, headers=headers)
+    assert single.headers["ETag"] != full.headers["ETag"]
+    not_modified = client.get(
+        f"{url}?fields=url",
+        headers={**headers, "If-None-Match": single.headers["ETag"]},
+    )
+    assert not_modified.status_code == 304
+
+    invalid = client.get("/api/news/articles/?fields=hashed_password", headers=headers)
+    assert invalid.status_code == 400
+    assert client.get(f"{url}?fields=", headers=headers).status_code == 400
+
+
+
+def test_search_articles(client, clean_articles_table, sample_articles, auth_token):
+    """Test the ranked search endpoint with snippets, filters and cursors."""
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    response = client.get("/api/news/search?q=content", headers=headers)
+    assert response.status_code == 200
+    results = response.json()
+    assert {r["id"] for r in results} == {a.id for a in sample_articles}
+    assert all("<b>content</b>" in r["snippet"] for r in results)
+    assert [r["score"] for r in results] == sorted(
+        (r["score"] for r in results), reverse=True
+    )
+    assert "ETag" in response.headers
+
+    filtered = client.get(
+        "/api/news/search?q=content&category=politics", headers=headers
+    )
+    assert [r["title"] for r in filtered.json()] == ["Test Article 1"]
+
+    first = client.get("/api/news/search?q=content&limit=1", headers=headers)
+    second = client.get(
+        "/api/news/search",
+        params={"q": "content", "limit": 1, "cursor": first.headers["X-Next-Cursor"]},
+        headers=headers,
+    )
+    assert [r["id"] for r in first.json() + second.json()] == [r["id"] for r in results]
+    assert "X-Next-Cursor" not in second.headers
+
+    assert client.get("/api/news/search?q=%22(", headers=headers).json() == []
+    assert client.get("/api/news/search?q=", headers=headers).status_code == 400
+    invalid = client.get("/api/news/search?q=x&cursor=bogus", headers=headers)
+    assert invalid.status_code == 400
+
+
+def test_semantic_search(
+    client, clean_articles_table, sample_articles, auth_token, test_db, tmp_path,
+    monkeypatch,
+):
+    """Test similarity search over an index synced from the database."""
+    pytest.importorskip("numpy")
+    from app.core.semantic import HashingEmbedder, SemanticIndex, sync_semantic_index
+
+    index = SemanticIndex(str(tmp_path), HashingEmbedder(256))
+    sync_semantic_index(test_db, index)
+    monkeypatch.setattr("app.api.routes.get_semantic_index", lambda: index)
+
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    response = client.get("/api/news/semantic?q=content 2", headers=headers)
+    assert response.status_code == 200
+    results = response.json()
+    assert results[0]["title"] == "Test Article 2"
+    assert {r["id"] for r in results} == {a.id for a in sample_articles}
+    assert results[0]["score"] > results[1]["score"]
+    assert "ETag" in response.headers
+
+    limited = client.get("/api/news/semantic?q=content&limit=1", headers=headers)
+    assert len(limited.json()) == 1
+    assert client.get("/api/news/semantic?q=", headers=headers).status_code == 400
@@ -3,33 +3,69 @@ Common test fixtures for all tests.
 """
 
 import os
+import tempfile
 from datetime import datetime
 from unittest.mock import MagicMock
 
-import pytest
-from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
-
-from app.db.database import Base, get_db
-from app.db.models import NewsArticle
-from app.main import app
+# Cheap password hashes keep the suite fast; must be set before app imports
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+# Keep semantic index files out of the working tree
+os.environ.setdefault("SEMANTIC_INDEX_DIR", tempfile.mkdtemp(prefix="semantic-"))
+# Model calls are mocked per test; tests of the LLM cache build their own
+os.environ.setdefault("LLM_CACHE_MAX_ENTRIES", "0")
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+from sqlalchemy.pool import NullPool, StaticPool  # noqa: E402
+
+from app.core.cache import principal_cache  # noqa: E402
+from app.core.http_cache import response_cache  # noqa: E402
+from app.db.database import (  # noqa: E402
+    Base,
+    get_async_db,
+    get_db,
+    to_async_url,
+)
+from app.db.models import NewsArticle  # noqa: E402
+from app.main import app  # noqa: E402
+
+
+# SQLite file by default; point at a throwaway PostgreSQL database, e.g.
+# the docker-compose "postgres" service, to run the suite against it
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL", "sqlite:///./test.db")
 
 
 # Create in-memory test database
 @pytest.fixture(scope="session")
 def test_engine():
     """Create a test database engine."""
-    engine = create_engine(
-        "sqlite:///./test.db",
-        connect_args={"check_same_thread": False},
-        poolclass=StaticPool,
-    )
+    if TEST_DATABASE_URL.startswith("sqlite"):
+        engine = create_engine(
+            TEST_DATABASE_URL,
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool,
+        )
+    else:
+        engine = create_engine(TEST_DATABASE_URL)
     Base.metadata.create_all(bind=engine)
     yield engine
     Base.metadata.drop_all(bind=engine)
-    os.remove("./test.db")
+    engine.dispose()
+    if TEST_DATABASE_URL == "sqlite:///./test.db":
+        os.remove("./test.db")
+
+
+@pytest.fixture(scope="session")
+def test_async_engine(test_engine):
+    """Create an async engine on the test database."""
+    # TestClient may run each request on a new event loop, so connections
+    # must not be pooled across requests
+    engine = create_async_engine(to_async_url(TEST_DATABASE_URL), poolclass=NullPool)
+    yield engine
+    engine.sync_engine.dispose()
 
 
 @pytest.fixture(scope="function")
@@ -44,6 +80,16 @@ def test_db(test_engine):
         test_db.close()
 
 
+@pytest.fixture(autouse=True)
+def clear_caches():
+    """Keep cached principals and responses from leaking between tests."""
+    principal_cache.clear()
+    response_cache.reset()
+    yield
+    principal_cache.clear()
+    response_cache.reset()
+
+
 @pytest.fixture(scope="function")
 def mock_db_session():
     """Create a mock database session for tests that need to mock the DB."""
@@ -52,7 +98,7 @@ def mock_db_session():
 
 
 @pytest.fixture(scope="function")
-def client(test_db):
+def client(test_db, test_async_engine):
     """Create a test client with the test database."""
 
     def _get_test_db():
@@ -61,7 +107,12 @@ def client(test_db):
         finally:
             pass
 
+    async def _get_test_async_db():
+        async with AsyncSession(test_async_engine, expire_on_commit=False) as db:
+            yield db
+
     app.dependency_overrides[get_db] = _get_test_db
+    app.dependency_overrides[get_async_db] = _get_test_async_db
     with TestClient(app) as client:
         yield client
     app.dependency_overrides.clear()
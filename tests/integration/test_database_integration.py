@@ -3,8 +3,9 @@ Integration tests for database operations.
 """
 
 import pytest
-from sqlalchemy.exc import IntegrityError
+from sqlalchemy.exc import IntegrityError, OperationalError
 
+from app.db.database import create_db_engine
 from app.db.models import NewsArticle
 
 
@@ -104,3 +105,26 @@ def test_article_update(test_db):
     # Clean up
     test_db.delete(article)
     test_db.commit()
+
+
+def test_sqlite_engine_pragmas(tmp_path):
+    """Test that engines from the factory apply the SQLite tuning pragmas."""
+    url = f"sqlite:///{tmp_path / 'pragmas.db'}"
+    write_engine = create_db_engine(url)
+    read_engine = create_db_engine(url, read_only=True)
+
+    with write_engine.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+        # NORMAL is 1
+        assert conn.exec_driver_sql("PRAGMA synchronous").scalar() == 1
+        assert conn.exec_driver_sql("PRAGMA busy_timeout").scalar() > 0
+        conn.exec_driver_sql("CREATE TABLE items (id INTEGER PRIMARY KEY)")
+        conn.commit()
+
+    with read_engine.connect() as conn:
+        assert conn.exec_driver_sql("SELECT count(*) FROM items").scalar() == 0
+        with pytest.raises(OperationalError):
+            conn.exec_driver_sql("INSERT INTO items (id) VALUES (1)")
+
+    write_engine.dispose()
+    read_engine.dispose()
@@ -5,8 +5,10 @@ from unittest.mock import MagicMock, patch
 import pytest
 
 from app.core.ai import (  # client,  # Unused import; client_type,  # Unused import
+    enrich_article,
     generate_article_category,
     generate_article_summary,
+    parse_enrichment,
 )
 
 # Set up detailed logging
@@ -249,3 +251,92 @@ def test_fallback_to_simple_summary():
         assert summary is not None
         assert "This article discusses" in summary
         assert len(summary) <= 153  # 150 chars + "..."
+
+
+def mock_enrichment_answer(mock_client, content):
+    mock_response = MagicMock()
+    mock_response.choices = [MagicMock(message=MagicMock(content=content))]
+    mock_client.chat.completions.create.return_value = mock_response
+
+
+@patch("app.core.ai.client")
+def test_enrich_article_success(mock_client):
+    """Test that one call yields summary, category, keywords and sentiment."""
+    mock_enrichment_answer(
+        mock_client,
+        '{"summary": "A new fish species.", "category": "Science", '
+        '"keywords": ["deep sea", "fish"], "sentiment_score": 0.6}',
+    )
+
+    enrichment = enrich_article(SAMPLE_ARTICLE, SAMPLE_TITLE)
+
+    assert enrichment.ai_summary == "A new fish species."
+    assert enrichment.category == "Science"
+    assert enrichment.keywords == "deep sea, fish"
+    assert enrichment.sentiment_score == 0.6
+    mock_client.chat.completions.create.assert_called_once()
+    kwargs = mock_client.chat.completions.create.call_args.kwargs
+    assert kwargs["response_format"] == {"type": "json_object"}
+    assert SAMPLE_TITLE in kwargs["messages"][1]["content"]
+
+
+def test_parse_enrichment_repairs_answer():
+    """Test that fenced JSON and out-of-range values are repaired."""
+    enrichment = parse_enrichment(
+        "```json\n"
+        '{"summary": " Rates up ", "category": "economy news", '
+        '"keywords": "Rates, rates, , central bank", "sentiment_score": "-3"}'
+        "\n```"
+    )
+
+    assert enrichment.ai_summary == "Rates up"
+    assert enrichment.category == "Economy"
+    assert enrichment.keywords == "Rates, central bank"
+    assert enrichment.sentiment_score == -1.0
+
+
+def test_parse_enrichment_drops_invalid_fields():
+    """Test that invalid fields are left empty and garbage is rejected."""
+    enrichment = parse_enrichment(
+        '{"summary": 42, "keywords": {"a": 1}, "sentiment_score": NaN}'
+    )
+
+    assert enrichment.ai_summary is None
+    assert enrichment.category is None
+    assert enrichment.keywords is None
+    assert enrichment.sentiment_score is None
+    assert parse_enrichment("Sorry, I cannot help with that.") is None
+    assert parse_enrichment("[1, 2]") is None
+
+
+@patch("app.core.ai.client")
+def test_enrich_article_falls_back_on_unusable_answer(mock_client):
+    """Test that an unreadable answer falls back to a simple summary."""
+    mock_enrichment_answer(mock_client, "Science")
+
+    enrichment = enrich_article(SAMPLE_ARTICLE, SAMPLE_TITLE)
+
+    assert enrichment.ai_summary.startswith("Scientists have discovered")
+    assert enrichment.category is None
+    assert enrichment.keywords is None
+
+
+@patch("app.core.ai.client")
+def test_enrich_article_exception(mock_client):
+    """Test enrichment with an exception."""
+    mock_client.chat.completions.create.side_effect = Exception("API Error")
+
+    enrichment = enrich_article(SAMPLE_ARTICLE, SAMPLE_TITLE)
+
+    assert enrichment.ai_summary.startswith("Scientists have discovered")
+    assert enrichment.category is None
+    mock_client.chat.completions.create.assert_called_once()
+
+
+@patch("app.core.ai.client", None)
+def test_enrich_article_no_client():
+    """Test enrichment when the client is not initialized."""
+    enrichment = enrich_article(SAMPLE_ARTICLE, SAMPLE_TITLE)
+
+    assert enrichment.ai_summary is None
+    assert enrichment.category is None
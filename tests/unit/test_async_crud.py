@@ -0,0 +1,129 @@
+"""
+Unit tests for the async CRUD operations.
+"""
+
+import asyncio
+import uuid
+from datetime import datetime
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db import async_crud, crud
+from app.db.models import Bookmark, NewsArticle, User
+
+
+@pytest.fixture(scope="function")
+def clean_articles_table(test_db):
+    """Clean the articles and bookmarks tables before and after tests."""
+    test_db.query(Bookmark).delete()
+    test_db.query(NewsArticle).delete()
+    test_db.commit()
+    yield
+    test_db.query(Bookmark).delete()
+    test_db.query(NewsArticle).delete()
+    test_db.commit()
+
+
+def run_async(engine, func, *args, **kwargs):
+    """Run an async CRUD function in a fresh AsyncSession."""
+
+    async def run():
+        async with AsyncSession(engine, expire_on_commit=False) as db:
+            return await func(db, *args, **kwargs)
+
+    return asyncio.run(run())
+
+
+def test_get_articles_matches_sync(test_db, test_async_engine, clean_articles_table):
+    """Test that async listings return the same rows as the sync CRUD."""
+    for i in range(5):
+        test_db.add(
+            NewsArticle(
+                title=f"Async Article {i}",
+                content="Async content",
+                url=f"http://example.com/async-{i}",
+                source="Async Source" if i % 2 else "Other Source",
+                published_date=datetime(2025, 1, 1, 12, i),
+            )
+        )
+    test_db.commit()
+
+    expected = [a.id for a in crud.get_articles(test_db, source="Async Source")]
+    articles = run_async(
+        test_async_engine, async_crud.get_articles, source="Async Source"
+    )
+
+    assert [a.id for a in articles] == expected
+    assert len(articles) == 2
+
+    article = run_async(test_async_engine, async_crud.get_article, expected[0])
+    assert article.title == "Async Article 3"
+    assert run_async(test_async_engine, async_crud.get_article, -1) is None
+    assert sorted(run_async(test_async_engine, async_crud.get_sources)) == [
+        "Async Source",
+        "Other Source",
+    ]
+
+
+def test_user_and_bookmark_queries(test_db, test_async_engine, clean_articles_table):
+    """Test async user lookup and bookmark queries."""
+    username = f"async_user_{uuid.uuid4().hex[:8]}"
+    user = User(username=username, email=f"{username}@example.com", hashed_password="x")
+    article = NewsArticle(
+        title="Bookmarked",
+        content="Content",
+        url="http://example.com/async-bookmarked",
+        source="Async Source",
+        published_date=datetime(2025, 1, 1),
+    )
+    test_db.add_all([user, article])
+    test_db.commit()
+    crud.add_bookmark(test_db, str(user.id), article.id)
+
+    found = run_async(test_async_engine, async_crud.get_user_by_username, username)
+    assert found.id == user.id
+    assert run_async(test_async_engine, async_crud.get_user_by_username, "nobody") is None
+
+    assert run_async(
+        test_async_engine, async_crud.is_bookmarked, str(user.id), article.id
+    )
+    assert not run_async(test_async_engine, async_crud.is_bookmarked, str(user.id), -1)
+    bookmarks = run_async(test_async_engine, async_crud.get_user_bookmarks, str(user.id))
+    assert [b.article_id for b in bookmarks] == [article.id]
+    articles = run_async(
+        test_async_engine, async_crud.get_bookmarked_articles, str(user.id)
+    )
+    assert [a.title for a in articles] == ["Bookmarked"]
+
+    test_db.delete(user)
+    test_db.commit()
+
+
+def test_stream_article_rows_matches_get(
+    test_db, test_async_engine, clean_articles_table
+):
+    """Test that streamed batches add up to the rows of get_article_rows."""
+    for i in range(5):
+        test_db.add(
+            NewsArticle(
+                title=f"Stream Article {i}",
+                content="Stream content",
+                url=f"http://example.com/stream-{i}",
+                source="Stream Source",
+                published_date=datetime(2025, 1, 1, 12, i),
+            )
+        )
+    test_db.commit()
+
+    async def collect(db):
+        return [
+            [row.id for row in rows]
+            async for rows in async_crud.stream_article_rows(db, batch_size=2)
+        ]
+
+    batches = run_async(test_async_engine, collect)
+    expected = run_async(test_async_engine, async_crud.get_article_rows)
+
+    assert [len(rows) for rows in batches] == [2, 2, 1]
+    assert sum(batches, []) == [row.id for row in expected]
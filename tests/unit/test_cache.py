@@ -0,0 +1,108 @@
+import time
+from datetime import datetime
+
+from app.core.cache import CachedUser, PrincipalCache, RevokedTokens, TTLCache
+
+
+def _user(username="alice", user_id=1):
+    return CachedUser(
+        id=user_id, username=username, email=f"{username}@example.com", is_active=True
+    )
+
+
+def test_ttl_cache_counts_hits_and_misses():
+    cache = TTLCache(maxsize=10, ttl=60)
+    assert cache.get("a") is None
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    assert cache.stats() == {"hits": 1, "misses": 1, "evictions": 0, "size": 1}
+
+
+def test_ttl_cache_expires_entries():
+    cache = TTLCache(maxsize=10, ttl=0.05)
+    cache.set("a", 1)
+    time.sleep(0.06)
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.evictions == 1
+
+
+def test_principal_cache_caps_ttl_at_token_expiry():
+    cache = PrincipalCache(maxsize=10, ttl=60)
+    cache.set("token", _user(), expires_at=time.time() - 1)
+    assert cache.get("token") is None
+
+
+def test_principal_cache_invalidate_user():
+    cache = PrincipalCache(maxsize=10, ttl=60)
+    cache.set("t1", _user())
+    cache.set("t2", _user())
+    cache.set("t3", _user("bob", 2))
+
+    cache.invalidate_user("alice")
+
+    assert cache.get("t1") is None
+    assert cache.get("t2") is None
+    assert cache.get("t3").username == "bob"
+
+
+def test_principal_cache_revoke():
+    cache = PrincipalCache(maxsize=10, ttl=60)
+    cache.set("token", _user())
+
+    cache.revoke("token", expires_at=time.time() + 60)
+
+    assert cache.get("token") is None
+    assert cache.is_revoked("token")
+    assert not cache.is_revoked("other")
+
+
+def test_disabled_principal_cache_still_revokes():
+    cache = PrincipalCache(maxsize=0, ttl=60)
+    cache.set("token", _user())
+    cache.revoke("token")
+    assert cache.get("token") is None
+    assert cache.is_revoked("token")
+
+
+def test_revocations_are_never_evicted_before_expiry():
+    cache = PrincipalCache(maxsize=10, ttl=60)
+    for i in range(100):
+        cache.revoke(f"token-{i}", expires_at=time.time() + 60)
+    assert all(cache.is_revoked(f"token-{i}") for i in range(100))
+
+
+def test_expired_revocations_are_purged():
+    revoked = RevokedTokens(default_ttl=60)
+    revoked.add("old", expires_at=time.time() + 0.05)
+    revoked.add("renewed", expires_at=time.time() + 0.05)
+    revoked.add("renewed", expires_at=time.time() + 60)
+    time.sleep(0.06)
+
+    revoked.add("new")
+
+    assert "old" not in revoked
+    assert "renewed" in revoked and "new" in revoked
+    assert len(revoked) == 2
+
+
+def test_cached_user_json_round_trip():
+    user = CachedUser(
+        id=1,
+        username="alice",
+        email="alice@example.com",
+        is_active=True,
+        created_at=datetime(2024, 1, 2, 3, 4, 5),
+    )
+    assert CachedUser.from_json(user.to_json()) == user
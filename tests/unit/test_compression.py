@@ -0,0 +1,161 @@
+import asyncio
+import gzip
+import zlib
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import Response, StreamingResponse
+
+from app.core.compression import (
+    CHUNK_SIZE,
+    CompressionMiddleware,
+    available_encodings,
+    negotiate_encoding,
+)
+
+SMALL = b'{"ok": true}'
+LARGE = b'{"content": "' + b"Telegram post text. " * 2000 + b'"}'
+HUGE = b"[" + b'{"title": "Article", "content": "Body text"},' * 20000 + b"{}]"
+
+
+
+def decompress(encoding, data):
+    if encoding == "br":
+        return pytest.importorskip("brotli").decompress(data)
+    if encoding == "zstd":
+        zstandard = pytest.importorskip("zstandard")
+        return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    return gzip.decompress(data)
+
+
+def build_app():
+    app = FastAPI()
+
+    @app.get("/small")
+    def small():
+        return Response(SMALL, media_type="application/json")
+
+    @app.get("/large")
+    def large():
+        return Response(LARGE, media_type="application/json", headers={"ETag": '"v1"'})
+
+    @app.get("/huge")
+    def huge():
+        return Response(HUGE, media_type="application/json")
+
+    @app.get("/image")
+    def image():
+        return Response(LARGE, media_type="image/png")
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse(
+            (line for line in (b'{"id": 1}\n', b'{"id": 2}\n')),
+            media_type="application/x-ndjson",
+        )
+
+    return CompressionMiddleware(app, minimum_size=100)
+
+
+def call(app, path, accept_encoding):
+    """Run one request through the ASGI app and collect the sent messages."""
+    messages = []
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "headers": [(b"accept-encoding", accept_encoding.encode())],
+        "http_version": "1.1",
+        "scheme": "http",
+        "server": ("test", 80),
+        "client": ("test", 1234),
+        "root_path": "",
+        # ASGI 2.4 servers report disconnects through send(), so streaming
+        # responses do not poll receive()
+        "asgi": {"version": "3.0", "spec_version": "2.4"},
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    start = messages[0]
+    headers = {k.decode().lower(): v.decode() for k, v in start["headers"]}
+    bodies = [m.get("body", b"") for m in messages[1:]]
+    return headers, bodies
+
+
+@pytest.mark.parametrize(
+    "header,expected",
+    [
+        ("gzip, deflate, br, zstd", "br"),
+        ("gzip, zstd", "zstd"),
+        ("gzip;q=1.0, br;q=0.5", "gzip"),
+        ("br;q=0, gzip", "gzip"),
+        ("*", "br"),
+        ("identity", None),
+        ("gzip;q=0", None),
+    ],
+)
+def test_negotiate_encoding(header, expected):
+    assert negotiate_encoding(header, ["br", "zstd", "gzip"]) == expected
+
+
+# brotli and zstandard are optional; only installed encodings are offered
+@pytest.mark.parametrize("encoding", available_encodings())
+def test_large_response_is_compressed(encoding):
+    headers, bodies = call(build_app(), "/large", encoding)
+    body = b"".join(bodies)
+
+    assert headers["content-encoding"] == encoding
+    assert headers["vary"] == "Accept-Encoding"
+    assert headers["etag"] == 'W/"v1"'
+    assert int(headers["content-length"]) == len(body) < len(LARGE)
+    assert decompress(encoding, body) == LARGE
+
+
+def test_small_and_binary_responses_are_not_compressed():
+    headers, bodies = call(build_app(), "/small", "gzip")
+    assert "content-encoding" not in headers
+    assert b"".join(bodies) == SMALL
+
+    headers, bodies = call(build_app(), "/image", "gzip")
+    assert "content-encoding" not in headers
+    assert b"".join(bodies) == LARGE
+
+
+def test_huge_response_is_compressed_in_slices():
+    assert len(HUGE) > CHUNK_SIZE
+    headers, bodies = call(build_app(), "/huge", "gzip")
+
+    assert "content-length" not in headers
+    assert len(bodies) > 1
+    assert decompress("gzip", b"".join(bodies)) == HUGE
+
+
+def test_streaming_response_is_flushed_per_chunk():
+    headers, bodies = call(build_app(), "/stream", "gzip")
+    assert headers["content-encoding"] == "gzip"
+
+    # The first chunk decodes on its own, so clients see it immediately
+    decoder = zlib.decompressobj(31)
+    assert decoder.decompress(bodies[0]) == b'{"id": 1}\n'
+    rest = b"".join(bodies[1:])
+    assert decoder.decompress(rest) == b'{"id": 2}\n'
+
+
+def test_application_headers_are_not_modified():
+    """Test that a reused Response object is compressed on every request."""
+    response = Response(LARGE, media_type="application/json")
+    middleware = CompressionMiddleware(response, minimum_size=100)
+
+    for _ in range(2):
+        headers, bodies = call(middleware, "/", "gzip")
+        assert headers["content-encoding"] == "gzip"
+        assert decompress("gzip", b"".join(bodies)) == LARGE
+    assert b"content-encoding" not in dict(response.raw_headers)
@@ -106,6 +106,36 @@ def test_get_articles(test_db, clean_articles_table):
     assert articles[1].title in ["Test Article 1", "Test Article 2"]
 
 
+def test_get_articles_keyset_pages(test_db, clean_articles_table):
+    """Test that keyset pages cover every article once, including ties."""
+    same_time = datetime(2025, 1, 1, 12, 0)
+    for i in range(7):
+        test_db.add(
+            NewsArticle(
+                title=f"Keyset Article {i}",
+                content="Test content",
+                url=f"http://example.com/keyset-{i}",
+                source="Test Source",
+                # Two groups of identical timestamps exercise the id tie-break
+                published_date=same_time if i < 4 else datetime(2025, 1, 2),
+            )
+        )
+    test_db.commit()
+
+    seen = []
+    after = None
+    while True:
+        page = crud.get_articles(test_db, limit=3, after=after)
+        if not page:
+            break
+        seen.extend(article.id for article in page)
+        after = (page[-1].published_date, page[-1].id)
+
+    everything = crud.get_articles(test_db, limit=100)
+    assert seen == [article.id for article in everything]
+    assert len(seen) == 7
+
+
 def test_get_articles_with_source_filter(test_db, clean_articles_table):
     """Test getting articles filtered by source."""
     # Create fresh test articles for this specific test
@@ -176,3 +206,75 @@ def test_get_articles_with_category_filter(test_db, clean_articles_table):
     articles = crud.get_articles(test_db, category="technology")
     assert len(articles) == 1
     assert articles[0].title == "Test Article 2"
+
+
+def test_get_existing_article_urls(test_db, clean_articles_table):
+    """Test checking a batch of URLs with one set-based lookup."""
+    test_db.add(
+        NewsArticle(
+            title="Stored",
+            content="Stored content",
+            url="http://example.com/stored",
+            source="Test Source",
+            published_date=datetime.now(),
+        )
+    )
+    test_db.commit()
+
+    existing = crud.get_existing_article_urls(
+        test_db, ["http://example.com/stored", "http://example.com/new", ""]
+    )
+    assert existing == {"http://example.com/stored"}
+
+
+def test_get_existing_entry_keys(test_db, clean_articles_table):
+    """Test that entry keys match stored URLs as well as stored GUIDs."""
+    test_db.add(
+        NewsArticle(
+            title="Stored",
+            content="Stored content",
+            url="http://example.com/stored",
+            guid="guid-1",
+            source="Test Source",
+            published_date=datetime.now(),
+        )
+    )
+    test_db.commit()
+
+    existing = crud.get_existing_entry_keys(
+        test_db, ["http://example.com/stored", "guid-1", "guid-2", ""]
+    )
+    assert existing == {"http://example.com/stored", "guid-1"}
+
+
+def test_bulk_upsert_articles(test_db, clean_articles_table):
+    """Test inserting new rows and updating changed ones in one call."""
+    rows = [
+        {
+            "title": f"Bulk {i}",
+            "content": "Bulk content",
+            "url": f"http://example.com/bulk-{i}",
+            "source": "Test Source",
+            "published_date": datetime(2025, 1, 1, 12, i),
+        }
+        for i in range(3)
+    ]
+    assert crud.bulk_upsert_articles(test_db, rows) == 3
+    assert test_db.query(NewsArticle).count() == 3
+
+    changed = dict(rows[0], title="Bulk 0 updated", ai_summary="Summary")
+    added = dict(rows[2], url="http://example.com/bulk-3")
+    # Only inserts are counted, not the updated or unchanged rows
+    assert crud.bulk_upsert_articles(test_db, [changed, rows[1], added]) == 1
+    test_db.expire_all()
+
+    assert test_db.query(NewsArticle).count() == 4
+    updated = crud.get_article_by_url(test_db, "http://example.com/bulk-0")
+    assert updated.title == "Bulk 0 updated"
+    assert updated.ai_summary == "Summary"
+
+
+def test_bulk_upsert_articles_requires_url(test_db, clean_articles_table):
+    """Test that rows without a URL are rejected."""
+    with pytest.raises(ValueError):
+        crud.bulk_upsert_articles(test_db, [{"title": "No URL"}])
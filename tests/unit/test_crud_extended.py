@@ -1,26 +1,33 @@
 import logging
 import uuid
-from datetime import datetime
+from datetime import datetime, timedelta
 
 import pytest
-from sqlalchemy import inspect, text
+from sqlalchemy import event, inspect, text
 from sqlalchemy.orm import Session
 
+from app.core.dedup import simhash, to_signed
 from app.db.crud import (
     add_bookmark,
     add_user_channel,
+    assign_article_clusters,
     create_or_update_article,
     delete_channel,
+    find_near_duplicate,
     get_article_by_url,
     get_articles,
     get_channel,
     get_user_bookmarks,
+    get_or_create_channel,
     get_user_channels,
+    get_user_feed,
     is_bookmarked,
     remove_bookmark,
+    search_terms,
+    select_search,
     update_channel,
 )
-from app.db.models import User
+from app.db.models import NewsArticle, User
 
 # Set up detailed logging
 logging.basicConfig(level=logging.DEBUG)
@@ -214,18 +221,18 @@ def test_user_channel_operations(test_db: Session, sample_user):
     user_id = str(sample_user.id)
     logger.debug(f"User ID: {user_id}, Type: {type(user_id)}")
 
-    # Log UserChannels table schema
+    # Log subscriptions table schema
     try:
         inspector = inspect(test_db.bind)
-        columns = [col for col in inspector.get_columns("user_channels")]
-        logger.debug(f"UserChannels table columns: {columns}")
+        columns = [col for col in inspector.get_columns("subscriptions")]
+        logger.debug(f"Subscriptions table columns: {columns}")
 
         # Check column types
         for col in columns:
             if col["name"] == "id":
-                logger.debug(f"UserChannels.id column type: {col['type']}")
+                logger.debug(f"Subscriptions.id column type: {col['type']}")
     except Exception as e:
-        logger.error(f"Error inspecting UserChannels table: {str(e)}")
+        logger.error(f"Error inspecting subscriptions table: {str(e)}")
 
     # Add channels
     logger.debug(f"Adding channel @channel1 for user {user_id}")
@@ -257,7 +264,7 @@ def test_user_channel_operations(test_db: Session, sample_user):
     # Using SQLAlchemy directly with raw SQL to work around UUID issues
     try:
         result = test_db.execute(
-            text("SELECT * FROM user_channels WHERE id = :id"), {"id": str(channel1.id)}
+            text("SELECT * FROM subscriptions WHERE id = :id"), {"id": str(channel1.id)}
         ).fetchall()
         logger.debug(f"Raw SQL result for channel {channel_id}: {result}")
 
@@ -311,6 +318,308 @@ def test_user_channel_operations(test_db: Session, sample_user):
     logger.debug("User channel operations test completed")
 
 
+def test_subscriptions_share_normalized_channel(test_db: Session, sample_user):
+    """Test that alias spellings map to one channel and one subscription."""
+    user_id = str(sample_user.id)
+
+    first = add_user_channel(test_db, user_id, "@Normalized_Channel")
+    second = add_user_channel(test_db, user_id, "normalized_channel")
+
+    assert first.id == second.id
+    assert first.channel_alias == "@normalized_channel"
+    assert get_or_create_channel(test_db, " @NORMALIZED_channel").id == first.channel_id
+    assert len(get_user_channels(test_db, user_id)) == 1
+
+    delete_channel(test_db, first.id)
+
+
+def test_get_user_feed_single_query(test_db: Session, sample_user):
+    """Test that the feed is built by one query with a per-channel cap."""
+    user_id = str(sample_user.id)
+    busy = add_user_channel(test_db, user_id, "@feed_busy")
+    quiet = add_user_channel(test_db, user_id, "@feed_quiet")
+    add_user_channel(test_db, "someone_else", "@feed_other")
+
+    for i in range(5):
+        create_or_update_article(
+            test_db,
+            {
+                "title": f"Busy {i}",
+                "content": "Busy content",
+                "url": f"https://example.com/feed-busy-{uuid.uuid4()}",
+                "source": "@feed_busy",
+                "channel_id": busy.channel_id,
+                "published_date": datetime(2025, 1, 1, 12, i),
+            },
+        )
+
+    statements = []
+    listener = lambda *args: statements.append(args[2])  # noqa: E731
+    event.listen(test_db.bind, "before_cursor_execute", listener)
+    try:
+        rows = get_user_feed(test_db, user_id, per_channel_limit=3)
+    finally:
+        event.remove(test_db.bind, "before_cursor_execute", listener)
+
+    assert len(statements) == 1
+    assert [row.title for row in rows if row.channel_alias == "@feed_busy"] == [
+        "Busy 4",
+        "Busy 3",
+        "Busy 2",
+    ]
+    quiet_rows = [row for row in rows if row.channel_alias == "@feed_quiet"]
+    assert len(quiet_rows) == 1 and quiet_rows[0].id is None
+    assert all(row.channel_alias != "@feed_other" for row in rows)
+
+    test_db.query(NewsArticle).filter(NewsArticle.channel_id == busy.channel_id).delete()
+    test_db.commit()
+    delete_channel(test_db, busy.id)
+    delete_channel(test_db, quiet.id)
+
+
+def test_get_user_feed_limit_cuts_through_ties(test_db: Session, sample_user):
+    """Test that articles published at the same time are capped by id."""
+    user_id = str(sample_user.id)
+    tied = add_user_channel(test_db, user_id, "@feed_tied")
+
+    ids = [
+        create_or_update_article(
+            test_db,
+            {
+                "title": f"Tied {i}",
+                "content": "Tied content",
+                "url": f"https://example.com/feed-tied-{uuid.uuid4()}",
+                "source": "@feed_tied",
+                "channel_id": tied.channel_id,
+                "published_date": datetime(2025, 1, 1, 12, 0),
+            },
+        ).id
+        for i in range(4)
+    ]
+
+    rows = get_user_feed(
+        test_db, user_id, per_channel_limit=3, channel_id=tied.channel_id
+    )
+
+    assert [row.id for row in rows] == sorted(ids, reverse=True)[:3]
+
+    test_db.query(NewsArticle).filter(NewsArticle.channel_id == tied.channel_id).delete()
+    test_db.commit()
+    delete_channel(test_db, tied.id)
+
+
+def test_get_user_feed_after_cursor(test_db: Session, sample_user):
+    """Test paging one channel of the feed from a cursor position."""
+    user_id = str(sample_user.id)
+    busy = add_user_channel(test_db, user_id, "@feed_paged")
+    other = add_user_channel(test_db, user_id, "@feed_unpaged")
+
+    for i in range(5):
+        create_or_update_article(
+            test_db,
+            {
+                "title": f"Paged {i}",
+                "content": "Paged content",
+                "url": f"https://example.com/feed-paged-{uuid.uuid4()}",
+                "source": "@feed_paged",
+                "channel_id": busy.channel_id,
+                "published_date": datetime(2025, 1, 1, 12, i),
+            },
+        )
+
+    first = get_user_feed(test_db, user_id, per_channel_limit=2)
+    first_busy = [row for row in first if row.channel_id == busy.channel_id]
+    last = first_busy[-1]
+
+    rows = get_user_feed(
+        test_db,
+        user_id,
+        per_channel_limit=2,
+        channel_id=busy.channel_id,
+        after=(last.published_date, last.id),
+    )
+
+    assert [row.title for row in first_busy] == ["Paged 4", "Paged 3"]
+    assert [row.title for row in rows] == ["Paged 2", "Paged 1"]
+    assert {row.channel_id for row in rows} == {busy.channel_id}
+
+    test_db.query(NewsArticle).filter(NewsArticle.channel_id == busy.channel_id).delete()
+    test_db.commit()
+    delete_channel(test_db, busy.id)
+    delete_channel(test_db, other.id)
+
+
+def test_get_user_feed_fields(test_db: Session, sample_user):
+    """Test that a feed fieldset leaves unrequested columns out of the query."""
+    user_id = str(sample_user.id)
+    channel = add_user_channel(test_db, user_id, "@feed_sparse")
+    create_or_update_article(
+        test_db,
+        {
+            "title": "Sparse",
+            "content": "Long article text",
+            "url": f"https://example.com/feed-sparse-{uuid.uuid4()}",
+            "source": "@feed_sparse",
+            "channel_id": channel.channel_id,
+            "published_date": datetime(2025, 1, 1),
+        },
+    )
+
+    statements = []
+    listener = lambda *args: statements.append(args[2])  # noqa: E731
+    event.listen(test_db.bind, "before_cursor_execute", listener)
+    try:
+        rows = get_user_feed(test_db, user_id, fields=["title", "url"])
+    finally:
+        event.remove(test_db.bind, "before_cursor_execute", listener)
+
+    assert "content" not in statements[0]
+    assert list(rows[0]._fields) == [
+        "subscription_id",
+        "channel_id",
+        "channel_alias",
+        "id",
+        "title",
+        "url",
+        "published_date",
+    ]
+    assert rows[0].title == "Sparse"
+
+    test_db.query(NewsArticle).filter(
+        NewsArticle.channel_id == channel.channel_id
+    ).delete()
+    test_db.commit()
+    delete_channel(test_db, channel.id)
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("energy", '"energy"'),
+        ('clean  "solar energy" C++', '"clean" "solar energy" "C"'),
+        ('e-mail "unterminated', '"e mail" "unterminated"'),
+        ("OR NOT *", '"OR" "NOT"'),
+        (' ( ) " ', None),
+    ],
+)
+def test_search_terms(text, expected):
+    """Test that user input becomes a quoted, syntax-safe expression."""
+    assert search_terms(text) == expected
+
+
+def test_select_search(test_db: Session):
+    """Test ranking, filters, cursor paging and index sync of the search."""
+    dialect = test_db.bind.dialect.name
+    articles = [
+        create_or_update_article(
+            test_db,
+            {
+                "title": title,
+                "content": content,
+                "url": f"https://example.com/search-{uuid.uuid4()}",
+                "source": "@search",
+                "category": category,
+                "published_date": datetime(2025, 1, day),
+            },
+        )
+        for title, content, category, day in [
+            ("Quasar found", "Astronomers report a quasar", "Science", 1),
+            ("Weekly digest", "Also: a quasar, briefly", "Science", 2),
+            ("Football", "Nothing about space", "Sports", 3),
+        ]
+    ]
+    ids = [article.id for article in articles]
+
+    def search(text, **kwargs):
+        query = select_search(dialect, search_terms(text), **kwargs)
+        return test_db.execute(query).all()
+
+    rows = search("quasar")
+    # A title match outranks a match in the content only
+    assert [row.id for row in rows] == ids[:2]
+    assert rows[0].score > rows[1].score
+    assert "<b>quasar</b>" in rows[0].snippet.lower()
+
+    assert search("quasar", category="Sports") == []
+    assert [row.id for row in search("quasar", since=datetime(2025, 1, 2))] == [ids[1]]
+    assert [row.id for row in search("quasar", until=datetime(2025, 1, 2))] == [ids[0]]
+
+    first = search("quasar", limit=1)
+    rest = search("quasar", after=(first[0].score, first[0].id))
+    assert [row.id for row in first + rest] == ids[:2]
+
+    # Triggers (or the generated column) follow updates and deletes
+    create_or_update_article(
+        test_db,
+        {
+            "title": "Football",
+            "content": "The quasar of midfielders",
+            "url": articles[2].url,
+            "source": "@search",
+        },
+    )
+    assert ids[2] in [row.id for row in search("midfielders quasar")]
+    test_db.query(NewsArticle).filter(NewsArticle.id.in_(ids)).delete()
+    test_db.commit()
+    assert search("quasar") == []
+
+
+def test_assign_article_clusters(test_db: Session, monkeypatch):
+    """Test that near duplicates within the window join the oldest cluster."""
+    story = (
+        "Parliament approved the new budget late on Thursday after a long "
+        "debate about defence spending, pensions and regional subsidies that "
+        "the opposition criticised as insufficient for the coming winter."
+    )
+    texts = [story, f"{story} Read more", "Storms closed schools in three regions today."]
+    days = [1, 2, 20]
+    urls = [f"https://example.com/dup-{uuid.uuid4()}" for _ in texts]
+    for url, content, day in zip(urls, texts, days):
+        create_or_update_article(
+            test_db,
+            {
+                "title": "Budget",
+                "content": content,
+                "url": url,
+                "source": "@dup",
+                "published_date": datetime(2025, 1, day),
+                "simhash": to_signed(simhash(content)),
+            },
+        )
+    # The far-off article is a copy of the story, but outside the window
+    create_or_update_article(
+        test_db,
+        {
+            "title": "Budget",
+            "content": story,
+            "url": urls[2],
+            "source": "@dup",
+            "simhash": to_signed(simhash(story)),
+        },
+    )
+
+    assert assign_article_clusters(test_db, urls, 7, timedelta(days=3)) == 1
+    test_db.commit()
+    articles = [get_article_by_url(test_db, url) for url in urls]
+    for article in articles:
+        test_db.refresh(article)
+    assert articles[1].cluster_id == articles[0].cluster_id == articles[0].id
+    assert articles[2].cluster_id == articles[2].id
+
+    match = find_near_duplicate(test_db, simhash(story), 7)
+    assert match.id == articles[0].id
+    assert find_near_duplicate(test_db, simhash(story), 7, datetime(2025, 1, 10)).id == (
+        articles[2].id
+    )
+    assert find_near_duplicate(test_db, simhash("Unrelated words entirely"), 7) is None
+    # Only the newest candidates are compared
+    monkeypatch.setattr("app.db.crud.NEAR_DUPLICATE_CANDIDATES", 1)
+    assert find_near_duplicate(test_db, simhash(story), 7).id == articles[2].id
+
+    test_db.query(NewsArticle).filter(NewsArticle.url.in_(urls)).delete()
+    test_db.commit()
+
+
 def test_bookmark_operations(test_db: Session, sample_user, sample_article_data):
     """Test bookmark operations."""
     user_id = str(sample_user.id)
@@ -0,0 +1,81 @@
+"""
+Unit tests for SimHash near-duplicate fingerprints.
+"""
+
+import random
+
+from app.core.dedup import (
+    BAND_BITS,
+    FINGERPRINT_BITS,
+    MAX_GUARANTEED_DISTANCE,
+    PROBE_RADIUS,
+    SIMHASH_BANDS,
+    band_buckets,
+    from_signed,
+    hamming_distance,
+    probe_buckets,
+    simhash,
+    to_signed,
+)
+
+STORY = (
+    "Центробанк России повысил ключевую ставку до 21% годовых. Это "
+    "максимальный уровень с 2003 года. Решение совет директоров принял на "
+    "заседании в пятницу, следующее заседание пройдет в декабре."
+)
+
+
+def test_simhash_is_stable_and_case_insensitive():
+    """Test that fingerprints only depend on the lowercased words."""
+    assert simhash(STORY) == simhash(STORY.upper())
+    assert simhash(STORY) == simhash(STORY.replace(" ", "  "))
+    assert 0 <= simhash(STORY) < 2**FINGERPRINT_BITS
+    assert simhash(" -- ") == 0
+
+
+def test_simhash_keeps_reposts_close():
+    """Test that a repost with a footer is much closer than another story."""
+    repost = f"⚡️ {STORY}\n\nПодписаться | РБК"
+    other = "Футбольный клуб Зенит обыграл Спартак со счетом 2:1 в субботу вечером."
+    assert hamming_distance(simhash(STORY), simhash(repost)) <= 6
+    assert hamming_distance(simhash(STORY), simhash(other)) > 12
+
+
+def test_close_fingerprints_share_a_probed_bucket():
+    """Test the pigeonhole guarantee behind the multi-probe LSH lookup."""
+    fingerprint = simhash(STORY)
+
+    def probed(other):
+        return any(
+            theirs in probe_buckets(ours)
+            for ours, theirs in zip(band_buckets(fingerprint), band_buckets(other))
+        )
+
+    # Spread the differing bits as evenly over the bands as possible
+    bits = [
+        band * BAND_BITS + offset
+        for offset in range(PROBE_RADIUS + 1)
+        for band in range(SIMHASH_BANDS)
+    ]
+    near = fingerprint
+    for bit in bits[:MAX_GUARANTEED_DISTANCE]:
+        near ^= 1 << bit
+    assert hamming_distance(fingerprint, near) == MAX_GUARANTEED_DISTANCE
+    assert len(band_buckets(near)) == SIMHASH_BANDS
+    assert probed(near)
+    assert not probed(near ^ 1 << bits[MAX_GUARANTEED_DISTANCE])
+
+    rng = random.Random(7)
+    for _ in range(200):
+        other = fingerprint
+        for bit in rng.sample(range(FINGERPRINT_BITS), MAX_GUARANTEED_DISTANCE):
+            other ^= 1 << bit
+        assert probed(other)
+
+
+def test_signed_round_trip():
+    """Test storing fingerprints in a signed 64-bit column."""
+    for fingerprint in (0, 1, 2**63 - 1, 2**63, 2**64 - 1):
+        value = to_signed(fingerprint)
+        assert -(2**63) <= value < 2**63
+        assert from_signed(value) == fingerprint
@@ -0,0 +1,31 @@
+"""
+Unit tests for sparse fieldset parsing.
+"""
+
+import pytest
+
+from app.core.fields import InvalidFieldsError, parse_fields
+
+ALLOWED = ("id", "title", "content", "url", "category")
+
+
+def test_parse_fields_absent():
+    """Test that a missing parameter selects every field."""
+    assert parse_fields(None, ALLOWED) is None
+
+
+def test_parse_fields_keeps_output_order_and_id():
+    """Test that fields follow the full representation's order and keep id."""
+    assert parse_fields(" category ,title,,title", ALLOWED) == [
+        "id",
+        "title",
+        "category",
+    ]
+    assert parse_fields("url", ALLOWED, always=()) == ["url"]
+
+
+@pytest.mark.parametrize("fields", ["", " , ", "title,bogus", "hashed_password"])
+def test_parse_fields_rejects_invalid(fields):
+    """Test that empty or unknown fieldsets are rejected."""
+    with pytest.raises(InvalidFieldsError):
+        parse_fields(fields, ALLOWED)
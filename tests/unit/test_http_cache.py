@@ -0,0 +1,41 @@
+from starlette.requests import Request
+
+from app.core.http_cache import etag_matches, make_etag, request_key
+
+
+def _request(query=b"", if_none_match=None):
+    headers = []
+    if if_none_match is not None:
+        headers.append((b"if-none-match", if_none_match.encode()))
+    return Request(
+        {
+            "type": "http",
+            "method": "GET",
+            "path": "/api/news/articles/",
+            "query_string": query,
+            "headers": headers,
+        }
+    )
+
+
+def test_make_etag_is_strong_and_stable():
+    etag = make_etag("/feed/", (1, 2))
+    assert etag.startswith('"') and etag.endswith('"')
+    assert etag == make_etag("/feed/", (1, 2))
+    assert etag != make_etag("/feed/", (1, 3))
+
+
+def test_etag_matches_lists_weak_tags_and_wildcard():
+    etag = make_etag("x")
+    assert etag_matches(_request(if_none_match=etag), etag)
+    assert etag_matches(_request(if_none_match=f'"other", W/{etag}'), etag)
+    assert etag_matches(_request(if_none_match="*"), etag)
+    assert not etag_matches(_request(if_none_match='"other"'), etag)
+    assert not etag_matches(_request(), etag)
+
+
+def test_request_key_ignores_query_order():
+    first = request_key(_request(b"limit=1&source=a"), "1")
+    second = request_key(_request(b"source=a&limit=1"), "1")
+    assert first == second
+    assert first != request_key(_request(b"source=a&limit=1"), "2")
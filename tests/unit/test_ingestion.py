@@ -0,0 +1,487 @@
+"""
+Unit tests for the asynchronous ingestion engine.
+"""
+
+import asyncio
+import time
+from unittest.mock import AsyncMock, patch
+
+import feedparser
+import httpx
+import pytest
+
+from app.core.ai import ArticleEnrichment
+from app.core.http_cache import response_cache
+from app.core.ingestion import (
+    AsyncRateLimiter,
+    ChannelCoalescer,
+    IngestConfig,
+    IngestStats,
+    channel_coalescer,
+    conditional_headers,
+    extract_plain_text,
+    feed_url,
+    ingest_channels,
+    normalize_channel_alias,
+    parse_published_date,
+    select_unseen_entries,
+)
+from app.db.models import ChannelFetchState, NewsArticle
+
+SUMMARY = ArticleEnrichment("Summary", "Technology", "news", 0.0)
+EMPTY = ArticleEnrichment()
+RATES_UP = ArticleEnrichment("Rates up", "Economy", "central bank, interest rate", -0.4)
+
+LONG_TEXT = "Breaking news content that is comfortably longer than fifty characters."
+
+
+def entry_text(channel, i):
+    """Description of an entry that is no near duplicate of any other entry."""
+    words = " ".join(f"{channel}{i}w{j}" for j in range(12))
+    return f"{LONG_TEXT} {words}"
+
+
+def build_feed(channel, count, text=entry_text):
+    """Render a minimal RSS document with `count` entries."""
+    items = "".join(
+        f"<item><title>{channel} {i}</title>"
+        f"<link>https://t.me/{channel}/{i}</link>"
+        f"<description>{text(channel, i)}</description>"
+        f"<pubDate>Mon, 01 Jan 2025 12:00:00 GMT</pubDate></item>"
+        for i in range(count)
+    )
+    return f'<?xml version="1.0"?><rss version="2.0"><channel>{items}</channel></rss>'
+
+
+@pytest.fixture(scope="function")
+def clean_articles_table(test_db):
+    """Clean the articles and fetch state tables before and after tests."""
+    test_db.query(NewsArticle).delete()
+    test_db.query(ChannelFetchState).delete()
+    test_db.commit()
+    channel_coalescer.clear()
+    yield
+    test_db.query(NewsArticle).delete()
+    test_db.query(ChannelFetchState).delete()
+    test_db.commit()
+    channel_coalescer.clear()
+
+
+def test_feed_url_strips_at_sign():
+    """Test building the RSS URL for a channel alias."""
+    assert feed_url("@news", "http://localhost/rss/") == "http://localhost/rss/news"
+
+
+def test_parse_published_date_fallback():
+    """Test that unparsable dates fall back to now."""
+    parsed = parse_published_date({"published": "not a date"})
+    assert parsed is not None
+    assert parse_published_date(
+        {"published": "Mon, 01 Jan 2025 12:00:00 GMT"}
+    ).year == 2025
+
+
+def test_rate_limiter_spaces_calls():
+    """Test that the limiter never starts more than `rate` calls per second."""
+
+    async def run():
+        limiter = AsyncRateLimiter(rate=20)
+        start = time.perf_counter()
+        for _ in range(5):
+            await limiter.acquire()
+        return time.perf_counter() - start
+
+    # Five calls at 20/s need at least four 50ms intervals
+    assert asyncio.run(run()) >= 0.19
+
+
+@patch("app.core.ingestion.enrich_article", return_value=SUMMARY)
+def test_ingest_channels_concurrently(mock_enrich, test_db, clean_articles_table):
+    """Test that several channels are ingested in one run."""
+
+    def handler(request):
+        channel = request.url.path.rsplit("/", 1)[-1]
+        return httpx.Response(200, text=build_feed(channel, 3))
+
+    config = IngestConfig(base_url="http://stub/rss", ai_rate_per_second=0)
+    results = asyncio.run(
+        ingest_channels(
+            ["@alpha", "@beta"], test_db, config, transport=httpx.MockTransport(handler)
+        )
+    )
+
+    assert [r.channel_alias for r in results] == ["@alpha", "@beta"]
+    assert all(r.new_articles == 3 for r in results)
+    assert test_db.query(NewsArticle).count() == 6
+    assert test_db.query(NewsArticle).filter(NewsArticle.channel_id.is_(None)).count() == 0
+    assert mock_enrich.call_count == 6
+
+
+@patch("app.core.ingestion.enrich_article", return_value=EMPTY)
+@patch("app.core.ingestion.cached_enrichment", return_value=SUMMARY)
+def test_llm_cache_hits_skip_the_rate_limiter(
+    mock_cached, mock_enrich, test_db, clean_articles_table
+):
+    """Test that cached enrichments take no AI slot or rate limit budget."""
+
+    def handler(request):
+        return httpx.Response(200, text=build_feed("cached", 3))
+
+    config = IngestConfig(base_url="http://stub/rss", ai_rate_per_second=1)
+    with patch.object(AsyncRateLimiter, "acquire", new_callable=AsyncMock) as acquire:
+        results = asyncio.run(
+            ingest_channels(
+                ["@cached"], test_db, config, transport=httpx.MockTransport(handler)
+            )
+        )
+
+    assert results[0].new_articles == 3
+    assert mock_cached.call_count == 3
+    assert acquire.await_count == 0
+    assert mock_enrich.call_count == 0
+    assert {a.ai_summary for a in test_db.query(NewsArticle)} == {"Summary"}
+
+
+@patch("app.core.ingestion.enrich_article", return_value=EMPTY)
+def test_ingest_channels_reports_fetch_failure(
+    mock_enrich, test_db, clean_articles_table
+):
+    """Test that a failing channel does not abort the others."""
+
+    def handler(request):
+        if request.url.path.endswith("/broken"):
+            return httpx.Response(500)
+        return httpx.Response(200, text=build_feed("ok", 1))
+
+    config = IngestConfig(base_url="http://stub/rss", retry_count=1)
+    with patch("app.core.ingestion.asyncio.sleep"):
+        results = asyncio.run(
+            ingest_channels(
+                ["@broken", "@ok"], test_db, config, transport=httpx.MockTransport(handler)
+            )
+        )
+
+    assert results[0].errors
+    assert results[1].new_articles == 1
+
+
+def test_select_unseen_entries_matches_links_and_guids():
+    """Test that the pre-filter drops known links, known GUIDs and repeats."""
+    entries = [
+        {"link": "https://t.me/c/1", "id": "guid-1"},
+        {"link": "https://t.me/c/2", "id": "https://t.me/c/known"},
+        {"link": "https://t.me/c/3"},
+        {"link": "https://t.me/c/3"},
+        {"title": "no link"},
+    ]
+    stats = IngestStats(channel_alias="@c")
+
+    known = {"https://t.me/c/1", "https://t.me/c/known"}
+    unseen = select_unseen_entries(entries, known, stats)
+
+    assert [e["link"] for e in unseen] == ["https://t.me/c/3"]
+    assert stats.skipped_known == 3
+    assert stats.skipped_no_url == 1
+
+
+@patch("app.core.ingestion.extract_plain_text", wraps=extract_plain_text)
+@patch("app.core.ingestion.enrich_article", return_value=SUMMARY)
+def test_repoll_skips_parsing_and_enrichment(
+    mock_enrich, mock_extract, test_db, clean_articles_table
+):
+    """Test that on a re-poll only unseen entries are parsed and enriched."""
+    feeds = [build_feed("alpha", 4), build_feed("alpha", 5)]
+
+    def handler(request):
+        return httpx.Response(200, text=feeds.pop(0))
+
+    config = IngestConfig(
+        base_url="http://stub/rss", ai_rate_per_second=0, freshness_seconds=0
+    )
+    transport = httpx.MockTransport(handler)
+    asyncio.run(ingest_channels(["@alpha"], test_db, config, transport=transport))
+    assert mock_extract.call_count == 4
+
+    mock_extract.reset_mock()
+    mock_enrich.reset_mock()
+    results = asyncio.run(
+        ingest_channels(["@alpha"], test_db, config, transport=transport)
+    )
+
+    assert results[0].skipped_known == 4
+    assert results[0].new_articles == 1
+    assert mock_extract.call_count == 1
+    assert mock_enrich.call_count == 1
+
+
+@patch("app.core.ingestion.enrich_article", return_value=SUMMARY)
+def test_repoll_matches_stable_guids(mock_enrich, test_db, clean_articles_table):
+    """Test that entries whose link changed are recognised by their GUID."""
+
+    def feed(host):
+        items = "".join(
+            f"<item><title>alpha {i}</title>"
+            f"<link>https://{host}/alpha/{i}</link>"
+            f'<guid isPermaLink="false">alpha-{i}</guid>'
+            f"<description>{entry_text('alpha', i)}</description></item>"
+            for i in range(3)
+        )
+        channel = f"<channel>{items}</channel>"
+        return f'<?xml version="1.0"?><rss version="2.0">{channel}</rss>'
+
+    feeds = [feed("t.me"), feed("mirror.example")]
+
+    def handler(request):
+        return httpx.Response(200, text=feeds.pop(0))
+
+    config = IngestConfig(
+        base_url="http://stub/rss", ai_rate_per_second=0, freshness_seconds=0
+    )
+    transport = httpx.MockTransport(handler)
+    asyncio.run(ingest_channels(["@alpha"], test_db, config, transport=transport))
+    results = asyncio.run(
+        ingest_channels(["@alpha"], test_db, config, transport=transport)
+    )
+
+    assert results[0].skipped_known == 3
+    assert mock_enrich.call_count == 3
+    assert test_db.query(NewsArticle).filter(NewsArticle.guid == "alpha-0").count() == 1
+
+
+def test_conditional_headers_from_state():
+    """Test that stored validators become conditional request headers."""
+    assert conditional_headers(None) == {}
+    state = ChannelFetchState(
+        channel_alias="@alpha", etag='"abc"', last_modified="Mon, 01 Jan 2025"
+    )
+    assert conditional_headers(state) == {
+        "If-None-Match": '"abc"',
+        "If-Modified-Since": "Mon, 01 Jan 2025",
+    }
+
+
+@patch("app.core.ingestion.enrich_article", return_value=SUMMARY)
+def test_conditional_fetch_short_circuits(mock_enrich, test_db, clean_articles_table):
+    """Test that 304 responses and identical bodies skip feed parsing."""
+    seen_headers = []
+    responses = [
+        httpx.Response(200, text=build_feed("alpha", 2), headers={"ETag": '"v1"'}),
+        httpx.Response(304),
+        httpx.Response(200, text=build_feed("alpha", 2)),
+    ]
+
+    def handler(request):
+        seen_headers.append(request.headers.get("If-None-Match"))
+        return responses.pop(0)
+
+    config = IngestConfig(
+        base_url="http://stub/rss", ai_rate_per_second=0, freshness_seconds=0
+    )
+    transport = httpx.MockTransport(handler)
+    with patch(
+        "app.core.ingestion.feedparser.parse", wraps=feedparser.parse
+    ) as mock_parse:
+        results = [
+            asyncio.run(
+                ingest_channels(["@alpha"], test_db, config, transport=transport)
+            )[0]
+            for _ in range(3)
+        ]
+
+    assert seen_headers == [None, '"v1"', '"v1"']
+    assert [r.unchanged for r in results] == [False, True, True]
+    assert mock_parse.call_count == 1
+    state = test_db.get(ChannelFetchState, "@alpha")
+    test_db.refresh(state)
+    assert state.last_status == 200
+    assert state.last_entry_guid == "https://t.me/alpha/0"
+
+
+def test_normalize_channel_alias():
+    """Test that alias spellings of one channel share a key."""
+    assert normalize_channel_alias(" BBBreaking ") == "@bbbreaking"
+    assert normalize_channel_alias("@bbbreaking") == "@bbbreaking"
+
+
+@patch("app.core.ingestion.enrich_article", return_value=SUMMARY)
+def test_same_channel_is_fetched_once(mock_enrich, test_db, clean_articles_table):
+    """Test that repeated and recently fetched channels are not fetched again."""
+    requests_seen = []
+
+    def handler(request):
+        requests_seen.append(request.url.path)
+        return httpx.Response(200, text=build_feed("alpha", 2))
+
+    config = IngestConfig(base_url="http://stub/rss", ai_rate_per_second=0)
+    transport = httpx.MockTransport(handler)
+    coalescer = ChannelCoalescer()
+
+    first = asyncio.run(
+        ingest_channels(
+            ["@alpha", "alpha", "@ALPHA"],
+            test_db,
+            config,
+            transport=transport,
+            coalescer=coalescer,
+        )
+    )
+    second = asyncio.run(
+        ingest_channels(
+            ["@alpha"], test_db, config, transport=transport, coalescer=coalescer
+        )
+    )
+
+    assert requests_seen == ["/rss/alpha"]
+    assert [r.coalesced for r in first] == [False, True, True]
+    assert first[1].channel_alias == "alpha"
+    assert second[0].coalesced
+    assert second[0].new_articles == 2
+
+
+@patch("app.core.ingestion.enrich_article", return_value=SUMMARY)
+def test_updates_of_stored_articles_are_not_counted_new(
+    mock_enrich, test_db, clean_articles_table
+):
+    """Test that new_articles counts inserts, not rows the upsert updated."""
+
+    def handler(request):
+        return httpx.Response(200, text=build_feed("alpha", 3))
+
+    config = IngestConfig(
+        base_url="http://stub/rss", ai_rate_per_second=0, freshness_seconds=0
+    )
+    transport = httpx.MockTransport(handler)
+    first = asyncio.run(
+        ingest_channels(["@alpha"], test_db, config, transport=transport)
+    )
+    test_db.query(ChannelFetchState).delete()
+    test_db.commit()
+    # Entries the pre-filter misses still reach the upsert as updates
+    with patch("app.core.ingestion.get_existing_entry_keys", return_value=set()):
+        second = asyncio.run(
+            ingest_channels(["@alpha"], test_db, config, transport=transport)
+        )
+
+    assert first[0].new_articles == 3
+    assert second[0].processed == 3
+    assert second[0].new_articles == 0
+    assert test_db.query(NewsArticle).count() == 3
+
+
+def test_coalescer_keeps_results_for_the_run_window():
+    """Test that a result is kept for the freshness window of its run."""
+    coalescer = ChannelCoalescer()
+    stats = IngestStats(channel_alias="@alpha")
+    with patch("app.core.ingestion.time.monotonic", return_value=1000.0):
+        coalescer.claim("@alpha", 600)
+        coalescer.complete("@alpha", stats, 600)
+    # Another channel completing later must not prune @alpha early
+    with patch("app.core.ingestion.time.monotonic", return_value=1300.0):
+        coalescer.claim("@beta", 600)
+        coalescer.complete("@beta", IngestStats(channel_alias="@beta"), 600)
+        future, is_leader = coalescer.claim("@alpha", 600)
+
+    assert not is_leader
+    assert future.result() is stats
+
+
+def test_empty_feed_saves_fetch_state(test_db, clean_articles_table):
+    """Test that the validators of a feed without entries are kept."""
+    seen_headers = []
+
+    def handler(request):
+        seen_headers.append(request.headers.get("If-None-Match"))
+        empty = '<?xml version="1.0"?><rss version="2.0"><channel></channel></rss>'
+        return httpx.Response(200, text=empty, headers={"ETag": '"empty"'})
+
+    config = IngestConfig(base_url="http://stub/rss", freshness_seconds=0)
+    transport = httpx.MockTransport(handler)
+    for _ in range(2):
+        asyncio.run(ingest_channels(["@quiet"], test_db, config, transport=transport))
+
+    assert seen_headers == [None, '"empty"']
+
+
+@patch("app.core.ingestion.enrich_article", return_value=EMPTY)
+def test_ingestion_clears_response_cache(mock_enrich, test_db, clean_articles_table):
+    """Test that storing new articles drops cached responses."""
+    response_cache.set("listing", "stale")
+
+    def handler(request):
+        return httpx.Response(200, text=build_feed("fresh", 1))
+
+    config = IngestConfig(base_url="http://stub/rss")
+    asyncio.run(
+        ingest_channels(["@fresh"], test_db, config, transport=httpx.MockTransport(handler))
+    )
+
+    assert response_cache.get("listing") is None
+
+
+STORY = (
+    "The central bank raised its key interest rate to 21 percent on Friday, "
+    "the highest level since 2003, and signalled further tightening as "
+    "inflation keeps accelerating across the economy. Analysts had expected "
+    "a smaller increase of one percentage point, and markets reacted with a "
+    "sharp drop in government bond prices while the ruble strengthened "
+    "slightly against the dollar in evening trading."
+)
+
+
+@patch("app.core.ingestion.enrich_article", return_value=RATES_UP)
+def test_near_duplicates_reuse_enrichment(mock_enrich, test_db, clean_articles_table):
+    """Test that reposts of a story are enriched once and share a cluster."""
+    footers = {"rbc": "Subscribe to RBC", "bbbreaking": "Breaking news", "other": ""}
+
+    def text(channel, i):
+        # Entry 0 is the same story everywhere, entry 1 is unique per channel
+        return f"{STORY} {footers[channel]}" if i == 0 else entry_text(channel, i)
+
+    def handler(request):
+        channel = request.url.path.rsplit("/", 1)[-1]
+        return httpx.Response(200, text=build_feed(channel, 2, text))
+
+    config = IngestConfig(base_url="http://stub/rss", ai_rate_per_second=0)
+    transport = httpx.MockTransport(handler)
+    results = asyncio.run(
+        ingest_channels(["@rbc", "@bbbreaking"], test_db, config, transport=transport)
+    )
+    # Both copies of the story are enriched in the same run; one waits for the other
+    assert mock_enrich.call_count == 3
+    assert sum(r.near_duplicates for r in results) == 1
+
+    # A later copy reuses the stored enrichment
+    results = asyncio.run(
+        ingest_channels(["@other"], test_db, config, transport=transport)
+    )
+    assert results[0].near_duplicates == 1
+    assert mock_enrich.call_count == 4
+
+    stories = test_db.query(NewsArticle).filter(NewsArticle.url.like("%/0")).all()
+    singles = test_db.query(NewsArticle).filter(NewsArticle.url.like("%/1")).all()
+    assert len({article.cluster_id for article in stories}) == 1
+    assert stories[0].cluster_id == min(article.id for article in stories)
+    assert all(article.ai_summary == "Rates up" for article in stories)
+    assert all(article.keywords == RATES_UP.keywords for article in stories)
+    assert all(article.sentiment_score == -0.4 for article in stories)
+    assert all(article.cluster_id == article.id for article in singles)
+
+
+@patch("app.core.ingestion.enrich_article", return_value=RATES_UP)
+def test_near_duplicate_detection_can_be_disabled(
+    mock_enrich, test_db, clean_articles_table
+):
+    """Test that without a distance every copy is enriched and unclustered."""
+
+    def handler(request):
+        return httpx.Response(200, text=build_feed("rbc", 2, lambda c, i: STORY))
+
+    config = IngestConfig(
+        base_url="http://stub/rss", ai_rate_per_second=0, near_duplicate_distance=None
+    )
+    asyncio.run(
+        ingest_channels(["@rbc"], test_db, config, transport=httpx.MockTransport(handler))
+    )
+
+    assert mock_enrich.call_count == 2
+    assert test_db.query(NewsArticle).filter(NewsArticle.cluster_id.is_(None)).count() == 2
@@ -0,0 +1,159 @@
+"""
+Unit tests for the persistent LLM result cache.
+"""
+
+import sqlite3
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.core import ai
+from app.core.llm_cache import LLMCache, input_digest
+
+ARTICLE = (
+    "Scientists have discovered a new species of deep-sea fish that can "
+    "survive extreme pressure in the Mariana Trench."
+)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = LLMCache(str(tmp_path / "llm" / "cache.sqlite3"), max_entries=3)
+    with patch("app.core.ai.llm_cache", cache):
+        yield cache
+
+
+def mock_answer(mock_client, text):
+    response = MagicMock()
+    response.choices = [MagicMock(message=MagicMock(content=text))]
+    mock_client.chat.completions.create.return_value = response
+
+
+def test_input_digest_normalizes_whitespace():
+    """Test that reformatted text maps to the same key."""
+    assert input_digest("Hello  world\n") == input_digest(" Hello world")
+    assert input_digest("Café") == input_digest("Café")
+    assert input_digest("ab", "c") != input_digest("a", "bc")
+
+
+def test_get_set_and_key_parts(cache):
+    """Test that task, model and prompt version are all part of the key."""
+    cache.set("summary", "gpt", 1, "Short", ARTICLE)
+    assert cache.get("summary", "gpt", 1, f"  {ARTICLE}  ") == "Short"
+    assert cache.get("summary", "gpt", 2, ARTICLE) is None
+    assert cache.get("summary", "other", 1, ARTICLE) is None
+    assert cache.get("category", "gpt", 1, ARTICLE) is None
+    stats = cache.stats()
+    assert stats["hits"] == stats["llm_calls_saved"] == 1
+    assert stats["misses"] == 3
+    assert stats["hit_rate"] == 0.25
+
+
+def test_evicts_least_recently_used(cache):
+    """Test that the entries over the cap that were used longest ago go first."""
+    for text in ("a", "b", "c"):
+        cache.set("summary", "gpt", 1, text.upper(), text)
+    assert cache.get("summary", "gpt", 1, "a") == "A"
+    cache.set("summary", "gpt", 1, "D", "d")
+
+    assert cache.get("summary", "gpt", 1, "b") is None
+    assert [cache.get("summary", "gpt", 1, t) for t in "acd"] == ["A", "C", "D"]
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["size"] == 3
+
+
+def test_counts_the_table_only_to_evict_in_batches(tmp_path):
+    """Test that inserts and stats use a running count; evictions are batched."""
+    cache = LLMCache(str(tmp_path / "batch.sqlite3"), max_entries=40)
+    statements = []
+    cache._connection().set_trace_callback(statements.append)
+
+    for i in range(44):
+        cache.set("summary", "gpt", 1, "Short", f"article {i}")
+    # Stats report the running count without a query
+    stats = cache.stats()
+    counts = [sql for sql in statements if sql.startswith("SELECT count(*)")]
+    # The first insert counts the table, the 41st evicts down to 2 below
+    # the cap and the 44th passes it again
+    assert len(counts) == 3
+    assert stats["evictions"] == 3 + 3
+    assert stats["size"] == cache.size() == 38
+    assert cache.get("summary", "gpt", 1, "article 43") == "Short"
+    assert cache.get("summary", "gpt", 1, "article 0") is None
+
+
+def test_disabled_and_broken_cache_are_misses(tmp_path):
+    """Test that a zero size disables the cache and errors count as misses."""
+    disabled = LLMCache(str(tmp_path / "off.sqlite3"), max_entries=0)
+    disabled.set("summary", "gpt", 1, "Short", ARTICLE)
+    assert disabled.get("summary", "gpt", 1, ARTICLE) is None
+    assert not (tmp_path / "off.sqlite3").exists()
+
+    broken = LLMCache(str(tmp_path / "broken.sqlite3"), max_entries=10)
+    with patch.object(broken, "_connection", side_effect=sqlite3.OperationalError):
+        broken.set("summary", "gpt", 1, "Short", ARTICLE)
+        assert broken.get("summary", "gpt", 1, ARTICLE) is None
+    assert broken.stats()["errors"] == 2
+
+
+@patch("app.core.ai.client")
+def test_ai_results_are_cached(mock_client, cache):
+    """Test that identical text reaches the model once per task."""
+    mock_answer(mock_client, "A new fish species.")
+    assert ai.generate_article_summary(ARTICLE) == "A new fish species."
+    assert ai.generate_article_summary(f"{ARTICLE}\n") == "A new fish species."
+    assert mock_client.chat.completions.create.call_count == 1
+
+    mock_answer(mock_client, "science")
+    assert ai.generate_article_category(ARTICLE, "Fish") == "Science"
+    assert ai.generate_article_category(ARTICLE, "Fish") == "Science"
+    # Another title is another prompt
+    assert ai.generate_article_category(ARTICLE, "Trench") == "Science"
+    assert mock_client.chat.completions.create.call_count == 3
+    assert cache.stats()["llm_calls_saved"] == 2
+
+
+@patch("app.core.ai.client")
+def test_ai_fallback_summary_is_not_cached(mock_client, cache):
+    """Test that a failed call is retried instead of serving the fallback."""
+    mock_client.chat.completions.create.side_effect = Exception("API Error")
+    assert ai.generate_article_summary(ARTICLE).endswith("Trench.")
+
+    mock_client.chat.completions.create.side_effect = None
+    mock_answer(mock_client, "A new fish species.")
+    assert ai.generate_article_summary(ARTICLE) == "A new fish species."
+
+
+@patch("app.core.ai.client")
+def test_enrichment_is_cached_when_complete(mock_client, cache):
+    """Test that complete enrichments are cached and partial ones retried."""
+    mock_answer(mock_client, '{"summary": "A new fish species."}')
+    assert ai.enrich_article(ARTICLE, "Fish").category is None
+    assert cache.size() == 0
+
+    mock_answer(
+        mock_client,
+        '{"summary": "A new fish species.", "category": "Science", '
+        '"keywords": ["fish"], "sentiment_score": 0.5}',
+    )
+    first = ai.enrich_article(ARTICLE, "Fish")
+    second = ai.enrich_article(f"{ARTICLE}\n", "Fish")
+
+    assert second == first
+    assert second.keywords == "fish"
+    assert mock_client.chat.completions.create.call_count == 2
+
+
+@patch("app.core.ai.client")
+def test_unreadable_cached_enrichment_is_a_miss(mock_client, cache):
+    """Test that malformed or outdated cached enrichments call the model."""
+    mock_answer(
+        mock_client,
+        '{"summary": "A new fish species.", "category": "Science", '
+        '"keywords": ["fish"], "sentiment_score": 0.5}',
+    )
+    key = ("enrichment", ai.model_name(), ai.ENRICHMENT_PROMPT_VERSION)
+    for stored in ("not json", '{"summary": "Old layout"}'):
+        cache.set(*key, stored, "Fish", ARTICLE, "200")
+        assert ai.enrich_article(ARTICLE, "Fish").category == "Science"
+    assert mock_client.chat.completions.create.call_count == 2
@@ -0,0 +1,49 @@
+"""
+Unit tests for cursor pagination tokens.
+"""
+
+from datetime import datetime
+
+import pytest
+
+from app.core.pagination import (
+    InvalidCursorError,
+    decode_cursor,
+    decode_rank_cursor,
+    encode_cursor,
+    encode_rank_cursor,
+)
+
+
+def test_cursor_round_trip():
+    """Test that a cursor decodes to the position it was built from."""
+    published = datetime(2025, 1, 1, 12, 30, 15, 123456)
+
+    assert decode_cursor(encode_cursor(published, 42)) == (published, 42, None)
+    assert decode_cursor(encode_cursor(published, 42, channel_id=7)) == (
+        published,
+        42,
+        7,
+    )
+
+
+def test_cursor_is_url_safe():
+    """Test that tokens can be passed as query parameters unescaped."""
+    token = encode_cursor(datetime(2025, 1, 1), 10**12, channel_id=10**6)
+    assert all(c.isalnum() or c in "-_" for c in token)
+
+
+@pytest.mark.parametrize("token", ["", "not-a-cursor", "e30", "eyJkIjoieCIsImkiOjF9"])
+def test_invalid_cursor(token):
+    """Test that malformed tokens raise InvalidCursorError."""
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(token)
+
+
+def test_rank_cursor_round_trip():
+    """Test that search cursors keep the float score exact."""
+    score = 1.7035398230088494e-06
+    assert decode_rank_cursor(encode_rank_cursor(score, 7)) == (score, 7)
+
+    with pytest.raises(InvalidCursorError):
+        decode_rank_cursor(encode_cursor(datetime(2025, 1, 1), 7))
@@ -0,0 +1,52 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.core.config import settings
+from app.core.security import (
+    PasswordExecutor,
+    PasswordExecutorBusy,
+    get_password_hash,
+    pwd_context,
+    verify_password,
+)
+
+
+def test_password_hash_uses_configured_rounds():
+    hashed = get_password_hash("password123")
+    assert pwd_context.identify(hashed) == "bcrypt"
+    assert hashed.split("$")[2] == f"{settings.BCRYPT_ROUNDS:02d}"
+    assert verify_password("password123", hashed)
+
+
+def test_password_executor_runs_work():
+    executor = PasswordExecutor(workers=1, max_pending=0)
+    try:
+        hashed = asyncio.run(executor.run(get_password_hash, "password123"))
+        assert asyncio.run(executor.run(verify_password, "password123", hashed))
+    finally:
+        executor.shutdown()
+
+
+def test_password_executor_rejects_when_saturated():
+    executor = PasswordExecutor(workers=1, max_pending=1)
+    release = threading.Event()
+
+    async def scenario():
+        running = [
+            asyncio.ensure_future(executor.run(release.wait)) for _ in range(2)
+        ]
+        await asyncio.sleep(0)
+        with pytest.raises(PasswordExecutorBusy):
+            await executor.run(release.wait)
+        release.set()
+        await asyncio.gather(*running)
+        # Slots are returned once the work finishes
+        assert await executor.run(lambda: "ok") == "ok"
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        release.set()
+        executor.shutdown()
@@ -0,0 +1,145 @@
+"""
+Unit tests for the local semantic search index.
+"""
+
+import importlib.util
+import sys
+
+import pytest
+
+from app.core.semantic import (
+    HashingEmbedder,
+    SemanticIndex,
+    rebuild_semantic_index,
+    sync_semantic_index,
+)
+from app.db.models import NewsArticle
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+
+@pytest.fixture
+def embedder():
+    pytest.importorskip("numpy")
+    return HashingEmbedder(256)
+
+
+@pytest.fixture
+def index(tmp_path, embedder):
+    return SemanticIndex(str(tmp_path / "semantic"), embedder)
+
+
+def test_import_without_numpy(monkeypatch):
+    """Test that the module imports and reports itself unavailable without numpy."""
+    monkeypatch.setitem(sys.modules, "numpy", None)
+    spec = importlib.util.find_spec("app.core.semantic")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    assert module.np is None
+    assert not module.available()
+
+
+def test_embed_is_unit_and_deterministic(embedder):
+    """Test that vectors are normalised and stable across calls."""
+    vector = embedder.embed("Центральный банк повысил ставку")
+    assert vector.dtype == np.float32
+    assert vector.shape == (256,)
+    assert np.linalg.norm(vector) == pytest.approx(1.0, rel=1e-5)
+    assert np.array_equal(vector, embedder.embed("Центральный банк повысил ставку"))
+    assert not embedder.embed(" ... ").any()
+
+
+def test_embed_matches_inflected_forms(embedder):
+    """Test that other inflections of a word stay closer than unrelated text."""
+    query = embedder.embed("выборах президента")
+    related = embedder.embed("Выборы президента пройдут в марте")
+    unrelated = embedder.embed("Футбольный клуб выиграл финал")
+    assert query @ related > query @ unrelated
+
+
+def test_search_ranks_top_k(index, embedder):
+    """Test that search returns the k most similar articles in order."""
+    texts = ["bank raises interest rates", "new phone released", "rates cut again"]
+    index.add([10, 20, 30], embedder.embed_many(texts))
+    results = index.search(embedder.embed("interest rates"), 2)
+    assert [article_id for article_id, _ in results] == [10, 30]
+    assert results[0][1] > results[1][1]
+    assert index.search(embedder.embed("interest rates"), 0) == []
+
+
+def test_add_grows_replaces_and_persists(tmp_path, index, embedder):
+    """Test that rows survive growth, replace by id and are seen by readers."""
+    vectors = embedder.embed_many([f"article number {i}" for i in range(1500)])
+    index.add(list(range(1, 1501)), vectors)
+    index.add([7, 2000], embedder.embed_many(["tennis", "chess"]))
+    assert index.count == 1501
+    assert index.max_id() == 2000
+
+    reader = SemanticIndex(index.path, HashingEmbedder(256))
+    assert reader.search(embedder.embed("tennis"), 1)[0][0] == 7
+    assert reader.generation == index.generation
+
+    # Vectors of another vector space are not mixed with new ones
+    assert SemanticIndex(index.path, HashingEmbedder(128)).max_id() == 0
+
+
+def test_sync_semantic_index(test_db, index):
+    """Test that sync embeds new articles only and rebuild starts over."""
+    test_db.query(NewsArticle).delete()
+    articles = [
+        NewsArticle(title="Bank raises rates", content="Inflation", url="s://1"),
+        NewsArticle(title="Match report", content="Football", url="s://2"),
+    ]
+    test_db.add_all(articles)
+    test_db.commit()
+    try:
+        assert sync_semantic_index(test_db, index, batch_size=1) == 2
+        assert sync_semantic_index(test_db, index) == 0
+        assert index.max_id() == max(a.id for a in articles)
+        assert rebuild_semantic_index(test_db, index) == 2
+        assert index.count == 2
+    finally:
+        test_db.query(NewsArticle).delete()
+        test_db.commit()
+
+
+def test_sync_reembeds_edited_articles(test_db, index, embedder):
+    """Test that edited articles are embedded again, unchanged ones not."""
+    test_db.query(NewsArticle).delete()
+    article = NewsArticle(title="Bank raises rates", content="Inflation", url="s://1")
+    test_db.add(article)
+    test_db.commit()
+    try:
+        assert sync_semantic_index(test_db, index) == 1
+        article.title = "Match report"
+        article.content = "Football"
+        test_db.commit()
+        assert sync_semantic_index(test_db, index) == 1
+        assert index.search(embedder.embed("football match"), 1)[0][0] == article.id
+        assert index.count == 1
+        assert sync_semantic_index(test_db, index) == 0
+    finally:
+        test_db.query(NewsArticle).delete()
+        test_db.commit()
+
+
+def test_sync_skips_index_locked_by_another_writer(test_db, index, embedder):
+    """Test that a sync doesn't write while another writer holds the index."""
+    test_db.query(NewsArticle).delete()
+    article = NewsArticle(title="Bank raises rates", content="Inflation", url="s://1")
+    test_db.add(article)
+    test_db.commit()
+    try:
+        other = SemanticIndex(index.path, embedder)
+        with other.writer() as acquired:
+            assert acquired
+            assert sync_semantic_index(test_db, index) == 0
+            assert rebuild_semantic_index(test_db, index) == 0
+        assert index.count == 0
+        assert sync_semantic_index(test_db, index) == 1
+    finally:
+        test_db.query(NewsArticle).delete()
+        test_db.commit()